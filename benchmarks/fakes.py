@@ -0,0 +1,184 @@
+"""
+Offline Stand-ins for the LLM and Search Tool
+
+A scripted chat model and a fake search tool that behave like the Groq model
+and TavilySearch in the agent graph (tool calls, tool results, token usage)
+without any network access or API keys.
+
+Author: Limon Halder
+"""
+
+import asyncio
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Sequence, Type
+
+from langchain_core.callbacks import CallbackManagerForLLMRun, CallbackManagerForToolRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.tools import BaseTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import BaseModel, Field
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token)."""
+    return max(1, len(text) // 4)
+
+
+class ScriptedChatModel(BaseChatModel):
+    """
+    A deterministic chat model for offline runs.
+
+    Without a script it answers like a tool-using agent: a new user message
+    gets a search tool call (when tools are bound), and a tool result gets a
+    final answer quoting it. With a script, the given messages are replayed
+    in order, cycling when exhausted.
+
+    Attributes:
+        script (List[AIMessage]): Responses to replay; empty for the default behavior.
+        latency (float): Simulated provider latency in seconds. A `timeout`
+            call argument shorter than it makes the call fail with a
+            TimeoutError after `timeout` seconds, like a provider client.
+        answer_prefix (str): Text that starts every final answer.
+    """
+
+    script: List[AIMessage] = Field(default_factory=list)
+    latency: float = 0.0
+    answer_prefix: str = "Here is what I found"
+    call_count: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-fake"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"latency": self.latency, "answer_prefix": self.answer_prefix}
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> Any:
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], **kwargs)
+
+    def _delay(self, kwargs: Dict[str, Any]) -> float:
+        """Simulated latency of one call, capped by its `timeout` argument."""
+        timeout = kwargs.get("timeout")
+        return self.latency if timeout is None else min(self.latency, timeout)
+
+    def _check_timeout(self, kwargs: Dict[str, Any]) -> None:
+        timeout = kwargs.get("timeout")
+        if timeout is not None and self.latency > timeout:
+            raise TimeoutError(f"Request timed out after {timeout:.2f}s.")
+
+    def _respond(
+        self, messages: List[BaseMessage], tools: Optional[List[Dict]]
+    ) -> AIMessage:
+        self.call_count += 1
+        if self.script:
+            return self.script[(self.call_count - 1) % len(self.script)].model_copy()
+
+        prompt = " ".join(str(m.content) for m in messages)
+        last = messages[-1]
+        usage = {"input_tokens": estimate_tokens(prompt)}
+
+        if tools and not isinstance(last, ToolMessage):
+            usage["output_tokens"] = 12
+            usage["total_tokens"] = usage["input_tokens"] + 12
+            return AIMessage(
+                content="",
+                tool_calls=[
+                    {
+                        "name": tools[0]["function"]["name"],
+                        "args": {"query": str(last.content)[:200]},
+                        "id": f"call_{uuid.uuid4().hex[:12]}",
+                    }
+                ],
+                usage_metadata=usage,
+            )
+
+        context = str(last.content)[:200] if isinstance(last, ToolMessage) else ""
+        answer = f"{self.answer_prefix}: {context}"
+        usage["output_tokens"] = estimate_tokens(answer)
+        usage["total_tokens"] = usage["input_tokens"] + usage["output_tokens"]
+        return AIMessage(content=answer, usage_metadata=usage)
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if self.latency:
+            time.sleep(self._delay(kwargs))
+            self._check_timeout(kwargs)
+        message = self._respond(messages, kwargs.get("tools"))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[Any] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if self.latency:
+            await asyncio.sleep(self._delay(kwargs))
+            self._check_timeout(kwargs)
+        message = self._respond(messages, kwargs.get("tools"))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+class FakeSearchInput(BaseModel):
+    query: str = Field(description="Search query")
+
+
+class FakeSearchTool(BaseTool):
+    """
+    A search tool returning canned, Tavily-shaped results.
+
+    Attributes:
+        result_count (int): Number of results per call.
+        result_chars (int): Length of each result's content.
+        latency (float): Simulated network latency in seconds.
+        injected_text (str): Text placed in the first result, e.g. a malicious payload.
+    """
+
+    name: str = "tavily_search"
+    description: str = "Search the web and return the top results."
+    args_schema: Type[BaseModel] = FakeSearchInput
+    result_count: int = 5
+    result_chars: int = 500
+    latency: float = 0.0
+    injected_text: str = ""
+    call_count: int = 0
+
+    def _results(self, query: str) -> Dict[str, Any]:
+        self.call_count += 1
+        filler = (f"Result text about {query}. " * (self.result_chars // 20 + 1))[
+            : self.result_chars
+        ]
+        results = [
+            {
+                "title": f"Result {i} for {query}",
+                "url": f"https://example.com/{i}",
+                "content": filler,
+                "score": 1.0 - i / 10,
+            }
+            for i in range(self.result_count)
+        ]
+        if self.injected_text and results:
+            results[0]["content"] = self.injected_text
+        return {"query": query, "results": results}
+
+    def _run(
+        self, query: str, run_manager: Optional[CallbackManagerForToolRun] = None
+    ) -> Dict[str, Any]:
+        if self.latency:
+            time.sleep(self.latency)
+        return self._results(query)
+
+    async def _arun(self, query: str, run_manager: Optional[Any] = None) -> Dict[str, Any]:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._results(query)
@@ -0,0 +1,278 @@
+"""
+Secure Agent Pipeline Benchmarks
+
+Measures the overhead of each stage of the secure agent pipeline without any
+network access, using the scripted LLM and fake search tool from
+`benchmarks.fakes` and the synthetic corpora from `benchmarks.corpora`.
+
+Stages:
+- scan: `check_for_threats` on each corpus
+- logger: `log_output` cost on the request thread (records are written later)
+- graph: the LangGraph agent from `build_agent` with fake LLM and tool
+- wrapper: the same agent streamed through `SecureAgentWrapper`
+- startup: cold-start time of fresh interpreters importing the entry points
+  and building the fake agent (corpus options do not apply)
+
+For every stage and corpus it reports throughput, p50/p99 latency and peak
+traced memory. Results can be saved as a baseline and compared on later runs;
+the exit code is 1 when any p50 regresses beyond the tolerance.
+
+Usage:
+    python -m benchmarks.run --stages scan,logger --sizes 1000,20000,50000
+    python -m benchmarks.run --save-baseline
+    python -m benchmarks.run --baseline benchmarks/baseline.json --tolerance 0.25
+
+Author: Limon Halder
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+# Allow imports from parent directory
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# Keep benchmark log records out of the application's security.log
+os.environ.setdefault(
+    "SECURITY_LOG_PATH", os.path.join(tempfile.gettempdir(), "benchmark_security.log")
+)
+
+from benchmarks.corpora import CORPUS_KINDS, build_corpora
+
+STAGES = ("scan", "logger", "graph", "wrapper", "startup")
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+BenchResult = Dict[str, float]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of values."""
+    ordered = sorted(values)
+    index = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+def measure(fn: Callable[[], Any], iterations: int, warmup: int = 1) -> BenchResult:
+    """
+    Time repeated calls of `fn` and trace the peak memory of one extra call.
+
+    Args:
+        fn (Callable[[], Any]): The operation to benchmark.
+        iterations (int): Number of timed calls.
+        warmup (int): Untimed calls made first.
+
+    Returns:
+        BenchResult: Throughput, p50/p99 latency in ms and peak memory in KiB.
+    """
+    for _ in range(warmup):
+        fn()
+
+    latencies: List[float] = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    total = sum(latencies)
+    return {
+        "iterations": iterations,
+        "throughput_per_s": iterations / total if total else float("inf"),
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "peak_mem_kib": peak / 1024,
+    }
+
+
+def bench_scan(corpora: Dict[str, str], iterations: int) -> Dict[str, BenchResult]:
+    from wrapper.threat_detector import check_for_threats
+
+    return {
+        f"scan/{name}": measure(lambda: check_for_threats(text, stage="input"), iterations)
+        for name, text in corpora.items()
+    }
+
+
+def bench_logger(corpora: Dict[str, str], iterations: int) -> Dict[str, BenchResult]:
+    from logger.logger import get_log_stats, log_output
+
+    results = {
+        f"logger/{name}": measure(lambda: log_output(text), iterations)
+        for name, text in corpora.items()
+    }
+    while get_log_stats()["queued"]:
+        time.sleep(0.01)
+    return results
+
+
+def build_fake_agent(checkpointer: Optional[Any] = None) -> Any:
+    """Compile the real agent graph around the scripted LLM and fake search tool."""
+    from benchmarks.fakes import FakeSearchTool, ScriptedChatModel
+    from orchestrator.agent_builder import build_agent
+    from orchestrator.llm_node import LLMNode
+
+    search_tool = FakeSearchTool()
+    llm = ScriptedChatModel().bind_tools([search_tool])
+    return build_agent(LLMNode(llm), search_tool, checkpointer=checkpointer)
+
+
+def bench_graph(corpora: Dict[str, str], iterations: int) -> Dict[str, BenchResult]:
+    agent = build_fake_agent()
+    return {
+        f"graph/{name}": measure(lambda: agent.invoke({"messages": text}), iterations)
+        for name, text in corpora.items()
+    }
+
+
+def bench_wrapper(corpora: Dict[str, str], iterations: int) -> Dict[str, BenchResult]:
+    from wrapper.base_wrapper import SecureAgentWrapper
+
+    secure_agent = SecureAgentWrapper(build_fake_agent())
+
+    def run(text: str) -> None:
+        for _ in secure_agent.stream({"messages": text}, stream_mode="values"):
+            pass
+
+    return {
+        f"wrapper/{name}": measure(lambda: run(text), iterations)
+        for name, text in corpora.items()
+    }
+
+
+# Cold-start cases: code run in a fresh interpreter from the repository root
+STARTUP_CASES = {
+    "import_main": "import main",
+    "import_wrapper": "import wrapper.base_wrapper",
+    "build_fake_agent": "from benchmarks.run import build_fake_agent; build_fake_agent()",
+}
+
+
+def bench_startup(corpora: Dict[str, str], iterations: int) -> Dict[str, BenchResult]:
+    repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+    def run(code: str) -> None:
+        subprocess.run([sys.executable, "-c", code], cwd=repo_root, check=True)
+
+    # Interpreter startup alone, to separate it from the cost of our imports
+    cases = {"python": "pass", **STARTUP_CASES}
+    return {
+        f"startup/{name}": measure(lambda: run(code), max(1, iterations // 4))
+        for name, code in cases.items()
+    }
+
+
+STAGE_RUNNERS: Dict[str, Callable[[Dict[str, str], int], Dict[str, BenchResult]]] = {
+    "scan": bench_scan,
+    "logger": bench_logger,
+    "graph": bench_graph,
+    "wrapper": bench_wrapper,
+    "startup": bench_startup,
+}
+
+
+def compare_to_baseline(
+    results: Dict[str, BenchResult], baseline: Dict[str, BenchResult], tolerance: float
+) -> List[str]:
+    """
+    List the cases whose p50 latency regressed beyond the tolerance.
+
+    Args:
+        results (Dict[str, BenchResult]): Current results.
+        baseline (Dict[str, BenchResult]): Saved baseline results.
+        tolerance (float): Allowed relative slowdown (0.25 = 25%).
+
+    Returns:
+        List[str]: One line per regressed case.
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        limit = previous["p50_ms"] * (1 + tolerance)
+        if current["p50_ms"] > limit:
+            regressions.append(
+                f"{name}: p50 {current['p50_ms']:.3f} ms > "
+                f"baseline {previous['p50_ms']:.3f} ms (+{tolerance:.0%})"
+            )
+    return regressions
+
+
+def print_report(results: Dict[str, BenchResult]) -> None:
+    print(f"{'case':<32} {'ops/s':>10} {'p50 ms':>10} {'p99 ms':>10} {'peak KiB':>10}")
+    for name, r in results.items():
+        print(
+            f"{name:<32} {r['throughput_per_s']:>10.1f} {r['p50_ms']:>10.3f} "
+            f"{r['p99_ms']:>10.3f} {r['peak_mem_kib']:>10.1f}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Entry point for the benchmark CLI.
+
+    Returns:
+        int: Process exit code (1 if a regression was found).
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the secure agent pipeline offline.")
+    parser.add_argument("--stages", default=",".join(STAGES), help="Comma-separated stages.")
+    parser.add_argument("--sizes", default="1000,20000,50000", help="Corpus sizes in chars.")
+    parser.add_argument("--kinds", default=",".join(CORPUS_KINDS), help="Corpus kinds.")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON path.")
+    parser.add_argument("--save-baseline", action="store_true", help="Overwrite the baseline.")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    corpora = build_corpora(
+        [int(size) for size in args.sizes.split(",")], args.kinds.split(",")
+    )
+    results: Dict[str, BenchResult] = {}
+    for stage in args.stages.split(","):
+        results.update(STAGE_RUNNERS[stage](corpora, args.iterations))
+
+    print_report(results)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            json.dump(
+                {
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                    "results": results,
+                },
+                file,
+                indent=2,
+            )
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)["results"]
+        regressions = compare_to_baseline(results, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+        print("No regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
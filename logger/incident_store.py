@@ -0,0 +1,442 @@
+"""
+Threat Incident Store
+
+Keeps every threat detection in an indexed SQLite database next to
+`security.log`, so audit questions ("Prompt Injection blocks per hour last
+week", "all incidents of this session") are answered by a query instead of
+grepping the log.
+
+Each incident stores the timestamp, category, stage, session id, request id,
+pattern-set version, whether the verdict came from the verdict cache, the
+SHA-256 and length of the offending text and a short excerpt of it. The full
+text is never stored.
+
+`log_threat` hands incidents to `record_incident`, which hashes and excerpts
+the text on the calling thread and appends the row to a bounded queue. A background thread writes them in batches (one transaction
+per batch), so request threads never touch the database. The database and the
+thread are only opened by the first incident.
+
+Configuration (environment variables):
+    THREAT_INCIDENT_DB: Database path; empty disables the store
+        (default 'security_incidents.db').
+    THREAT_INCIDENT_EXCERPT_CHARS: Excerpt length; 0 stores no text
+        (default 200, or 0 when SECURITY_LOG_PAYLOAD is 'drop').
+
+Command line:
+    python -m logger.incident_store counts --since 7d --bucket hour --category "Prompt Injection"
+    python -m logger.incident_store query --session user-42 --limit 50
+
+Author: Limon Halder
+"""
+
+import argparse
+import atexit
+import hashlib
+import json
+import logging
+import os
+import queue
+import re
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+# Shared with logger.logger; looked up by name to avoid a circular import
+_logger = logging.getLogger("SecurityLogger")
+
+DEFAULT_INCIDENT_DB = "security_incidents.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS incidents (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    category TEXT NOT NULL,
+    stage TEXT,
+    session_id TEXT,
+    request_id TEXT,
+    pattern_version TEXT,
+    cache_hit INTEGER,
+    text_sha256 TEXT,
+    text_len INTEGER,
+    excerpt TEXT
+);
+CREATE INDEX IF NOT EXISTS incidents_ts ON incidents (ts);
+CREATE INDEX IF NOT EXISTS incidents_category_ts ON incidents (category, ts);
+CREATE INDEX IF NOT EXISTS incidents_session_ts ON incidents (session_id, ts);
+"""
+
+_COLUMNS = (
+    "ts",
+    "category",
+    "stage",
+    "session_id",
+    "request_id",
+    "pattern_version",
+    "cache_hit",
+    "text_sha256",
+    "text_len",
+    "excerpt",
+)
+
+# strftime formats for count buckets
+BUCKET_FORMATS = {
+    "minute": "%Y-%m-%dT%H:%M",
+    "hour": "%Y-%m-%dT%H:00",
+    "day": "%Y-%m-%d",
+}
+
+_STOP = object()
+
+
+def _default_excerpt_chars() -> int:
+    if os.getenv("SECURITY_LOG_PAYLOAD", "full") == "drop":
+        return 0
+    return int(os.getenv("THREAT_INCIDENT_EXCERPT_CHARS", "200"))
+
+
+class IncidentStore:
+    """
+    Batched writer and query interface for the incident database.
+
+    Attributes:
+        path (str): Database file path.
+        batch_size (int): Most incidents written per transaction.
+        flush_interval (float): Longest time an incident waits to be written.
+        excerpt_chars (int): Characters of the offending text kept.
+        dropped (int): Incidents discarded because the queue was full.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_INCIDENT_DB,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        excerpt_chars: Optional[int] = None,
+        queue_size: int = 10000,
+    ):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.excerpt_chars = _default_excerpt_chars() if excerpt_chars is None else excerpt_chars
+        self.dropped = 0
+
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._closed = False
+
+    # --- Writing -------------------------------------------------------------
+
+    def record(
+        self,
+        category: str,
+        text: Any,
+        stage: Optional[str] = None,
+        session_id: Optional[str] = None,
+        request_id: Optional[str] = None,
+        pattern_version: Optional[str] = None,
+        cache_hit: Optional[bool] = None,
+    ) -> None:
+        """
+        Queue one incident; only writing happens on the writer thread.
+
+        The text is converted, hashed and cut to its excerpt here, so the row
+        describes the text as it was when detected, and the queue holds no
+        references to the caller's (possibly large, possibly mutable) payload.
+
+        Args:
+            category (str): Threat category (or block reason).
+            text (Any): The offending text.
+            stage (Optional[str]): Stage where it was found.
+            session_id (Optional[str]): Conversation/session id.
+            request_id (Optional[str]): Request id of the agent run.
+            pattern_version (Optional[str]): Version of the rules that matched.
+            cache_hit (Optional[bool]): Whether the verdict came from the cache.
+        """
+        if self._thread is None:
+            self._start()
+        text = text if isinstance(text, str) else str(text)
+        incident = (
+            time.time(),
+            category,
+            stage,
+            session_id,
+            request_id,
+            pattern_version,
+            None if cache_hit is None else int(cache_hit),
+            hashlib.sha256(text.encode("utf-8", "replace")).hexdigest(),
+            len(text),
+            text[: self.excerpt_chars] if self.excerpt_chars else None,
+        )
+        try:
+            self._queue.put_nowait(incident)
+        except queue.Full:
+            self.dropped += 1
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is None and not self._closed:
+                self._thread = threading.Thread(
+                    target=self._run, name="incident-writer", daemon=True
+                )
+                self._thread.start()
+
+    def _connect(self) -> Any:
+        import sqlite3  # Only needed once incidents are written or queried
+
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        return conn
+
+    def _write(self, conn: Any, batch: List[Tuple[Any, ...]]) -> None:
+        if not batch:
+            return
+        try:
+            with conn:
+                conn.executemany(
+                    f"INSERT INTO incidents ({', '.join(_COLUMNS)}) "
+                    f"VALUES ({', '.join('?' * len(_COLUMNS))})",
+                    batch,
+                )
+        except Exception as e:
+            _logger.error(f"Failed to write {len(batch)} threat incidents to '{self.path}': {e}")
+
+    def _run(self) -> None:
+        try:
+            conn = self._connect()
+        except Exception as e:
+            _logger.error(f"Failed to open threat incident store '{self.path}': {e}")
+            return
+
+        stop = False
+        while not stop:
+            item = self._queue.get()
+            batch: List[Tuple[Any, ...]] = []
+            waiters: List[threading.Event] = []
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is _STOP:
+                    stop = True
+                    break
+                if isinstance(item, threading.Event):
+                    waiters.append(item)
+                    break  # Flush requested: write what we have now
+                batch.append(item)
+                remaining = deadline - time.monotonic()
+                if len(batch) >= self.batch_size or remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            self._write(conn, batch)
+            for waiter in waiters:
+                waiter.set()
+        conn.close()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """
+        Wait until every incident queued so far is written.
+
+        Returns:
+            bool: True if the writer caught up within `timeout`.
+        """
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        self._queue.put(done, timeout=timeout)
+        return done.wait(timeout)
+
+    def close(self) -> None:
+        """Write pending incidents and stop the writer thread; safe to call twice."""
+        with self._lock:
+            self._closed = True
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join(timeout=10)
+
+    # --- Querying ------------------------------------------------------------
+
+    @staticmethod
+    def _filters(
+        category: Optional[str],
+        stage: Optional[str],
+        session_id: Optional[str],
+        since: Optional[float],
+        until: Optional[float],
+    ) -> Tuple[str, List[Any]]:
+        clauses, params = [], []
+        for column, value in (("category", category), ("stage", stage), ("session_id", session_id)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            clauses.append("ts >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("ts < ?")
+            params.append(until)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query(
+        self,
+        category: Optional[str] = None,
+        stage: Optional[str] = None,
+        session_id: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        limit: int = 100,
+    ) -> List[Dict[str, Any]]:
+        """
+        Return incidents matching all given filters, newest first.
+
+        Args:
+            category (Optional[str]): Exact threat category.
+            stage (Optional[str]): Exact stage ("input", "output", "tool", ...).
+            session_id (Optional[str]): Exact session id.
+            since (Optional[float]): Unix time lower bound (inclusive).
+            until (Optional[float]): Unix time upper bound (exclusive).
+            limit (int): Maximum rows returned.
+
+        Returns:
+            List[Dict[str, Any]]: One dict per incident with the stored columns.
+        """
+        where, params = self._filters(category, stage, session_id, since, until)
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                f"SELECT id, {', '.join(_COLUMNS)} FROM incidents{where} "
+                "ORDER BY ts DESC LIMIT ?",
+                params + [limit],
+            ).fetchall()
+        finally:
+            conn.close()
+        return [dict(zip(("id",) + _COLUMNS, row)) for row in rows]
+
+    def counts(
+        self,
+        bucket: str = "hour",
+        category: Optional[str] = None,
+        stage: Optional[str] = None,
+        session_id: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Count incidents per time bucket (UTC) and category.
+
+        Args:
+            bucket (str): "minute", "hour" or "day".
+            category, stage, session_id, since, until: Filters as for `query`.
+
+        Returns:
+            List[Dict[str, Any]]: `{"bucket", "category", "count"}` rows in time order.
+        """
+        where, params = self._filters(category, stage, session_id, since, until)
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                f"SELECT strftime(?, ts, 'unixepoch') AS bucket, category, COUNT(*) "
+                f"FROM incidents{where} GROUP BY bucket, category ORDER BY bucket, category",
+                [BUCKET_FORMATS[bucket]] + params,
+            ).fetchall()
+        finally:
+            conn.close()
+        return [{"bucket": b, "category": c, "count": n} for b, c, n in rows]
+
+
+# Process-wide store used by log_threat; created on the first incident
+_incident_store: Optional[IncidentStore] = None
+_store_lock = threading.Lock()
+
+
+def get_incident_store() -> Optional[IncidentStore]:
+    """
+    Return the process-wide incident store.
+
+    Returns:
+        Optional[IncidentStore]: The store at THREAT_INCIDENT_DB, or None if disabled.
+    """
+    global _incident_store
+    if _incident_store is None:
+        path = os.getenv("THREAT_INCIDENT_DB", DEFAULT_INCIDENT_DB)
+        if not path:
+            return None
+        with _store_lock:
+            if _incident_store is None:
+                _incident_store = IncidentStore(path)
+                atexit.register(_incident_store.close)
+    return _incident_store
+
+
+def record_incident(category: str, text: Any, stage: Optional[str], **fields: Any) -> None:
+    """
+    Queue an incident in the process-wide store, if enabled.
+
+    Args:
+        category (str): Threat category (or block reason).
+        text (Any): The offending text.
+        stage (Optional[str]): Stage where it was found.
+        **fields (Any): session_id, request_id, pattern_version, cache_hit.
+    """
+    store = get_incident_store()
+    if store is not None:
+        store.record(category, text, stage, **fields)
+
+
+def parse_time(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a CLI time: a relative age ("30m", "24h", "7d") or an ISO timestamp.
+
+    Returns:
+        Optional[float]: Unix time, or None if `value` is empty.
+    """
+    if not value:
+        return None
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)([smhd])", value)
+    if match:
+        seconds = {"s": 1, "m": 60, "h": 3600, "d": 86400}[match.group(2)]
+        return time.time() - float(match.group(1)) * seconds
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Command-line queries; prints one JSON object per line."""
+    parser = argparse.ArgumentParser(description="Query the threat incident store.")
+    parser.add_argument("command", choices=("query", "counts"))
+    parser.add_argument("--db", default=os.getenv("THREAT_INCIDENT_DB") or DEFAULT_INCIDENT_DB)
+    parser.add_argument("--category")
+    parser.add_argument("--stage")
+    parser.add_argument("--session", dest="session_id")
+    parser.add_argument("--since", help="Age like 7d/24h/30m or an ISO timestamp.")
+    parser.add_argument("--until", help="Age like 1h or an ISO timestamp.")
+    parser.add_argument("--bucket", choices=tuple(BUCKET_FORMATS), default="hour")
+    parser.add_argument("--limit", type=int, default=100)
+    args = parser.parse_args(argv)
+
+    store = IncidentStore(args.db)
+    filters = {
+        "category": args.category,
+        "stage": args.stage,
+        "session_id": args.session_id,
+        "since": parse_time(args.since),
+        "until": parse_time(args.until),
+    }
+    if args.command == "query":
+        rows = store.query(limit=args.limit, **filters)
+    else:
+        rows = store.counts(bucket=args.bucket, **filters)
+    for row in rows:
+        sys.stdout.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+
+if __name__ == "__main__":
+    main()
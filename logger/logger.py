@@ -2,25 +2,305 @@
 Security Logging Utility
 
 Provides centralized logging functions for input/output, threats, errors, and warnings.
-Writes structured logs to a UTF-8 encoded log file named 'security.log'.
+
+Records are handed to a bounded in-memory queue on the calling thread and are
+formatted and written by a background thread, so request threads never touch
+the disk. Each record is one JSON line (timestamp, level, event type, stage,
+request id, threat category, payload length and hash) in 'security.log', which
+is rotated and gzip-compressed by size. The file and the writer thread are
+only opened once the first record is logged.
+
+Threat records are also kept in an indexed incident database for audit
+queries (see `logger.incident_store`).
+
+Configuration (environment variables):
+    SECURITY_LOG_PATH: Log file path (default 'security.log').
+    SECURITY_LOG_MAX_BYTES: Rotate once the file reaches this size (default 10 MB).
+    SECURITY_LOG_BACKUP_COUNT: Number of compressed rotations kept (default 5).
+    SECURITY_LOG_QUEUE_SIZE: Maximum number of pending records (default 10000).
+    SECURITY_LOG_PAYLOAD: 'full', 'truncate' or 'drop' (default 'full').
+    SECURITY_LOG_PAYLOAD_MAX_CHARS: Payload length kept by 'truncate' (default 2000).
 
 Author: Limon Halder
 """
 
+import atexit
+import contextvars
+import gzip
+import hashlib
+import json
 import logging
-from typing import Any
+import os
+import queue
+import shutil
+import threading
+import uuid
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Any, Dict, Iterator, Optional
+
+from logger.incident_store import record_incident
+
+LOG_PATH = os.getenv("SECURITY_LOG_PATH", "security.log")
+LOG_MAX_BYTES = int(os.getenv("SECURITY_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+LOG_BACKUP_COUNT = int(os.getenv("SECURITY_LOG_BACKUP_COUNT", "5"))
+LOG_QUEUE_SIZE = int(os.getenv("SECURITY_LOG_QUEUE_SIZE", "10000"))
+LOG_PAYLOAD_MODE = os.getenv("SECURITY_LOG_PAYLOAD", "full")
+LOG_PAYLOAD_MAX_CHARS = int(os.getenv("SECURITY_LOG_PAYLOAD_MAX_CHARS", "2000"))
+
+# How long a WARNING-or-higher record may wait for queue space before it is dropped.
+# Lower-severity records are dropped immediately when the queue is full.
+LOG_BLOCK_TIMEOUT = 0.5
+
+# Request id attached to every record logged while it is set
+request_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "security_log_request_id", default=None
+)
+
+# Session (conversation) id attached to every record logged while it is set
+session_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "security_log_session_id", default=None
+)
+
+
+@contextmanager
+def request_context(request_id: Optional[str] = None) -> Iterator[str]:
+    """
+    Tag every record logged inside the block with a request id.
+
+    Args:
+        request_id (Optional[str]): The id to use; a random one is generated if omitted.
+
+    Yields:
+        str: The active request id.
+    """
+    request_id = request_id or uuid.uuid4().hex
+    token = request_id_var.set(request_id)
+    try:
+        yield request_id
+    finally:
+        try:
+            request_id_var.reset(token)
+        except ValueError:
+            # Token was created in another context (e.g. a generator resumed elsewhere)
+            request_id_var.set(None)
+
+
+@contextmanager
+def session_context(session_id: Optional[str]) -> Iterator[Optional[str]]:
+    """
+    Tag every record and incident logged inside the block with a session id.
+
+    Args:
+        session_id (Optional[str]): The session (e.g. checkpointer thread) id;
+            None leaves the current value unchanged.
+
+    Yields:
+        Optional[str]: The active session id.
+    """
+    if session_id is None:
+        yield session_id_var.get()
+        return
+    token = session_id_var.set(session_id)
+    try:
+        yield session_id
+    finally:
+        try:
+            session_id_var.reset(token)
+        except ValueError:
+            session_id_var.set(None)
+
+
+def describe_payload(payload: Any) -> Dict[str, Any]:
+    """
+    Build the payload fields of a record according to SECURITY_LOG_PAYLOAD.
+
+    Args:
+        payload (Any): The logged text; non-str objects are converted with
+            str() when the record is queued.
+
+    Returns:
+        Dict[str, Any]: Text length and hash, plus the full or truncated text.
+    """
+    text = payload if isinstance(payload, str) else str(payload)
+    fields: Dict[str, Any] = {
+        "text_len": len(text),
+        "text_sha256": hashlib.sha256(text.encode("utf-8", "replace")).hexdigest(),
+    }
+    if LOG_PAYLOAD_MODE == "full":
+        fields["text"] = text
+    elif LOG_PAYLOAD_MODE == "truncate":
+        fields["text"] = text[:LOG_PAYLOAD_MAX_CHARS]
+        if len(text) > LOG_PAYLOAD_MAX_CHARS:
+            fields["truncated"] = True
+    return fields
+
+
+class JsonLineFormatter(logging.Formatter):
+    """Formats a record as a single JSON object per line."""
+
+    STRUCTURED_FIELDS = (
+        "stage",
+        "request_id",
+        "session_id",
+        "threat_category",
+        "pattern_version",
+        "cache_hit",
+        "stop_reason",
+    )
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "event": getattr(record, "event", "log"),
+            "message": record.getMessage(),
+        }
+        for field in self.STRUCTURED_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if hasattr(record, "payload"):
+            entry.update(describe_payload(record.payload))
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    Queue handler that defers formatting to the writer thread and never blocks for long.
+
+    Once logging has been shut down, records are written synchronously
+    instead of being queued for a writer thread that no longer runs.
+
+    Attributes:
+        dropped (int): Number of records discarded because the queue was full.
+    """
+
+    def __init__(self, log_queue: "queue.Queue[logging.LogRecord]"):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Only capture what is tied to the calling thread; formatting happens later.
+        record.request_id = getattr(record, "request_id", None) or request_id_var.get()
+        record.session_id = getattr(record, "session_id", None) or session_id_var.get()
+        payload = getattr(record, "payload", None)
+        if payload is not None and not isinstance(payload, str):
+            # Snapshot mutable payloads (message lists, state dicts) as they are now
+            record.payload = str(payload)
+        if record.exc_info:
+            record.exc_text = formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if _listener_stopped:
+            file_handler.handle(record)
+            return
+        if not _listener_started:
+            _ensure_listener()
+        try:
+            if record.levelno >= logging.WARNING:
+                self.queue.put(record, timeout=LOG_BLOCK_TIMEOUT)
+            else:
+                self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            return
+        if _listener_stopped:
+            # Shutdown may have drained the queue before this record arrived
+            with _listener_lock:
+                _drain_queue()
+
+
+def _gzip_rotator(source: str, dest: str) -> None:
+    """Compress a rotated log file and remove the uncompressed original."""
+    with open(source, "rb") as src, gzip.open(dest, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    os.remove(source)
+
 
 # Configure logger
 logger = logging.getLogger("SecurityLogger")
 logger.setLevel(logging.DEBUG)
 
 # Define log message format
-formatter = logging.Formatter("%(asctime)s | %(levelname)s | %(message)s")
+formatter = JsonLineFormatter()
 
-# Log to a file with UTF-8 encoding
-file_handler = logging.FileHandler("security.log", encoding="utf-8")
+# Log to a size-rotated, UTF-8 encoded file with gzip-compressed backups
+file_handler = RotatingFileHandler(
+    LOG_PATH,
+    maxBytes=LOG_MAX_BYTES,
+    backupCount=LOG_BACKUP_COUNT,
+    encoding="utf-8",
+    delay=True,  # The file is opened by the first write, not at import
+)
 file_handler.setFormatter(formatter)
-logger.addHandler(file_handler)
+file_handler.namer = lambda name: f"{name}.gz"
+file_handler.rotator = _gzip_rotator
+
+# Hand records to the file handler through a bounded queue and a writer thread
+log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+queue_handler = BoundedQueueHandler(log_queue)
+logger.addHandler(queue_handler)
+
+# The writer thread starts with the first record, so importing this module is cheap
+listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+_listener_lock = threading.Lock()
+_listener_started = False
+_listener_stopped = False
+
+
+def _ensure_listener() -> None:
+    """Start the writer thread unless it is running or logging was shut down."""
+    global _listener_started
+    with _listener_lock:
+        if not _listener_started and not _listener_stopped:
+            listener.start()
+            _listener_started = True
+
+
+def _drain_queue() -> None:
+    """Write the records left in the queue synchronously; call with `_listener_lock` held."""
+    while True:
+        try:
+            record = log_queue.get_nowait()
+        except queue.Empty:
+            return
+        if isinstance(record, logging.LogRecord):  # Skip the listener's stop sentinel
+            file_handler.handle(record)
+
+
+def shutdown_logging() -> None:
+    """
+    Flush pending records and stop the writer thread; safe to call more than once.
+
+    Records logged afterwards are written synchronously. A record that was being
+    queued while shutdown drained the queue is written by the thread that logged it.
+    """
+    global _listener_started, _listener_stopped
+    with _listener_lock:
+        _listener_stopped = True
+        if _listener_started:
+            listener.stop()
+            _listener_started = False
+        # Records queued while the writer was stopping
+        _drain_queue()
+
+
+atexit.register(shutdown_logging)
+
+
+def get_log_stats() -> Dict[str, int]:
+    """
+    Report the state of the logging queue.
+
+    Returns:
+        Dict[str, int]: Pending and dropped record counts.
+    """
+    return {"queued": log_queue.qsize(), "dropped": queue_handler.dropped}
 
 
 def log_input(text: Any) -> None:
@@ -30,8 +310,7 @@ def log_input(text: Any) -> None:
     Args:
         text (Any): Input message or object.
     """
-    safe_text = str(text)
-    logger.info(f"Input: {safe_text}")
+    logger.info("Input", extra={"event": "input", "payload": text})
 
 
 def log_output(text: Any) -> None:
@@ -41,8 +320,7 @@ def log_output(text: Any) -> None:
     Args:
         text (Any): Output message or object.
     """
-    safe_text = str(text)
-    logger.info(f"Output: {safe_text}")
+    logger.info("Output", extra={"event": "output", "payload": text})
 
 
 def log_error(error_message: Any) -> None:
@@ -53,7 +331,7 @@ def log_error(error_message: Any) -> None:
         error_message (Any): Exception message or string description.
     """
     safe_message = str(error_message)
-    logger.error(f"Error: {safe_message}")
+    logger.error(f"Error: {safe_message}", extra={"event": "error"})
 
 
 def log_warning(warning_message: Any) -> None:
@@ -64,17 +342,47 @@ def log_warning(warning_message: Any) -> None:
         warning_message (Any): Warning description.
     """
     safe_message = str(warning_message)
-    logger.warning(f"Warning: {safe_message}")
+    logger.warning(f"Warning: {safe_message}", extra={"event": "warning"})
 
 
-def log_threat(threat_type: str, text: Any, stage: str) -> None:
+def log_threat(
+    threat_type: str,
+    text: Any,
+    stage: str,
+    pattern_version: Optional[str] = None,
+    cache_hit: Optional[bool] = None,
+) -> None:
     """
     Logs a detected threat incident with metadata.
 
+    The incident is also queued for the incident store, tagged with the
+    current session and request ids.
+
     Args:
         threat_type (str): The type of threat (e.g., 'Prompt Injection').
         text (Any): The raw text that triggered the detection.
         stage (str): 'input' or 'output' — stage where threat was found.
+        pattern_version (Optional[str]): Version of the rules that matched.
+        cache_hit (Optional[bool]): True if the verdict came from the verdict
+            cache rather than a fresh scan.
     """
-    safe_text = str(text)
-    logger.warning(f"{threat_type} Threat Detected during {stage}: {safe_text}")
+    logger.warning(
+        f"{threat_type} Threat Detected during {stage}",
+        extra={
+            "event": "threat",
+            "stage": stage,
+            "threat_category": threat_type,
+            "pattern_version": pattern_version,
+            "cache_hit": cache_hit,
+            "payload": text,
+        },
+    )
+    record_incident(
+        threat_type,
+        text,
+        stage,
+        session_id=session_id_var.get(),
+        request_id=request_id_var.get(),
+        pattern_version=pattern_version,
+        cache_hit=cache_hit,
+    )
@@ -0,0 +1,258 @@
+"""
+Pipeline Metrics
+
+In-process counters and latency histograms for the secure agent pipeline,
+readable as a dictionary snapshot or as a Prometheus text exposition dump.
+
+Recorded by default:
+- secure_agent_stage_seconds{stage}: latency of the llm/tools nodes, threat
+  scans, log calls and whole streams
+- secure_agent_llm_tokens_total{kind}: input/output/total tokens reported by the model
+- secure_agent_tool_calls_total{tool}: tool calls requested by the model
+- secure_agent_blocked_total{stage}: requests blocked at input or output
+- secure_agent_verdict_cache_total{result}: threat verdict cache hits and misses
+
+Author: Limon Halder
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Collection, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Latency buckets in seconds, from sub-millisecond scans to slow provider calls
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _escape_label_value(value: str) -> str:
+    """Escape a label value as the Prometheus text format requires."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    body = ",".join(f'{name}="{_escape_label_value(value)}"' for name, value in pairs)
+    return "{" + body + "}"
+
+
+class Histogram:
+    """A fixed-bucket histogram (non-cumulative counts; cumulated on export)."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile as the upper bound of the bucket that contains it."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, bucket_count in zip(self.buckets, self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class MetricsRegistry:
+    """
+    Thread-safe store of named counters and histograms.
+
+    Each metric is identified by its name plus a set of label values.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._help: Dict[str, Tuple[str, str]] = {}
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+
+    def describe(self, name: str, kind: str, help_text: str) -> None:
+        """Register the HELP text and TYPE ('counter' or 'histogram') of a metric."""
+        self._help[name] = (kind, help_text)
+
+    def inc(self, name: str, amount: float = 1, **labels: Any) -> None:
+        """Add `amount` to a counter."""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        """Record one value in a histogram."""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram()
+            histogram.observe(value)
+
+    def reset(self) -> None:
+        """Drop every recorded value (metric descriptions are kept)."""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def snapshot(self) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Return the current values for in-process inspection.
+
+        Returns:
+            Dict[str, List[Dict[str, Any]]]: Per metric name, one entry per label
+                set. Counters carry `value`; histograms carry `count`, `sum`,
+                `mean` and bucket-based `p50`/`p90`/`p99` estimates.
+        """
+        result: Dict[str, List[Dict[str, Any]]] = {}
+        with self._lock:
+            for name, series in self._counters.items():
+                result[name] = [
+                    {"labels": dict(key), "value": value} for key, value in series.items()
+                ]
+            for name, series in self._histograms.items():
+                result[name] = [
+                    {
+                        "labels": dict(key),
+                        "count": h.count,
+                        "sum": h.total,
+                        "mean": h.total / h.count if h.count else 0.0,
+                        "p50": h.quantile(0.5),
+                        "p90": h.quantile(0.9),
+                        "p99": h.quantile(0.99),
+                    }
+                    for key, h in series.items()
+                ]
+        return result
+
+    def render_prometheus(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format.
+
+        Returns:
+            str: The exposition text, ending with a newline.
+        """
+        lines: List[str] = []
+        with self._lock:
+            for name, series in self._counters.items():
+                self._render_header(lines, name, "counter")
+                for key, value in series.items():
+                    lines.append(f"{name}{_format_labels(key)} {value}")
+            for name, series in self._histograms.items():
+                self._render_header(lines, name, "histogram")
+                for key, h in series.items():
+                    cumulative = 0
+                    for bound, bucket_count in zip(h.buckets, h.counts):
+                        cumulative += bucket_count
+                        labels = _format_labels(key, ("le", repr(bound)))
+                        lines.append(f"{name}_bucket{labels} {cumulative}")
+                    labels = _format_labels(key, ("le", "+Inf"))
+                    lines.append(f"{name}_bucket{labels} {h.count}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {h.total}")
+                    lines.append(f"{name}_count{_format_labels(key)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def _render_header(self, lines: List[str], name: str, default_kind: str) -> None:
+        kind, help_text = self._help.get(name, (default_kind, ""))
+        if help_text:
+            lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+
+
+# Process-wide registry used by the agent pipeline
+METRICS = MetricsRegistry()
+
+STAGE_SECONDS = "secure_agent_stage_seconds"
+LLM_TOKENS = "secure_agent_llm_tokens_total"
+TOOL_CALLS = "secure_agent_tool_calls_total"
+BLOCKED_REQUESTS = "secure_agent_blocked_total"
+VERDICT_CACHE_LOOKUPS = "secure_agent_verdict_cache_total"
+STOPPED_RUNS = "secure_agent_stopped_total"
+
+METRICS.describe(STAGE_SECONDS, "histogram", "Latency of secure agent pipeline stages.")
+METRICS.describe(LLM_TOKENS, "counter", "Tokens reported in LLM response metadata.")
+METRICS.describe(TOOL_CALLS, "counter", "Tool calls requested by the LLM.")
+METRICS.describe(BLOCKED_REQUESTS, "counter", "Requests blocked by threat detection.")
+METRICS.describe(VERDICT_CACHE_LOOKUPS, "counter", "Threat verdict cache lookups by result.")
+METRICS.describe(STOPPED_RUNS, "counter", "Agent runs stopped by their deadline or step budget.")
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    """
+    Record the duration of the enclosed block under `secure_agent_stage_seconds`.
+
+    Args:
+        stage (str): Stage label (e.g. 'llm', 'tools', 'input_scan', 'log').
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        METRICS.observe(STAGE_SECONDS, time.perf_counter() - start, stage=stage)
+
+
+def record_token_usage(message: Any) -> None:
+    """
+    Count the tokens reported on an LLM response.
+
+    Reads LangChain's `usage_metadata` and falls back to the provider's
+    `response_metadata["token_usage"]` (OpenAI/Groq style).
+
+    Args:
+        message (Any): The AIMessage returned by the model.
+    """
+    usage = getattr(message, "usage_metadata", None)
+    if usage:
+        counts = {
+            "input": usage.get("input_tokens", 0),
+            "output": usage.get("output_tokens", 0),
+            "total": usage.get("total_tokens", 0),
+        }
+    else:
+        token_usage = (getattr(message, "response_metadata", None) or {}).get("token_usage")
+        if not token_usage:
+            return
+        counts = {
+            "input": token_usage.get("prompt_tokens", 0),
+            "output": token_usage.get("completion_tokens", 0),
+            "total": token_usage.get("total_tokens", 0),
+        }
+    for kind, value in counts.items():
+        if value:
+            METRICS.inc(LLM_TOKENS, value, kind=kind)
+
+
+def record_tool_calls(message: Any, known_tools: Collection[str]) -> None:
+    """
+    Count the tool calls requested by an LLM response, per tool name.
+
+    Names outside `known_tools` are counted as "unknown", so a model inventing
+    tool names cannot grow the label set without bound.
+
+    Args:
+        message (Any): The AIMessage whose `tool_calls` are about to run.
+        known_tools (Collection[str]): Names of the tools that can be called.
+    """
+    for call in getattr(message, "tool_calls", None) or []:
+        name = call.get("name")
+        METRICS.inc(TOOL_CALLS, tool=name if name in known_tools else "unknown")
@@ -7,13 +7,18 @@ It defines the message state structure, builds nodes and edges for LangGraph, an
 Author: Limon Halder
 """
 
-from typing import Annotated, TypedDict, Optional
+from typing import Annotated, Any, Callable, List, TypedDict, Optional
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.graph import StateGraph, START, END
 from langgraph.graph.message import add_messages
-from langgraph.prebuilt import ToolNode, tools_condition
-from langchain_core.runnables import Runnable
+from langgraph.prebuilt import tools_condition
+from langchain_core.messages import BaseMessage
+from langchain_core.runnables import Runnable, RunnableConfig, RunnableLambda
 from langchain_core.tools import Tool
+from orchestrator.parallel_tool_node import ParallelToolNode
+from orchestrator.tool_output_gate import CONTINUE, ToolOutputGate
 from logger.logger import logger
+from logger.metrics import timed
 
 
 class State(TypedDict):
@@ -26,16 +31,87 @@ class State(TypedDict):
     messages: Annotated[list, add_messages]
 
 
+def timed_node(stage: str, node: Runnable) -> Runnable:
+    """
+    Wrap a graph node so every run is recorded in the stage latency histogram.
+
+    Args:
+        stage (str): Stage label for the `secure_agent_stage_seconds` metric.
+        node (Runnable): The node to wrap; its sync and async paths are both kept.
+
+    Returns:
+        Runnable: The instrumented node.
+    """
+
+    def run(state: State, config: RunnableConfig) -> Any:
+        with timed(stage):
+            return node.invoke(state, config)
+
+    async def arun(state: State, config: RunnableConfig) -> Any:
+        with timed(stage):
+            return await node.ainvoke(state, config)
+
+    return RunnableLambda(run, afunc=arun, name=stage)
+
+
+def compacted_node(
+    compactor: Callable[[List[BaseMessage]], List[BaseMessage]], node: Runnable
+) -> Runnable:
+    """
+    Wrap the LLM node so it sees a compacted copy of the message history.
+
+    The node's output is merged into the full state as usual, so compaction
+    only shrinks the prompt and never removes messages from the state.
+
+    Args:
+        compactor (Callable[[List[BaseMessage]], List[BaseMessage]]): Builds the
+            reduced prompt (e.g. HistoryCompactor).
+        node (Runnable): The LLM node; its sync and async paths are both kept.
+
+    Returns:
+        Runnable: The wrapped node.
+    """
+
+    def prompt_state(state: State) -> State:
+        with timed("compact"):
+            return {**state, "messages": compactor(state["messages"])}
+
+    def run(state: State, config: RunnableConfig) -> Any:
+        return node.invoke(prompt_state(state), config)
+
+    async def arun(state: State, config: RunnableConfig) -> Any:
+        return await node.ainvoke(prompt_state(state), config)
+
+    return RunnableLambda(run, afunc=arun, name="llm")
+
+
 def build_agent(
     llm_node: Runnable,
     search_tool: Optional[Tool] = None,
+    compactor: Optional[Callable[[List[BaseMessage]], List[BaseMessage]]] = None,
+    tool_timeout: float = 30.0,
+    max_tool_workers: int = 8,
+    checkpointer: Optional[BaseCheckpointSaver] = None,
+    tool_gate: Optional[ToolOutputGate] = None,
 ) -> Optional[Runnable]:
     """
     Constructs a LangGraph agent by wiring up LLM and tool nodes.
 
     Args:
-        llm_node (Runnable): The node responsible for LLM interactions.
+        llm_node (Runnable): The node responsible for LLM interactions. A callable
+            with an `ainvoke` coroutine (such as LLMNode) is used for async runs.
         search_tool (Optional[Tool]): An optional tool (e.g., search) to bind with the graph.
+        compactor (Optional[Callable[[List[BaseMessage]], List[BaseMessage]]]):
+            Optional history compaction (e.g. HistoryCompactor) applied to the
+            prompt of every LLM call; the stored history is left intact.
+        tool_timeout (float): Deadline in seconds for each tool call; late calls
+            return an error message to the LLM instead of stalling the graph.
+        max_tool_workers (int): Thread pool size for concurrent tool calls.
+        checkpointer (Optional[BaseCheckpointSaver]): Stores each conversation
+            under the `thread_id` given in the run config (e.g.
+            SQLiteCheckpointSaver), so callers only send new messages.
+        tool_gate (Optional[ToolOutputGate]): Scans tool results before they
+            reach the LLM and strips them or ends the run if they are blocked.
 
     Returns:
         Optional[Runnable]: A compiled LangGraph agent ready for execution, or None if an error occurs.
@@ -44,18 +120,40 @@ def build_agent(
         # Initialize graph with state schema
         graph = StateGraph(State)
 
-        # Initialize tool node (empty if no tool provided)
-        tool_node = ToolNode([search_tool]) if search_tool else ToolNode([])
+        # Initialize tool node (empty if no tool provided). Tool calls of one
+        # LLM response run concurrently, with duplicates merged
+        tool_node = ParallelToolNode(
+            [search_tool] if search_tool else [],
+            timeout=tool_timeout,
+            max_workers=max_tool_workers,
+        )
+
+        # Give plain callables with an async counterpart (e.g. LLMNode) a native
+        # async path, so `astream`/`ainvoke` never run the LLM call on a thread
+        async_llm_call = getattr(llm_node, "ainvoke", None)
+        if callable(async_llm_call) and not isinstance(llm_node, Runnable):
+            llm_node = RunnableLambda(llm_node, afunc=async_llm_call, name="llm")
+        if compactor is not None:
+            llm_node = compacted_node(compactor, llm_node)
 
         # Add nodes and edges to the graph
         graph.add_node("llm", llm_node)
-        graph.add_node("tools", tool_node)
-        graph.add_edge(START, "llm")
+        tools_runnable: Runnable = RunnableLambda(tool_node, afunc=tool_node.ainvoke)
+        if tool_gate is not None:
+            # Screen tool results inside the node, before they enter the state
+            tools_runnable = tool_gate.wrap(tools_runnable)
+        graph.add_node("tools", timed_node("tools", tools_runnable))
         graph.add_conditional_edges("llm", tools_condition)
-        graph.add_edge("tools", "llm")
+
+        graph.add_edge(START, "llm")
+
+        if tool_gate is not None:
+            graph.add_conditional_edges("tools", tool_gate.route, {CONTINUE: "llm", END: END})
+        else:
+            graph.add_edge("tools", "llm")
 
         # Compile and return the agent
-        agent = graph.compile()
+        agent = graph.compile(checkpointer=checkpointer)
         logger.info("LangGraph agent compiled successfully.")
         return agent
 
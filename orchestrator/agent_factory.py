@@ -0,0 +1,138 @@
+"""
+Agent Factory Module
+
+Builds the secured Groq + Tavily agent once per process and hands out the
+same instance afterwards. The LLM client, search tool and compiled graph are
+all reusable across requests (per-request state lives in the run config), so
+workers and CLI jobs should call `get_secure_agent()` rather than rebuilding.
+
+Provider and graph modules are imported inside `build_secure_agent`, so
+importing this module (e.g. to print a CLI's --help) stays cheap.
+
+Setting TOOL_OUTPUT_GATE to "halt" or "strip" screens tool results inside the
+graph before they reach the LLM (see `orchestrator.tool_output_gate`).
+
+AGENT_DEADLINE_SECONDS and AGENT_MAX_STEPS set the per-request deadline and
+graph step budget of the wrapper (see `wrapper.run_budget`).
+
+TOOL_CACHE_PATH names an SQLite file in which search results are cached
+(shared by every process using the same path); TOOL_CACHE_TTL sets their
+lifetime in seconds (default 3600). LLM_CACHE_PATH and LLM_CACHE_TTL do the
+same for LLM responses; only enable that cache for a deterministic model.
+
+Author: Limon Halder
+"""
+
+import os
+import threading
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+
+from config.env_loader import load_environment
+from logger.logger import logger
+
+if TYPE_CHECKING:
+    from wrapper.base_wrapper import SecureAgentWrapper
+
+# Built agents, keyed by the identity of the rate limiter they were built with.
+# The limiter is stored too, so its id cannot be reused by another object.
+_secure_agents: Dict[int, Tuple[Any, "SecureAgentWrapper"]] = {}
+_factory_lock = threading.Lock()
+
+
+def _cache_from_env(prefix: str, table: str) -> Optional[Any]:
+    """
+    Open the SQLite cache configured by `<prefix>_CACHE_PATH` and `<prefix>_CACHE_TTL`.
+
+    Returns:
+        Optional[Any]: The SQLiteCache, or None when no path is set.
+    """
+    path = os.getenv(f"{prefix}_CACHE_PATH")
+    if not path:
+        return None
+    from orchestrator.cache_backends import SQLiteCache
+
+    ttl = os.getenv(f"{prefix}_CACHE_TTL")
+    return SQLiteCache(path, ttl_seconds=float(ttl) if ttl else 3600, table=table)
+
+
+def build_secure_agent(
+    rate_limiter: Optional[Any] = None, checkpointer: Optional[Any] = None
+) -> Optional["SecureAgentWrapper"]:
+    """
+    Build a new LLM client, search tool and compiled graph, wrapped for security.
+
+    Args:
+        rate_limiter (Optional[Any]): Optional LangChain rate limiter applied to
+            every LLM request (e.g. InMemoryRateLimiter).
+        checkpointer (Optional[Any]): Optional LangGraph checkpoint saver (e.g.
+            SQLiteCheckpointSaver) keeping conversations per `thread_id`. Agents
+            built with the same saver can resume each other's threads.
+
+    Returns:
+        Optional[SecureAgentWrapper]: The secured agent, or None if setup failed.
+    """
+    from orchestrator.agent_builder import build_agent
+    from orchestrator.llm_initializer import init_llm
+    from orchestrator.llm_node import LLMNode
+    from orchestrator.tool_initializer import init_search_tool
+    from orchestrator.tool_output_gate import ToolOutputGate
+    from wrapper.base_wrapper import SecureAgentWrapper
+
+    load_environment()
+
+    # Initialize tools and LLM
+    search_tool = init_search_tool(cache=_cache_from_env("TOOL", "tool_cache"))
+    llm = init_llm(rate_limiter=rate_limiter)
+    if llm is None:
+        return None
+
+    # Bind tools and build agent
+    bound_llm = llm.bind_tools([search_tool]) if search_tool else llm
+    gate_mode = os.getenv("TOOL_OUTPUT_GATE")
+    tool_gate = ToolOutputGate(gate_mode) if gate_mode else None
+    agent = build_agent(
+        LLMNode(bound_llm, cache=_cache_from_env("LLM", "llm_cache")),
+        search_tool,
+        tool_gate=tool_gate,
+        checkpointer=checkpointer,
+    )
+
+    if not agent:
+        logger.error("Agent creation failed.")
+        return None
+
+    deadline_seconds = os.getenv("AGENT_DEADLINE_SECONDS")
+    max_steps = os.getenv("AGENT_MAX_STEPS")
+    return SecureAgentWrapper(
+        agent,
+        deadline_seconds=float(deadline_seconds) if deadline_seconds else None,
+        max_steps=int(max_steps) if max_steps else None,
+    )
+
+
+def get_secure_agent(rate_limiter: Optional[Any] = None) -> Optional["SecureAgentWrapper"]:
+    """
+    Return the process-wide secured agent, building it on the first call.
+
+    Failed builds are not cached, so a later call can retry.
+
+    Args:
+        rate_limiter (Optional[Any]): Rate limiter for LLM requests; each distinct
+            limiter object gets its own agent.
+
+    Returns:
+        Optional[SecureAgentWrapper]: The shared secured agent, or None if setup failed.
+    """
+    key = id(rate_limiter)
+    cached = _secure_agents.get(key)
+    if cached is not None:
+        return cached[1]
+
+    with _factory_lock:
+        cached = _secure_agents.get(key)
+        if cached is not None:
+            return cached[1]
+        secure_agent = build_secure_agent(rate_limiter)
+        if secure_agent is not None:
+            _secure_agents[key] = (rate_limiter, secure_agent)
+        return secure_agent
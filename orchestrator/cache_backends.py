@@ -0,0 +1,252 @@
+"""
+Cache Backends Module
+
+Key/value stores with TTL expiry, an LRU size bound and hit/miss counters,
+shared by the tool and LLM response caches. Values are strings (callers
+serialize to JSON), so entries can be persisted and shared between processes.
+
+Backends:
+- InMemoryCache: per-process, lock-protected LRU
+- SQLiteCache: on-disk store that several worker processes can share
+
+Author: Limon Halder
+"""
+
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+
+class CacheBackend(ABC):
+    """
+    Abstract base class holding the configuration and counters common to all backends.
+
+    Attributes:
+        max_entries (int): Maximum number of entries kept before LRU eviction.
+        ttl_seconds (Optional[float]): Entry lifetime; None keeps entries until evicted.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: Optional[float] = 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._stats_lock = threading.Lock()
+        self._stats: Dict[str, int] = {
+            "hits": 0,
+            "misses": 0,
+            "sets": 0,
+            "evictions": 0,
+            "expirations": 0,
+        }
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._stats_lock:
+            self._stats[name] += amount
+
+    def _is_expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - created_at > self.ttl_seconds
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        """
+        Counters for this process, plus the hit rate.
+
+        Returns:
+            Dict[str, float]: hits, misses, sets, evictions, expirations and hit_rate.
+        """
+        with self._stats_lock:
+            stats: Dict[str, float] = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        """Return the value stored under `key`, or None if missing or expired."""
+
+    @abstractmethod
+    def set(self, key: str, value: str) -> None:
+        """Store `value` under `key`, evicting the least recently used entries."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Remove every entry."""
+
+
+class InMemoryCache(CacheBackend):
+    """In-process LRU cache with TTL expiry."""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: Optional[float] = 3600):
+        super().__init__(max_entries, ttl_seconds)
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a value, refreshing its LRU position.
+
+        Args:
+            key (str): Cache key.
+
+        Returns:
+            Optional[str]: The cached value, or None on a miss or expired entry.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._is_expired(entry[0], time.time()):
+                del self._entries[key]
+                self._count("expirations")
+                entry = None
+            if entry is None:
+                self._count("misses")
+                return None
+            self._entries.move_to_end(key)
+        self._count("hits")
+        return entry[1]
+
+    def set(self, key: str, value: str) -> None:
+        """
+        Store a value, evicting the least recently used entries over the size bound.
+
+        Args:
+            key (str): Cache key.
+            value (str): Serialized value.
+        """
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            evicted = 0
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+        self._count("sets")
+        if evicted:
+            self._count("evictions", evicted)
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCache(CacheBackend):
+    """
+    SQLite-backed LRU cache with TTL expiry.
+
+    The database runs in WAL mode, so several worker processes can read and
+    write the same file. Each thread uses its own connection.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: int = 10000,
+        ttl_seconds: Optional[float] = 3600,
+        table: str = "cache",
+    ):
+        """
+        Open (and create if needed) the cache database.
+
+        Args:
+            path (str): Database file path.
+            max_entries (int): Maximum number of rows kept before LRU eviction.
+            ttl_seconds (Optional[float]): Entry lifetime in seconds.
+            table (str): Table name, so several caches can share one file.
+        """
+        super().__init__(max_entries, ttl_seconds)
+        if not table.isidentifier():
+            raise ValueError(f"Invalid cache table name: {table!r}")
+        self.path = path
+        self.table = table
+        self._local = threading.local()
+
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        conn.execute(
+            f"CREATE INDEX IF NOT EXISTS {table}_accessed ON {table} (accessed_at)"
+        )
+        conn.commit()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a value, refreshing its LRU position.
+
+        Args:
+            key (str): Cache key.
+
+        Returns:
+            Optional[str]: The cached value, or None on a miss or expired entry.
+        """
+        conn = self._connect()
+        now = time.time()
+        row = conn.execute(
+            f"SELECT value, created_at FROM {self.table} WHERE key = ?", (key,)
+        ).fetchone()
+
+        if row is not None and self._is_expired(row[1], now):
+            with conn:
+                conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            self._count("expirations")
+            row = None
+        if row is None:
+            self._count("misses")
+            return None
+
+        with conn:
+            conn.execute(
+                f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+        self._count("hits")
+        return row[0]
+
+    def set(self, key: str, value: str) -> None:
+        """
+        Store a value, evicting the least recently used rows over the size bound.
+
+        Args:
+            key (str): Cache key.
+            value (str): Serialized value.
+        """
+        conn = self._connect()
+        now = time.time()
+        with conn:
+            conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} "
+                "(key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            evicted = conn.execute(
+                f"DELETE FROM {self.table} WHERE key IN ("
+                f"SELECT key FROM {self.table} ORDER BY accessed_at DESC "
+                "LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            ).rowcount
+        self._count("sets")
+        if evicted:
+            self._count("evictions", evicted)
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        conn = self._connect()
+        with conn:
+            conn.execute(f"DELETE FROM {self.table}")
+
+    def __len__(self) -> int:
+        return self._connect().execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
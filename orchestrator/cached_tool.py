@@ -0,0 +1,140 @@
+"""
+Cached Tool Module
+
+Wraps a LangChain tool (e.g., TavilySearch) so identical calls are answered
+from a cache instead of a network round-trip. Keys are built from the tool
+name and its arguments, with the `query` argument normalized (case and
+whitespace), so "Weather in  Dhaka" and "weather in dhaka" share one entry.
+
+Author: Limon Halder
+"""
+
+import asyncio
+import hashlib
+import json
+from typing import Any, Dict, Optional
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForToolRun,
+    CallbackManagerForToolRun,
+)
+from langchain_core.tools import BaseTool
+
+from orchestrator.cache_backends import CacheBackend
+from logger.logger import logger
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize a search query for use in a cache key.
+
+    Args:
+        query (str): The raw query.
+
+    Returns:
+        str: The query lowercased with whitespace collapsed.
+    """
+    return " ".join(query.lower().split())
+
+
+def make_tool_cache_key(tool_name: str, tool_args: Dict[str, Any]) -> str:
+    """
+    Build a stable cache key for a tool call.
+
+    Args:
+        tool_name (str): Name of the tool.
+        tool_args (Dict[str, Any]): Validated tool arguments.
+
+    Returns:
+        str: A SHA-256 hex digest of the tool name and normalized arguments.
+    """
+    normalized = {
+        name: normalize_query(value) if name == "query" and isinstance(value, str) else value
+        for name, value in tool_args.items()
+        if value is not None
+    }
+    payload = json.dumps([tool_name, normalized], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CachedTool(BaseTool):
+    """
+    A tool that serves repeated calls of an inner tool from a cache.
+
+    Only successful, JSON-serializable results are cached; errors always go
+    back to the inner tool on the next call.
+
+    Attributes:
+        tool (BaseTool): The wrapped tool.
+        cache (CacheBackend): Where results are stored.
+    """
+
+    tool: BaseTool
+    cache: CacheBackend
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    def __init__(self, tool: BaseTool, cache: CacheBackend, **kwargs: Any):
+        """
+        Initialize the CachedTool with the inner tool's name, description and schema.
+
+        Args:
+            tool (BaseTool): The tool to wrap.
+            cache (CacheBackend): The cache backend to use.
+        """
+        super().__init__(
+            tool=tool,
+            cache=cache,
+            name=tool.name,
+            description=tool.description,
+            args_schema=tool.args_schema,
+            **kwargs,
+        )
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters of the underlying cache."""
+        return self.cache.stats
+
+    def _lookup(self, key: str) -> Optional[Any]:
+        cached = self.cache.get(key)
+        return json.loads(cached) if cached is not None else None
+
+    def _store(self, key: str, result: Any) -> None:
+        if isinstance(result, dict) and "error" in result:
+            return
+        try:
+            self.cache.set(key, json.dumps(result))
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Tool result for '{self.name}' not cached: {e}")
+
+    def _run(
+        self,
+        run_manager: Optional[CallbackManagerForToolRun] = None,
+        **kwargs: Any,
+    ) -> Any:
+        key = make_tool_cache_key(self.name, kwargs)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+
+        config = {"callbacks": run_manager.get_child()} if run_manager else None
+        result = self.tool.invoke(kwargs, config=config)
+        self._store(key, result)
+        return result
+
+    async def _arun(
+        self,
+        run_manager: Optional[AsyncCallbackManagerForToolRun] = None,
+        **kwargs: Any,
+    ) -> Any:
+        # Backend calls can block (a locked SQLite file), so keep them off the event loop
+        key = make_tool_cache_key(self.name, kwargs)
+        cached = await asyncio.to_thread(self._lookup, key)
+        if cached is not None:
+            return cached
+
+        config = {"callbacks": run_manager.get_child()} if run_manager else None
+        result = await self.tool.ainvoke(kwargs, config=config)
+        await asyncio.to_thread(self._store, key, result)
+        return result
@@ -0,0 +1,528 @@
+"""
+SQLite Checkpointer Module
+
+A LangGraph checkpoint saver backed by a local SQLite file, so a compiled
+agent keeps each conversation (thread) server-side and a resumed session only
+has to send the new user message:
+
+    agent = build_agent(llm_node, search_tool, checkpointer=SQLiteCheckpointSaver("threads.db"))
+    agent.invoke({"messages": "And tomorrow?"}, {"configurable": {"thread_id": "user-42"}})
+
+Storage is compact:
+- Channel values are stored once per channel version, not once per checkpoint.
+- Message lists are stored append-only: every message is written once per
+  thread, keyed by a hash of its serialized form, and a checkpoint's message
+  channel only records the list of hashes. A long conversation therefore
+  grows by the new messages each step instead of by a full copy.
+- Serialized values above a size threshold are zlib-compressed (optional).
+
+Threads idle longer than a given age can be removed with `prune_idle_threads`,
+or pruned automatically: with `max_idle_seconds` set, `put` runs the pruning
+at most once per `prune_interval` seconds.
+
+Author: Limon Halder
+"""
+
+import asyncio
+import hashlib
+import json
+import random
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+
+from logger.logger import logger
+
+# Type tag of a message channel value stored as a list of message hashes
+_MESSAGE_REFS = "msgrefs"
+_ZLIB_SUFFIX = "+zlib"
+# SQLite's default limit on bound parameters is 999; stay below it
+_MAX_SQL_PARAMS = 900
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS threads (
+    thread_id TEXT PRIMARY KEY, updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS threads_updated ON threads (updated_at);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL, checkpoint_ns TEXT NOT NULL, checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT, type TEXT NOT NULL, checkpoint BLOB NOT NULL,
+    metadata_type TEXT NOT NULL, metadata BLOB NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE TABLE IF NOT EXISTS blobs (
+    thread_id TEXT NOT NULL, checkpoint_ns TEXT NOT NULL, channel TEXT NOT NULL,
+    version TEXT NOT NULL, type TEXT NOT NULL, value BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL, checkpoint_ns TEXT NOT NULL, checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL, idx INTEGER NOT NULL, channel TEXT NOT NULL,
+    type TEXT NOT NULL, value BLOB, task_path TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+CREATE TABLE IF NOT EXISTS messages (
+    thread_id TEXT NOT NULL, digest TEXT NOT NULL, type TEXT NOT NULL, value BLOB NOT NULL,
+    PRIMARY KEY (thread_id, digest)
+);
+"""
+
+
+class SQLiteCheckpointSaver(BaseCheckpointSaver[str]):
+    """
+    Checkpoint saver storing threads in a SQLite database.
+
+    The database runs in WAL mode and each thread uses its own connection,
+    like `SQLiteCache`. Async methods run the sync ones in a worker thread.
+
+    Attributes:
+        path (str): Database file path.
+        compress (bool): Whether large serialized values are zlib-compressed.
+        compress_min_bytes (int): Smallest value that gets compressed.
+        message_channels (Tuple[str, ...]): Channels holding message lists,
+            stored append-only.
+        max_idle_seconds (Optional[float]): Idle age after which threads are
+            pruned automatically; None keeps them until deleted.
+        prune_interval (float): Shortest time between automatic prunes.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        compress: bool = True,
+        compress_min_bytes: int = 512,
+        message_channels: Sequence[str] = ("messages",),
+        serde: Optional[Any] = None,
+        max_idle_seconds: Optional[float] = None,
+        prune_interval: float = 3600.0,
+    ):
+        """
+        Open (and create if needed) the checkpoint database.
+
+        Args:
+            path (str): Database file path.
+            compress (bool): Compress serialized values of at least
+                `compress_min_bytes` with zlib.
+            compress_min_bytes (int): Compression threshold in bytes.
+            message_channels (Sequence[str]): State keys whose list values are
+                stored message by message.
+            serde (Optional[Any]): Serializer; LangGraph's default when None.
+            max_idle_seconds (Optional[float]): Prune threads idle this long
+                while checkpoints are written; None disables automatic pruning.
+            prune_interval (float): Seconds between automatic prunes (the
+                first one runs on the first write).
+        """
+        super().__init__(serde=serde)
+        self.path = path
+        self.compress = compress
+        self.compress_min_bytes = compress_min_bytes
+        self.message_channels = tuple(message_channels)
+        self.max_idle_seconds = max_idle_seconds
+        self.prune_interval = prune_interval
+        self._local = threading.local()
+        self._prune_lock = threading.Lock()
+        self._next_prune = 0.0
+
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        conn.commit()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            self._local.conn = conn
+        return conn
+
+    # --- Serialization -------------------------------------------------------
+
+    def _dump(self, value: Any) -> Tuple[str, bytes]:
+        type_, data = self.serde.dumps_typed(value)
+        if self.compress and len(data) >= self.compress_min_bytes:
+            return type_ + _ZLIB_SUFFIX, zlib.compress(data)
+        return type_, data
+
+    def _load(self, type_: str, data: Optional[bytes]) -> Any:
+        if type_.endswith(_ZLIB_SUFFIX):
+            type_, data = type_[: -len(_ZLIB_SUFFIX)], zlib.decompress(data)
+        return self.serde.loads_typed((type_, data))
+
+    def _store_messages(
+        self, conn: sqlite3.Connection, thread_id: str, messages: List[Any]
+    ) -> bytes:
+        """Write new messages of a thread and return the encoded hash list."""
+        digests = []
+        rows = []
+        for message in messages:
+            type_, data = self.serde.dumps_typed(message)
+            digest = hashlib.blake2b(type_.encode() + b"\0" + data, digest_size=16).hexdigest()
+            digests.append(digest)
+            if self.compress and len(data) >= self.compress_min_bytes:
+                type_, data = type_ + _ZLIB_SUFFIX, zlib.compress(data)
+            rows.append((thread_id, digest, type_, data))
+        conn.executemany("INSERT OR IGNORE INTO messages VALUES (?, ?, ?, ?)", rows)
+        return json.dumps(digests).encode("utf-8")
+
+    def _load_messages(
+        self, conn: sqlite3.Connection, thread_id: str, encoded: bytes
+    ) -> List[Any]:
+        digests = json.loads(encoded)
+        found: Dict[str, Any] = {}
+        unique = list(dict.fromkeys(digests))
+        for start in range(0, len(unique), _MAX_SQL_PARAMS):
+            chunk = unique[start : start + _MAX_SQL_PARAMS]
+            placeholders = ",".join("?" * len(chunk))
+            for digest, type_, data in conn.execute(
+                "SELECT digest, type, value FROM messages "
+                f"WHERE thread_id = ? AND digest IN ({placeholders})",
+                (thread_id, *chunk),
+            ):
+                found[digest] = self._load(type_, data)
+        return [found[digest] for digest in digests]
+
+    def _load_channel_values(
+        self, conn: sqlite3.Connection, thread_id: str, checkpoint_ns: str, versions: ChannelVersions
+    ) -> Dict[str, Any]:
+        values: Dict[str, Any] = {}
+        for channel, version in versions.items():
+            row = conn.execute(
+                "SELECT type, value FROM blobs WHERE thread_id = ? AND checkpoint_ns = ? "
+                "AND channel = ? AND version = ?",
+                (thread_id, checkpoint_ns, channel, str(version)),
+            ).fetchone()
+            if row is None or row[0] == "empty":
+                continue
+            if row[0] == _MESSAGE_REFS:
+                values[channel] = self._load_messages(conn, thread_id, row[1])
+            else:
+                values[channel] = self._load(*row)
+        return values
+
+    def _make_tuple(self, conn: sqlite3.Connection, row: Tuple[Any, ...]) -> CheckpointTuple:
+        thread_id, checkpoint_ns, checkpoint_id, parent_id, type_, data, meta_type, meta = row
+        checkpoint = self._load(type_, data)
+        checkpoint["channel_values"] = self._load_channel_values(
+            conn, thread_id, checkpoint_ns, checkpoint["channel_versions"]
+        )
+        writes = conn.execute(
+            "SELECT task_id, channel, type, value FROM writes WHERE thread_id = ? "
+            "AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY task_path, task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+
+        def config_for(cid: str) -> RunnableConfig:
+            return {
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": cid,
+                }
+            }
+
+        return CheckpointTuple(
+            config=config_for(checkpoint_id),
+            checkpoint=checkpoint,
+            metadata=self._load(meta_type, meta),
+            parent_config=config_for(parent_id) if parent_id else None,
+            pending_writes=[(task, channel, self._load(t, v)) for task, channel, t, v in writes],
+        )
+
+    # --- BaseCheckpointSaver -------------------------------------------------
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """
+        Fetch a checkpoint: the one named in the config, or the thread's latest.
+
+        Args:
+            config (RunnableConfig): Config with `thread_id` (and optionally
+                `checkpoint_ns`/`checkpoint_id`).
+
+        Returns:
+            Optional[CheckpointTuple]: The checkpoint, or None if not found.
+        """
+        conn = self._connect()
+        configurable = config["configurable"]
+        query = (
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, "
+            "checkpoint, metadata_type, metadata FROM checkpoints "
+            "WHERE thread_id = ? AND checkpoint_ns = ?"
+        )
+        params: List[Any] = [configurable["thread_id"], configurable.get("checkpoint_ns", "")]
+        checkpoint_id = get_checkpoint_id(config)
+        if checkpoint_id:
+            query += " AND checkpoint_id = ?"
+            params.append(checkpoint_id)
+        else:
+            query += " ORDER BY checkpoint_id DESC LIMIT 1"
+        row = conn.execute(query, params).fetchone()
+        return self._make_tuple(conn, row) if row else None
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        """
+        List checkpoints, newest first.
+
+        Args:
+            config (Optional[RunnableConfig]): Restrict to a thread (and namespace/id).
+            filter (Optional[Dict[str, Any]]): Metadata key/value pairs to match.
+            before (Optional[RunnableConfig]): Only checkpoints older than this one.
+            limit (Optional[int]): Maximum number of results.
+
+        Yields:
+            CheckpointTuple: Matching checkpoints.
+        """
+        conn = self._connect()
+        clauses: List[str] = []
+        params: List[Any] = []
+        if config:
+            configurable = config["configurable"]
+            clauses.append("thread_id = ?")
+            params.append(configurable["thread_id"])
+            if configurable.get("checkpoint_ns") is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(configurable["checkpoint_ns"])
+            if get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(get_checkpoint_id(config))
+        if before and get_checkpoint_id(before):
+            clauses.append("checkpoint_id < ?")
+            params.append(get_checkpoint_id(before))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = conn.execute(
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, "
+            f"checkpoint, metadata_type, metadata FROM checkpoints {where} "
+            "ORDER BY checkpoint_id DESC",
+            params,
+        ).fetchall()
+
+        for row in rows:
+            if limit is not None and limit <= 0:
+                break
+            if filter:
+                metadata = self._load(row[6], row[7])
+                if not all(metadata.get(key) == value for key, value in filter.items()):
+                    continue
+            if limit is not None:
+                limit -= 1
+            yield self._make_tuple(conn, row)
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """
+        Store a checkpoint; only channels with a new version are written.
+
+        Args:
+            config (RunnableConfig): Config of the parent checkpoint.
+            checkpoint (Checkpoint): The checkpoint to store.
+            metadata (CheckpointMetadata): Checkpoint metadata.
+            new_versions (ChannelVersions): Channels updated by this checkpoint.
+
+        Returns:
+            RunnableConfig: Config pointing at the stored checkpoint.
+        """
+        conn = self._connect()
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        stored = checkpoint.copy()
+        values = stored.pop("channel_values")
+
+        with conn:
+            for channel, version in new_versions.items():
+                if channel not in values:
+                    type_, data = "empty", None
+                elif channel in self.message_channels and isinstance(values[channel], list):
+                    type_, data = _MESSAGE_REFS, self._store_messages(conn, thread_id, values[channel])
+                else:
+                    type_, data = self._dump(values[channel])
+                conn.execute(
+                    "INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?, ?, ?)",
+                    (thread_id, checkpoint_ns, channel, str(version), type_, data),
+                )
+            conn.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    thread_id,
+                    checkpoint_ns,
+                    checkpoint["id"],
+                    config["configurable"].get("checkpoint_id"),
+                    *self._dump(stored),
+                    *self._dump(get_checkpoint_metadata(config, metadata)),
+                ),
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO threads VALUES (?, ?)", (thread_id, time.time())
+            )
+        self._maybe_prune()
+
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """
+        Store the pending writes of a task for a checkpoint.
+
+        Args:
+            config (RunnableConfig): Config of the related checkpoint.
+            writes (Sequence[Tuple[str, Any]]): (channel, value) pairs.
+            task_id (str): Id of the task that produced the writes.
+            task_path (str): Path of that task.
+        """
+        conn = self._connect()
+        configurable = config["configurable"]
+        rows = {"REPLACE": [], "IGNORE": []}
+        for idx, (channel, value) in enumerate(writes):
+            # Special writes (errors, interrupts) replace earlier ones; regular writes don't
+            verb = "REPLACE" if channel in WRITES_IDX_MAP else "IGNORE"
+            rows[verb].append(
+                (
+                    configurable["thread_id"],
+                    configurable.get("checkpoint_ns", ""),
+                    configurable["checkpoint_id"],
+                    task_id,
+                    WRITES_IDX_MAP.get(channel, idx),
+                    channel,
+                    *self._dump(value),
+                    task_path,
+                )
+            )
+        with conn:
+            for verb, verb_rows in rows.items():
+                conn.executemany(
+                    f"INSERT OR {verb} INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", verb_rows
+                )
+
+    def delete_thread(self, thread_id: str) -> None:
+        """
+        Delete every checkpoint, write and message of a thread.
+
+        Args:
+            thread_id (str): The thread to delete.
+        """
+        conn = self._connect()
+        with conn:
+            for table in ("checkpoints", "blobs", "writes", "messages", "threads"):
+                conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+
+    def prune_idle_threads(self, max_idle_seconds: float) -> int:
+        """
+        Delete threads that have not been updated for `max_idle_seconds`.
+
+        Args:
+            max_idle_seconds (float): Idle age after which a thread is removed.
+
+        Returns:
+            int: Number of threads deleted.
+        """
+        cutoff = time.time() - max_idle_seconds
+        idle = [
+            row[0]
+            for row in self._connect().execute(
+                "SELECT thread_id FROM threads WHERE updated_at < ?", (cutoff,)
+            )
+        ]
+        for thread_id in idle:
+            self.delete_thread(thread_id)
+        if idle:
+            logger.info(f"Pruned {len(idle)} idle conversation thread(s).")
+        return len(idle)
+
+    def _maybe_prune(self) -> None:
+        """Run `prune_idle_threads` if automatic pruning is due; one thread prunes at a time."""
+        if self.max_idle_seconds is None or time.monotonic() < self._next_prune:
+            return
+        if not self._prune_lock.acquire(blocking=False):
+            return  # Another thread is pruning
+        try:
+            self._next_prune = time.monotonic() + self.prune_interval
+            self.prune_idle_threads(self.max_idle_seconds)
+        except Exception as e:
+            logger.error(f"Pruning idle conversation threads failed: {e}")
+        finally:
+            self._prune_lock.release()
+
+    def get_next_version(self, current: Optional[str], channel: None = None) -> str:
+        """Monotonic string versions: a zero-padded counter plus a random suffix."""
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    # --- Async API -----------------------------------------------------------
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
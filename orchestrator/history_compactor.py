@@ -0,0 +1,157 @@
+"""
+History Compaction Module
+
+Keeps the prompt sent to the LLM under a token budget. The `State` reducer
+(`add_messages`) only ever appends, so without compaction every tool round
+resends the full history, including complete search dumps.
+
+Compaction runs on a copy of the history before each LLM call and, while
+over budget:
+1. shortens tool outputs older than the most recent turns (truncated, or
+   passed through a custom summarizer), then
+2. leaves out the oldest whole turns (a user message and everything up to
+   the next one, so tool calls stay paired with their results).
+
+System messages and the most recent turns are never modified. Only the
+prompt is reduced: the graph state, its checkpoints and streamed `values`
+keep the full history.
+
+Author: Limon Halder
+"""
+
+from typing import Callable, List, Optional
+
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage, ToolMessage
+
+from logger.logger import logger
+
+# Marker appended to compacted tool outputs, so they are not compacted twice
+COMPACTED_MARKER = "[compacted]"
+
+# Approximate per-message overhead of chat formatting, in tokens
+_MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(messages: List[BaseMessage]) -> int:
+    """
+    Estimate the prompt size of a message list without a remote tokenizer.
+
+    Uses roughly four characters per token, which is close for English text
+    and JSON tool output.
+
+    Args:
+        messages (List[BaseMessage]): The messages to measure.
+
+    Returns:
+        int: Estimated token count.
+    """
+    total = 0
+    for message in messages:
+        content = message.content if isinstance(message.content, str) else str(message.content)
+        total += len(content) // 4 + _MESSAGE_OVERHEAD_TOKENS
+        for call in getattr(message, "tool_calls", None) or []:
+            total += len(str(call.get("args", ""))) // 4
+    return total
+
+
+def truncate_text(text: str, max_chars: int) -> str:
+    """Keep the first `max_chars` characters and note how much was cut."""
+    removed = len(text) - max_chars
+    return f"{text[:max_chars]}\n... {COMPACTED_MARKER} {removed} characters removed"
+
+
+class HistoryCompactor:
+    """
+    Callable that compacts a copy of the message history to a token budget.
+
+    Attributes:
+        max_tokens (int): Target prompt size.
+        keep_recent_turns (int): Number of latest user turns left untouched.
+        tool_output_max_chars (int): Length older tool outputs are cut to.
+        summarize (Optional[Callable[[str], str]]): Replaces truncation of old
+            tool outputs when given (e.g. a local extractive summarizer).
+        token_counter (Callable[[List[BaseMessage]], int]): Prompt size estimator.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = 6000,
+        keep_recent_turns: int = 2,
+        tool_output_max_chars: int = 1500,
+        summarize: Optional[Callable[[str], str]] = None,
+        token_counter: Callable[[List[BaseMessage]], int] = estimate_tokens,
+    ):
+        self.max_tokens = max_tokens
+        self.keep_recent_turns = keep_recent_turns
+        self.tool_output_max_chars = tool_output_max_chars
+        self.summarize = summarize
+        self.token_counter = token_counter
+
+    def _protected_from(self, messages: List[BaseMessage]) -> int:
+        """Index of the first message belonging to the protected recent turns."""
+        turn_starts = [i for i, m in enumerate(messages) if isinstance(m, HumanMessage)]
+        if len(turn_starts) <= self.keep_recent_turns:
+            return 0
+        return turn_starts[-self.keep_recent_turns] if self.keep_recent_turns else len(messages)
+
+    def _compact_tool_output(self, message: ToolMessage) -> Optional[ToolMessage]:
+        content = message.content if isinstance(message.content, str) else str(message.content)
+        if len(content) <= self.tool_output_max_chars or COMPACTED_MARKER in content:
+            return None
+        if self.summarize is not None:
+            compacted = f"{self.summarize(content)}\n{COMPACTED_MARKER}"
+        else:
+            compacted = truncate_text(content, self.tool_output_max_chars)
+        return message.model_copy(update={"content": compacted})
+
+    def compact(self, messages: List[BaseMessage]) -> List[BaseMessage]:
+        """
+        Build the reduced prompt for `messages`, leaving the list itself unchanged.
+
+        Args:
+            messages (List[BaseMessage]): The full history.
+
+        Returns:
+            List[BaseMessage]: The messages to send to the LLM (`messages`
+                itself if the history already fits).
+        """
+        if self.token_counter(messages) <= self.max_tokens:
+            return messages
+
+        protected_from = self._protected_from(messages)
+        working: List[Optional[BaseMessage]] = list(messages)
+        changed = 0
+
+        # 1. Shorten old tool outputs
+        for index in range(protected_from):
+            message = working[index]
+            if isinstance(message, ToolMessage):
+                compacted = self._compact_tool_output(message)
+                if compacted is not None:
+                    working[index] = compacted
+                    changed += 1
+
+        # 2. Leave out the oldest whole turns until the budget is met
+        turn_starts = [i for i in range(protected_from) if isinstance(messages[i], HumanMessage)]
+        boundaries = turn_starts + [protected_from]
+        for start, end in zip(boundaries, boundaries[1:]):
+            if self.token_counter([m for m in working if m is not None]) <= self.max_tokens:
+                break
+            for index in range(start, end):
+                if isinstance(working[index], SystemMessage):
+                    continue
+                working[index] = None
+                changed += 1
+
+        prompt = [m for m in working if m is not None]
+        if self.token_counter(prompt) > self.max_tokens:
+            logger.warning(
+                "History still exceeds the token budget after compaction; "
+                "recent turns are kept intact."
+            )
+        logger.info(f"Prompt compacted: {changed} message(s) shortened or left out.")
+        return prompt
+
+    def __call__(self, messages: List[BaseMessage]) -> List[BaseMessage]:
+        """Same as `compact`."""
+        return self.compact(messages)
@@ -0,0 +1,315 @@
+"""
+HTTP Client Registry Module
+
+Hands out one pooled sync and one pooled async httpx client per provider
+(e.g. "groq", "tavily"), shared by every agent the process builds. Without it
+each ChatGroq and TavilySearch instance opens its own connections (Tavily
+opens a new one per search), so short queries pay a TCP and TLS handshake
+that a kept-alive connection would skip.
+
+Each provider talks to a single host, so the per-client pool limits are the
+per-host connection caps. Settings come from the environment:
+- PROVIDER_HTTP_MAX_CONNECTIONS: open connections per provider (default 20)
+- PROVIDER_HTTP_MAX_KEEPALIVE: idle connections kept per provider (default 10)
+- PROVIDER_HTTP_KEEPALIVE_SECONDS: how long an idle connection is kept (default 60)
+- PROVIDER_HTTP_TIMEOUT: request timeout in seconds (default 60)
+- PROVIDER_HTTP2: "1" to negotiate HTTP/2 (needs the `h2` package)
+
+An async connection belongs to the event loop that opened it, so the async
+clients keep one pool per running loop. Clients are rebuilt after a fork,
+so worker processes never share a socket with their parent.
+
+Author: Limon Halder
+"""
+
+import asyncio
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+from logger.logger import logger
+from logger.metrics import METRICS
+
+HTTP_REQUESTS = "secure_agent_http_requests_total"
+HTTP_CONNECTIONS = "secure_agent_http_connections_total"
+
+METRICS.describe(HTTP_REQUESTS, "counter", "Provider HTTP requests by provider.")
+METRICS.describe(HTTP_CONNECTIONS, "counter", "New provider connections and TLS handshakes.")
+
+# httpcore trace events that mark a new connection and a TLS handshake
+_CONNECT_EVENT = "connection.connect_tcp.complete"
+_TLS_EVENT = "connection.start_tls.complete"
+
+
+def _env_flag(name: str) -> bool:
+    return os.getenv(name, "").strip().lower() in ("1", "true", "yes")
+
+
+def _pool_connections(transport: Any) -> List[Any]:
+    """The connections of an httpx transport's pool (empty if unavailable)."""
+    pool = getattr(transport, "_pool", None)
+    return list(getattr(pool, "connections", []))
+
+
+class _ProviderCounters:
+    """Request and connection counts of one provider, shared by its clients."""
+
+    def __init__(self, provider: str):
+        self.provider = provider
+        self.requests = 0
+        self.connects = 0
+        self.tls_handshakes = 0
+        self._lock = threading.Lock()
+
+    def on_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+        METRICS.inc(HTTP_REQUESTS, provider=self.provider)
+
+    def on_trace(self, event: str) -> None:
+        if event == _CONNECT_EVENT:
+            with self._lock:
+                self.connects += 1
+            METRICS.inc(HTTP_CONNECTIONS, provider=self.provider, kind="tcp")
+        elif event == _TLS_EVENT:
+            with self._lock:
+                self.tls_handshakes += 1
+            METRICS.inc(HTTP_CONNECTIONS, provider=self.provider, kind="tls")
+
+
+class _LoopLocalTransport(httpx.AsyncBaseTransport):
+    """
+    Async transport that keeps a separate connection pool per event loop.
+
+    Lets one AsyncClient be shared by code that runs several loops in turn
+    (e.g. repeated `asyncio.run` calls) without reusing a connection whose
+    loop has closed.
+    """
+
+    def __init__(self, factory: Callable[[], httpx.AsyncHTTPTransport]):
+        self._factory = factory
+        self._transports: Dict[asyncio.AbstractEventLoop, httpx.AsyncHTTPTransport] = {}
+        self._lock = threading.Lock()
+
+    def _current(self) -> httpx.AsyncHTTPTransport:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            transport = self._transports.get(loop)
+            if transport is None:
+                # Pools of closed loops cannot be used again; let them be collected
+                for closed in [l for l in self._transports if l.is_closed()]:
+                    del self._transports[closed]
+                transport = self._transports[loop] = self._factory()
+            return transport
+
+    def transports(self) -> List[httpx.AsyncHTTPTransport]:
+        with self._lock:
+            return list(self._transports.values())
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self._current().handle_async_request(request)
+
+    async def aclose(self) -> None:
+        """Close the pool of the running loop (other loops' pools cannot be closed from here)."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            transport = self._transports.pop(loop, None)
+        if transport is not None:
+            await transport.aclose()
+
+
+class HTTPClientRegistry:
+    """
+    Shared, pooled httpx clients for the LLM and tool providers.
+
+    Attributes:
+        max_connections (int): Open connections per provider and client.
+        max_keepalive_connections (int): Idle connections kept per provider and client.
+        keepalive_expiry (float): Seconds an idle connection is kept open.
+        timeout (float): Request timeout in seconds.
+        http2 (bool): Whether HTTP/2 is negotiated.
+    """
+
+    def __init__(
+        self,
+        max_connections: Optional[int] = None,
+        max_keepalive_connections: Optional[int] = None,
+        keepalive_expiry: Optional[float] = None,
+        timeout: Optional[float] = None,
+        http2: Optional[bool] = None,
+    ):
+        """
+        Args:
+            max_connections (Optional[int]): Defaults to PROVIDER_HTTP_MAX_CONNECTIONS.
+            max_keepalive_connections (Optional[int]): Defaults to PROVIDER_HTTP_MAX_KEEPALIVE.
+            keepalive_expiry (Optional[float]): Defaults to PROVIDER_HTTP_KEEPALIVE_SECONDS.
+            timeout (Optional[float]): Defaults to PROVIDER_HTTP_TIMEOUT.
+            http2 (Optional[bool]): Defaults to PROVIDER_HTTP2. Falls back to
+                HTTP/1.1 with a warning when the `h2` package is missing.
+        """
+        self.max_connections = max_connections or int(os.getenv("PROVIDER_HTTP_MAX_CONNECTIONS", "20"))
+        self.max_keepalive_connections = max_keepalive_connections or int(
+            os.getenv("PROVIDER_HTTP_MAX_KEEPALIVE", "10")
+        )
+        self.keepalive_expiry = keepalive_expiry or float(os.getenv("PROVIDER_HTTP_KEEPALIVE_SECONDS", "60"))
+        self.timeout = timeout or float(os.getenv("PROVIDER_HTTP_TIMEOUT", "60"))
+        self.http2 = _env_flag("PROVIDER_HTTP2") if http2 is None else http2
+        if self.http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("PROVIDER_HTTP2 is set but the h2 package is missing; using HTTP/1.1.")
+                self.http2 = False
+
+        self._clients: Dict[str, httpx.Client] = {}
+        self._async_clients: Dict[str, httpx.AsyncClient] = {}
+        # Transports are kept separately so their pools can be inspected
+        self._transports: Dict[str, httpx.HTTPTransport] = {}
+        self._async_transports: Dict[str, _LoopLocalTransport] = {}
+        self._counters: Dict[str, _ProviderCounters] = {}
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    @property
+    def limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+    def _check_fork(self) -> None:
+        """Drop clients inherited from a parent process (called with the lock held)."""
+        if os.getpid() != self._pid:
+            self._clients.clear()
+            self._async_clients.clear()
+            self._transports.clear()
+            self._async_transports.clear()
+            self._counters.clear()
+            self._pid = os.getpid()
+
+    def _counters_for(self, provider: str) -> _ProviderCounters:
+        return self._counters.setdefault(provider, _ProviderCounters(provider))
+
+    def client(self, provider: str) -> httpx.Client:
+        """
+        Return the shared sync client of a provider, creating it on first use.
+
+        Args:
+            provider (str): Provider name, e.g. "groq" or "tavily".
+
+        Returns:
+            httpx.Client: A pooled client; callers must not close it.
+        """
+        with self._lock:
+            self._check_fork()
+            client = self._clients.get(provider)
+            if client is None:
+                counters = self._counters_for(provider)
+
+                def on_request(request: httpx.Request) -> None:
+                    counters.on_request()
+                    request.extensions["trace"] = lambda event, info: counters.on_trace(event)
+
+                transport = self._transports[provider] = httpx.HTTPTransport(
+                    limits=self.limits, http2=self.http2
+                )
+                client = self._clients[provider] = httpx.Client(
+                    transport=transport,
+                    timeout=self.timeout,
+                    event_hooks={"request": [on_request]},
+                )
+                logger.info(f"Created pooled HTTP client for '{provider}'.")
+            return client
+
+    def async_client(self, provider: str) -> httpx.AsyncClient:
+        """
+        Return the shared async client of a provider, creating it on first use.
+
+        Args:
+            provider (str): Provider name, e.g. "groq" or "tavily".
+
+        Returns:
+            httpx.AsyncClient: A pooled client (one pool per event loop); callers
+                must not close it.
+        """
+        with self._lock:
+            self._check_fork()
+            client = self._async_clients.get(provider)
+            if client is None:
+                counters = self._counters_for(provider)
+
+                async def trace(event: str, info: Dict[str, Any]) -> None:
+                    counters.on_trace(event)
+
+                async def on_request(request: httpx.Request) -> None:
+                    counters.on_request()
+                    request.extensions["trace"] = trace
+
+                transport = self._async_transports[provider] = _LoopLocalTransport(
+                    lambda: httpx.AsyncHTTPTransport(limits=self.limits, http2=self.http2)
+                )
+                client = self._async_clients[provider] = httpx.AsyncClient(
+                    transport=transport,
+                    timeout=self.timeout,
+                    event_hooks={"request": [on_request]},
+                )
+                logger.info(f"Created pooled async HTTP client for '{provider}'.")
+            return client
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Pool usage per provider.
+
+        Returns:
+            Dict[str, Dict[str, int]]: For each provider, the requests sent, new
+                connections and TLS handshakes made, and the connections
+                currently open, idle and busy across its sync and async pools.
+        """
+        with self._lock:
+            self._check_fork()
+            stats: Dict[str, Dict[str, int]] = {}
+            for provider, counters in self._counters.items():
+                transports: List[Any] = []
+                if provider in self._transports:
+                    transports.append(self._transports[provider])
+                if provider in self._async_transports:
+                    transports.extend(self._async_transports[provider].transports())
+                connections = [c for t in transports for c in _pool_connections(t)]
+                idle = sum(1 for c in connections if c.is_idle())
+                stats[provider] = {
+                    "requests": counters.requests,
+                    "connects": counters.connects,
+                    "tls_handshakes": counters.tls_handshakes,
+                    "open": len(connections),
+                    "idle": idle,
+                    "busy": len(connections) - idle,
+                }
+            return stats
+
+    def close(self) -> None:
+        """Close the sync clients; async pools close with their event loops."""
+        with self._lock:
+            clients, self._clients = list(self._clients.values()), {}
+            self._async_clients.clear()
+            self._transports.clear()
+            self._async_transports.clear()
+        for client in clients:
+            client.close()
+
+
+# Process-wide registry, created on first use
+_registry: Optional[HTTPClientRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_http_clients() -> HTTPClientRegistry:
+    """Return the process-wide HTTP client registry, creating it on first call."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = HTTPClientRegistry()
+    return _registry
@@ -0,0 +1,104 @@
+"""
+LLM Response Cache Module
+
+Builds cache keys for LLM calls and (de)serializes the AIMessage results, so
+LLMNode can answer a repeated, deterministic conversation (e.g. temperature=0
+FAQ-style questions) without calling the model.
+
+A key covers the message history together with the bound tools and the model
+parameters. Per-run identifiers (message ids, tool-call ids) and provider
+metadata are left out, so the same conversation maps to the same key across
+sessions.
+
+Author: Limon Halder
+"""
+
+import hashlib
+import json
+from typing import Any, Dict, List
+
+from langchain_core.messages import (
+    AIMessage,
+    BaseMessage,
+    message_to_dict,
+    messages_from_dict,
+)
+
+# Fields of a serialized message that change between otherwise identical runs
+_VOLATILE_MESSAGE_FIELDS = (
+    "id",
+    "additional_kwargs",
+    "response_metadata",
+    "usage_metadata",
+    "tool_call_id",
+)
+
+
+def describe_llm(llm: Any) -> Dict[str, Any]:
+    """
+    Describe the model parameters and bound arguments (e.g. tools) of an LLM.
+
+    Args:
+        llm (Any): A chat model, or a RunnableBinding from `bind_tools`.
+
+    Returns:
+        Dict[str, Any]: JSON-serializable description of the LLM configuration.
+    """
+    model = getattr(llm, "bound", llm)
+    params = getattr(model, "_identifying_params", None)
+    return {
+        "model": type(model).__name__,
+        "params": params if params is not None else repr(model),
+        "bound_kwargs": getattr(llm, "kwargs", {}),
+    }
+
+
+def _normalize_message(message: BaseMessage) -> Dict[str, Any]:
+    data = dict(message_to_dict(message)["data"])
+    for field in _VOLATILE_MESSAGE_FIELDS:
+        data.pop(field, None)
+    if data.get("tool_calls"):
+        data["tool_calls"] = [
+            {"name": call["name"], "args": call["args"]} for call in data["tool_calls"]
+        ]
+    data["type"] = message.type
+    return data
+
+
+def make_llm_cache_key(llm: Any, messages: List[BaseMessage]) -> str:
+    """
+    Build the cache key for calling `llm` with `messages`.
+
+    Args:
+        llm (Any): The (possibly tool-bound) LLM.
+        messages (List[BaseMessage]): The conversation sent to the model.
+
+    Returns:
+        str: A SHA-256 hex digest.
+    """
+    payload = json.dumps(
+        {
+            "llm": describe_llm(llm),
+            "messages": [_normalize_message(m) for m in messages],
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def serialize_response(response: AIMessage) -> str:
+    """Serialize an AIMessage, including its tool calls, to JSON."""
+    return json.dumps(message_to_dict(response), default=str)
+
+
+def deserialize_response(payload: str) -> AIMessage:
+    """
+    Rebuild a cached AIMessage.
+
+    The message id is cleared so the graph assigns a fresh one and the cached
+    answer never replaces an earlier message with the same id.
+    """
+    message = messages_from_dict([json.loads(payload)])[0]
+    message.id = None
+    return message
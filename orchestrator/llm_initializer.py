@@ -0,0 +1,49 @@
+import os
+from typing import TYPE_CHECKING, Any, Optional
+from logger.logger import logger
+
+if TYPE_CHECKING:
+    from langchain_groq import ChatGroq
+    from orchestrator.http_clients import HTTPClientRegistry
+
+
+def init_llm(
+    rate_limiter: Optional[Any] = None,
+    http_clients: Optional["HTTPClientRegistry"] = None,
+) -> Optional["ChatGroq"]:
+    """
+    Initializes the Groq chat model used by the agent.
+
+    Args:
+        rate_limiter (Optional[Any]): Optional LangChain rate limiter applied to
+            every LLM request (e.g. InMemoryRateLimiter).
+        http_clients (Optional[HTTPClientRegistry]): Registry of the pooled HTTP
+            clients to send requests through; defaults to the process-wide one,
+            so every agent shares one connection pool to Groq.
+
+    Returns:
+        Optional[ChatGroq]: The chat model if initialization succeeds; otherwise, None.
+    """
+    try:
+        # Imported on first use: langchain_groq is slow to import
+        from langchain_groq import ChatGroq
+        from orchestrator.http_clients import get_http_clients
+
+        http_clients = http_clients or get_http_clients()
+        llm = ChatGroq(
+            temperature=0,
+            model_name="llama3-70b-8192",
+            groq_api_key=os.getenv("GROQ_API_KEY"),
+            rate_limiter=rate_limiter,
+            # Each retry gets the full per-call timeout, so keep them few when
+            # requests run under a deadline
+            max_retries=int(os.getenv("GROQ_MAX_RETRIES", "2")),
+            http_client=http_clients.client("groq"),
+            http_async_client=http_clients.async_client("groq"),
+        )
+        logger.info("LLM initialized.")
+        return llm
+
+    except Exception as e:
+        logger.error(f"LLM init failed: {e}")
+        return None
@@ -1,6 +1,19 @@
-from typing import Any, Dict, List, TypedDict
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple, TypedDict
 from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.runnables import RunnableConfig
+from orchestrator.cache_backends import CacheBackend
+from orchestrator.llm_cache import (
+    deserialize_response,
+    make_llm_cache_key,
+    serialize_response,
+)
 from logger.logger import log_input, log_output, logger
+from logger.metrics import record_token_usage, timed
+from wrapper.run_budget import DeadlineExceeded, check_deadline, time_left
+
+# Content of the AIMessage returned when the LLM call fails
+LLM_ERROR_MESSAGE = "⚠️ An internal error occurred during LLM processing."
 
 
 class StateType(TypedDict):
@@ -13,44 +26,167 @@ class LLMNode:
 
     Attributes:
         llm: An LLM instance with an `invoke()` method that accepts a list of messages.
+        cache: Optional response cache; None disables caching.
     """
 
-    def __init__(self, llm_instance: Any):
+    def __init__(self, llm_instance: Any, cache: Optional[CacheBackend] = None):
         """
         Initializes the LLMNode.
 
         Args:
             llm_instance: The language model instance (e.g., ChatOpenAI) to invoke.
+            cache (Optional[CacheBackend]): Opt-in response cache keyed on the message
+                history, bound tools and model parameters. Only enable it for
+                deterministic models (temperature=0).
         """
         self.llm = llm_instance
+        self.cache = cache
+
+    @property
+    def cache_stats(self) -> Dict[str, float]:
+        """Hit/miss counters of the response cache (empty when caching is off)."""
+        return self.cache.stats if self.cache is not None else {}
+
+    def _cache_lookup(
+        self, messages: List[BaseMessage]
+    ) -> Tuple[Optional[str], Optional[AIMessage]]:
+        """Return the cache key and the cached response, if any."""
+        if self.cache is None:
+            return None, None
+        key = make_llm_cache_key(self.llm, messages)
+        cached = self.cache.get(key)
+        if cached is None:
+            return key, None
+        logger.info("LLM response served from cache.")
+        return key, deserialize_response(cached)
+
+    def _cache_store(self, key: Optional[str], response: AIMessage) -> None:
+        if key is not None and isinstance(response, AIMessage):
+            self.cache.set(key, serialize_response(response))
+
+    @staticmethod
+    def _log_request(state: StateType) -> None:
+        last_msg = state["messages"][-1]
+        input_text = getattr(last_msg, "content", str(last_msg))
+        log_input(input_text)
+
+    @staticmethod
+    def _error_state() -> StateType:
+        logger.exception("LLM invocation failed.")
+        return {
+            "messages": [
+                AIMessage(content=LLM_ERROR_MESSAGE)
+            ]
+        }
+
+    def _invoke(
+        self,
+        messages: List[BaseMessage],
+        timeout: Optional[float],
+        config: Optional[RunnableConfig] = None,
+    ) -> Any:
+        """
+        Call the LLM on the caller's thread, giving up once `timeout` seconds have passed.
 
-    def __call__(self, state: StateType) -> StateType:
+        The remaining time is passed to the provider client as its request
+        timeout, so a slow provider is cut off by the HTTP layer instead of
+        leaving an abandoned call on a worker thread.
+        """
+        if timeout is None:
+            return self.llm.invoke(messages)
+        try:
+            response = self.llm.invoke(messages, timeout=timeout)
+        except Exception:
+            if (time_left(config) or 0.0) <= 0:
+                logger.warning(f"LLM call timed out at the request deadline ({timeout:.2f}s left).")
+                raise DeadlineExceeded("llm") from None
+            raise
+        if (time_left(config) or 0.0) <= 0:
+            # Answered, but too late for the request to use it
+            logger.warning(f"LLM answered after the request deadline ({timeout:.2f}s left).")
+            raise DeadlineExceeded("llm")
+        return response
+
+    async def _ainvoke(self, messages: List[BaseMessage], timeout: Optional[float]) -> Any:
+        """Async counterpart of `_invoke`; a late call is cancelled."""
+        if timeout is None:
+            return await self.llm.ainvoke(messages)
+        try:
+            return await asyncio.wait_for(self.llm.ainvoke(messages), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"LLM call cancelled at the request deadline ({timeout:.2f}s left).")
+            raise DeadlineExceeded("llm") from None
+
+    def __call__(self, state: StateType, config: Optional[RunnableConfig] = None) -> StateType:
         """
         Invokes the LLM with the current conversation state.
 
         Args:
             state (StateType): A dictionary containing a list of messages under the
                 "messages" key.
+            config (Optional[RunnableConfig]): Run config; a request deadline in it
+                bounds the LLM call.
+
+        Returns:
+            StateType: A new state dictionary with the response appended as the latest message.
+
+        Raises:
+            DeadlineExceeded: If the request deadline passes before the LLM answers.
+        """
+        timeout = check_deadline(config, "llm")
+        try:
+            self._log_request(state)
+
+            with timed("llm"):
+                key, response = self._cache_lookup(state["messages"])
+                if response is None:
+                    response = self._invoke(state["messages"], timeout, config)
+                    record_token_usage(response)
+                    self._cache_store(key, response)
+            log_output(response.content)
+
+            return {"messages": [response]}
+
+        except DeadlineExceeded:
+            raise
+        except Exception:
+            return self._error_state()
+
+    async def ainvoke(self, state: StateType, config: Optional[RunnableConfig] = None) -> StateType:
+        """
+        Async counterpart of `__call__`, awaiting the LLM's `ainvoke` method.
+
+        Used by the graph when it is run through `astream`/`ainvoke`, so waiting on
+        the provider does not tie up a thread.
+
+        Args:
+            state (StateType): A dictionary containing a list of messages under the
+                "messages" key.
+            config (Optional[RunnableConfig]): Run config; a request deadline in it
+                bounds the LLM call.
 
         Returns:
             StateType: A new state dictionary with the response appended as the latest message.
+
+        Raises:
+            DeadlineExceeded: If the request deadline passes before the LLM answers.
         """
+        timeout = check_deadline(config, "llm")
         try:
-            last_msg = state["messages"][-1]
-            input_text = getattr(last_msg, "content", str(last_msg))
-            log_input(input_text)
+            self._log_request(state)
 
-            response: AIMessage = self.llm.invoke(state["messages"])
+            with timed("llm"):
+                # Cache backends can block (a locked SQLite file); keep them off the loop
+                key, response = await asyncio.to_thread(self._cache_lookup, state["messages"])
+                if response is None:
+                    response = await self._ainvoke(state["messages"], timeout)
+                    record_token_usage(response)
+                    await asyncio.to_thread(self._cache_store, key, response)
             log_output(response.content)
 
             return {"messages": [response]}
 
-        except Exception as e:
-            logger.exception("LLM invocation failed.")
-            return {
-                "messages": [
-                    AIMessage(
-                        content="⚠️ An internal error occurred during LLM processing."
-                    )
-                ]
-            }
+        except DeadlineExceeded:
+            raise
+        except Exception:
+            return self._error_state()
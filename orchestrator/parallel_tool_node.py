@@ -0,0 +1,301 @@
+"""
+Parallel Tool Node Module
+
+A drop-in replacement for LangGraph's `ToolNode` that controls how the tool
+calls of one `AIMessage` are executed:
+- identical calls (same tool, exactly the same arguments) run once and every
+  duplicate receives the shared result
+- distinct calls run concurrently, on a bounded thread pool for sync runs or
+  as tasks for async runs, with an optional per-tool concurrency limit
+- each call has a deadline, shortened to the request deadline of the run
+  config when that comes first; a call that misses it (or raises) yields an
+  error ToolMessage so the graph keeps moving and the LLM can react
+- a sync call that misses its deadline cannot be stopped and keeps its
+  worker thread and per-tool slot until it returns; such abandoned calls are
+  counted, and new calls are refused at once while they fill the pool or the
+  tool's slots, instead of queueing behind them until they time out too
+
+Author: Limon Halder
+"""
+
+import asyncio
+import contextvars
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import BaseTool
+
+from logger.logger import logger
+from logger.metrics import record_tool_calls
+from wrapper.run_budget import check_deadline
+
+# Outcome of one distinct call: (content, status)
+CallResult = Tuple[str, str]
+
+
+def format_tool_output(output: Any) -> str:
+    """
+    Convert a tool result into ToolMessage content.
+
+    Args:
+        output (Any): The raw tool result.
+
+    Returns:
+        str: Strings unchanged; anything else as JSON (or its str() form).
+    """
+    if isinstance(output, str):
+        return output
+    try:
+        return json.dumps(output, ensure_ascii=False)
+    except (TypeError, ValueError):
+        return str(output)
+
+
+class ParallelToolNode:
+    """
+    Graph node that executes the tool calls of the last AIMessage.
+
+    Attributes:
+        tools_by_name (Dict[str, BaseTool]): Available tools.
+        timeout (float): Per-call deadline in seconds.
+        max_workers (int): Size of the thread pool used by sync runs.
+        max_concurrency_per_tool (Optional[int]): Cap on simultaneous calls of
+            any one tool (None for no cap). Sync runs share the cap across all
+            runs of this node; async runs apply it within each run.
+        abandoned_calls (Dict[str, int]): Timed-out sync calls still running,
+            per tool.
+    """
+
+    def __init__(
+        self,
+        tools: Sequence[BaseTool],
+        timeout: float = 30.0,
+        max_workers: int = 8,
+        max_concurrency_per_tool: Optional[int] = 4,
+    ):
+        self.tools_by_name: Dict[str, BaseTool] = {tool.name: tool for tool in tools}
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self.max_concurrency_per_tool = max_concurrency_per_tool
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self._thread_limits: Dict[str, threading.BoundedSemaphore] = {}
+        self.abandoned_calls: Dict[str, int] = {}
+
+    # --- Helpers -------------------------------------------------------------
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="tool-call"
+                )
+            return self._executor
+
+    def _group_calls(
+        self, state: Dict[str, Any]
+    ) -> Tuple[List[Tuple[str, Dict[str, Any]]], Dict[str, Dict[str, Any]]]:
+        """
+        Collect the tool calls to run and collapse duplicates.
+
+        Returns:
+            Tuple[List[Tuple[str, Dict[str, Any]]], Dict[str, Dict[str, Any]]]:
+                (key, call) pairs in request order, and one representative call
+                per distinct key.
+        """
+        messages = state["messages"]
+        last = messages[-1] if messages else None
+        if not isinstance(last, AIMessage):
+            raise ValueError("ParallelToolNode expects the last message to be an AIMessage.")
+        record_tool_calls(last, self.tools_by_name)
+
+        # Exact key: calls differing only in case or whitespace both run
+        calls = [
+            (call["name"] + json.dumps(call.get("args") or {}, sort_keys=True), call)
+            for call in last.tool_calls
+        ]
+        distinct: Dict[str, Dict[str, Any]] = {}
+        for key, call in calls:
+            distinct.setdefault(key, call)
+
+        if len(distinct) < len(calls):
+            logger.info(f"Merged {len(calls) - len(distinct)} duplicate tool call(s).")
+        return calls, distinct
+
+    def _build_messages(
+        self, calls: List[Tuple[str, Dict[str, Any]]], results: Dict[str, CallResult]
+    ) -> Dict[str, List[ToolMessage]]:
+        messages = []
+        for key, call in calls:
+            content, status = results[key]
+            messages.append(
+                ToolMessage(
+                    content=content,
+                    name=call["name"],
+                    tool_call_id=call["id"],
+                    status=status,
+                )
+            )
+        return {"messages": messages}
+
+    def _unknown_tool(self, name: str) -> CallResult:
+        available = ", ".join(self.tools_by_name) or "none"
+        return f"Error: {name} is not a valid tool, try one of [{available}].", "error"
+
+    def _error(self, name: str, error: BaseException) -> CallResult:
+        logger.error(f"Tool '{name}' failed: {error}")
+        return f"Error: {error!r}\n Please fix your mistakes.", "error"
+
+    def _timed_out(self, name: str, timeout: float) -> CallResult:
+        logger.warning(f"Tool '{name}' did not finish within {timeout:.1f}s.")
+        return f"Error: tool '{name}' timed out after {timeout:.1f}s.", "error"
+
+    def _call_timeout(self, config: Optional[RunnableConfig]) -> float:
+        """The per-call timeout, capped by the request deadline (raises once it has passed)."""
+        remaining = check_deadline(config, "tools")
+        return self.timeout if remaining is None else min(self.timeout, remaining)
+
+    # --- Sync path -----------------------------------------------------------
+
+    def _abandon(self, name: str, future: Any) -> None:
+        """Count a timed-out call until its worker thread is free again."""
+        if future.cancel():
+            return  # Still queued: it never took a worker
+        with self._executor_lock:
+            self.abandoned_calls[name] = self.abandoned_calls.get(name, 0) + 1
+
+        def release(_: Any) -> None:
+            with self._executor_lock:
+                self.abandoned_calls[name] -= 1
+                if not self.abandoned_calls[name]:
+                    del self.abandoned_calls[name]
+
+        future.add_done_callback(release)
+
+    def _refusal(self, name: str) -> Optional[CallResult]:
+        """An error result if abandoned calls leave no worker or slot for `name`."""
+        with self._executor_lock:
+            total = sum(self.abandoned_calls.values())
+            stuck = self.abandoned_calls.get(name, 0)
+        if total < self.max_workers and (
+            self.max_concurrency_per_tool is None or stuck < self.max_concurrency_per_tool
+        ):
+            return None
+        logger.warning(
+            f"Tool '{name}' refused: {total} timed-out call(s) still hold the pool "
+            f"({stuck} of them for this tool)."
+        )
+        return (
+            f"Error: tool '{name}' is unavailable, earlier calls are still running. "
+            "Try again later.",
+            "error",
+        )
+
+    def _run_limited(self, tool: BaseTool, args: Dict[str, Any], config: Optional[RunnableConfig]) -> Any:
+        if self.max_concurrency_per_tool is None:
+            return tool.invoke(args, config)
+        with self._executor_lock:
+            limit = self._thread_limits.setdefault(
+                tool.name, threading.BoundedSemaphore(self.max_concurrency_per_tool)
+            )
+        with limit:
+            return tool.invoke(args, config)
+
+    def __call__(self, state: Dict[str, Any], config: Optional[RunnableConfig] = None) -> Dict[str, Any]:
+        """
+        Run the pending tool calls on the thread pool.
+
+        Args:
+            state (Dict[str, Any]): Graph state whose last message holds the tool calls.
+            config (Optional[RunnableConfig]): Run configuration passed to each tool;
+                its request deadline caps the call timeout.
+
+        Returns:
+            Dict[str, Any]: One ToolMessage per requested call, in request order.
+        """
+        calls, distinct = self._group_calls(state)
+        timeout = self._call_timeout(config)
+        executor = self._get_executor()
+
+        futures = {}
+        results: Dict[str, CallResult] = {}
+        for key, call in distinct.items():
+            tool = self.tools_by_name.get(call["name"])
+            if tool is None:
+                results[key] = self._unknown_tool(call["name"])
+                continue
+            refusal = self._refusal(tool.name)
+            if refusal is not None:
+                results[key] = refusal
+                continue
+            # Copy the context so request ids and callbacks follow the call
+            context = contextvars.copy_context()
+            futures[key] = executor.submit(
+                context.run, self._run_limited, tool, call.get("args") or {}, config
+            )
+
+        # Calls run side by side, so they share one deadline measured from submission
+        deadline = time.monotonic() + timeout
+        for key, future in futures.items():
+            name = distinct[key]["name"]
+            try:
+                output = future.result(timeout=max(0.0, deadline - time.monotonic()))
+                results[key] = (format_tool_output(output), "success")
+            except FutureTimeoutError:
+                self._abandon(name, future)
+                results[key] = self._timed_out(name, timeout)
+            except Exception as e:
+                results[key] = self._error(name, e)
+
+        return self._build_messages(calls, results)
+
+    # --- Async path ----------------------------------------------------------
+
+    async def ainvoke(self, state: Dict[str, Any], config: Optional[RunnableConfig] = None) -> Dict[str, Any]:
+        """
+        Async counterpart of `__call__`: runs the pending tool calls as tasks.
+
+        Args:
+            state (Dict[str, Any]): Graph state whose last message holds the tool calls.
+            config (Optional[RunnableConfig]): Run configuration passed to each tool;
+                its request deadline caps the call timeout.
+
+        Returns:
+            Dict[str, Any]: One ToolMessage per requested call, in request order.
+        """
+        calls, distinct = self._group_calls(state)
+        timeout = self._call_timeout(config)
+        limits: Dict[str, asyncio.Semaphore] = {}
+
+        async def run(call: Dict[str, Any]) -> CallResult:
+            name = call["name"]
+            tool = self.tools_by_name.get(name)
+            if tool is None:
+                return self._unknown_tool(name)
+            limit = None
+            if self.max_concurrency_per_tool is not None:
+                limit = limits.setdefault(name, asyncio.Semaphore(self.max_concurrency_per_tool))
+
+            async def invoke() -> Any:
+                if limit is None:
+                    return await tool.ainvoke(call.get("args") or {}, config)
+                async with limit:
+                    return await tool.ainvoke(call.get("args") or {}, config)
+
+            try:
+                output = await asyncio.wait_for(invoke(), timeout=timeout)
+                return format_tool_output(output), "success"
+            except asyncio.TimeoutError:
+                return self._timed_out(name, timeout)
+            except Exception as e:
+                return self._error(name, e)
+
+        outcomes = await asyncio.gather(*(run(call) for call in distinct.values()))
+        results = dict(zip(distinct, outcomes))
+        return self._build_messages(calls, results)
@@ -0,0 +1,83 @@
+"""
+Pooled Tavily API Wrapper Module
+
+`TavilySearchAPIWrapper` posts every search with a bare `requests.post` (or a
+fresh aiohttp session), so each search opens and tears down its own TLS
+connection. This subclass sends the same requests through the shared clients
+of `orchestrator.http_clients`, keeping connections alive between searches.
+
+Imported only by `init_search_tool`, since langchain_tavily is slow to import.
+The request body, headers and error handling mirror langchain_tavily 0.2.x
+(pinned in requirements.txt); a test compares them with upstream `raw_results`.
+
+Author: Limon Halder
+"""
+
+from typing import Any, Dict
+
+from langchain_tavily._utilities import TAVILY_API_URL, TavilySearchAPIWrapper
+
+
+class PooledTavilySearchAPIWrapper(TavilySearchAPIWrapper):
+    """
+    Tavily search API wrapper backed by pooled httpx clients.
+
+    Attributes:
+        http_client (Any): Shared `httpx.Client` used for sync searches.
+        http_async_client (Any): Shared `httpx.AsyncClient` used for async searches.
+    """
+
+    http_client: Any = None
+    http_async_client: Any = None
+
+    def _request(self, query: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the search request arguments; None parameters are left out."""
+        body = {"query": query, **{k: v for k, v in params.items() if v is not None}}
+        headers = {
+            "Authorization": f"Bearer {self.tavily_api_key.get_secret_value()}",
+            "Content-Type": "application/json",
+            "X-Client-Source": "langchain-tavily",
+        }
+        url = f"{self.api_base_url or TAVILY_API_URL}/search"
+        return {"url": url, "json": body, "headers": headers}
+
+    @staticmethod
+    def _result(response: Any) -> Dict[str, Any]:
+        if response.status_code != 200:
+            try:
+                detail = response.json().get("detail", {})
+            except ValueError:
+                detail = {}
+            error_message = detail.get("error") if isinstance(detail, dict) else "Unknown error"
+            raise ValueError(f"Error {response.status_code}: {error_message}")
+        return response.json()
+
+    def raw_results(self, query: str, **kwargs: Any) -> Dict[str, Any]:
+        """
+        Run a search on the shared sync client.
+
+        Args:
+            query (str): The search query.
+            **kwargs (Any): Search parameters, as passed by TavilySearch.
+
+        Returns:
+            Dict[str, Any]: The decoded API response.
+        """
+        if self.http_client is None:
+            return super().raw_results(query=query, **kwargs)
+        return self._result(self.http_client.post(**self._request(query, kwargs)))
+
+    async def raw_results_async(self, query: str, **kwargs: Any) -> Dict[str, Any]:
+        """
+        Async counterpart of `raw_results`, on the shared async client.
+
+        Args:
+            query (str): The search query.
+            **kwargs (Any): Search parameters, as passed by TavilySearch.
+
+        Returns:
+            Dict[str, Any]: The decoded API response.
+        """
+        if self.http_async_client is None:
+            return await super().raw_results_async(query=query, **kwargs)
+        return self._result(await self.http_async_client.post(**self._request(query, kwargs)))
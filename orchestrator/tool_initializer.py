@@ -1,15 +1,30 @@
 import os
-from typing import Optional
-from langchain_tavily import TavilySearch
+from typing import TYPE_CHECKING, Optional, Union
+from orchestrator.cache_backends import CacheBackend
+from orchestrator.cached_tool import CachedTool
 from logger.logger import logger
 
+if TYPE_CHECKING:
+    from langchain_tavily import TavilySearch
+    from orchestrator.http_clients import HTTPClientRegistry
 
-def init_search_tool() -> Optional[TavilySearch]:
+
+def init_search_tool(
+    cache: Optional[CacheBackend] = None,
+    http_clients: Optional["HTTPClientRegistry"] = None,
+) -> Optional[Union["TavilySearch", CachedTool]]:
     """
     Initializes the TavilySearch tool with predefined parameters.
 
+    Args:
+        cache (Optional[CacheBackend]): If given, repeated queries are answered from
+            this cache (e.g. InMemoryCache, or SQLiteCache shared by several workers).
+        http_clients (Optional[HTTPClientRegistry]): Registry of the pooled HTTP
+            clients to send searches through; defaults to the process-wide one.
+
     Returns:
-        Optional[TavilySearch]: An instance of TavilySearch if initialization succeeds; otherwise, None.
+        Optional[Union[TavilySearch, CachedTool]]: An instance of TavilySearch (wrapped
+            in a CachedTool when a cache is given) if initialization succeeds; otherwise, None.
     """
     try:
         api_key = os.getenv("TAVILY_API_KEY")
@@ -17,13 +32,27 @@ def init_search_tool() -> Optional[TavilySearch]:
             logger.error("TAVILY_API_KEY not found in environment variables.")
             return None
 
+        # Imported on first use: langchain_tavily is slow to import
+        from langchain_tavily import TavilySearch
+        from orchestrator.http_clients import get_http_clients
+        from orchestrator.pooled_tavily import PooledTavilySearchAPIWrapper
+
+        http_clients = http_clients or get_http_clients()
+        api_wrapper = PooledTavilySearchAPIWrapper(
+            tavily_api_key=api_key,
+            http_client=http_clients.client("tavily"),
+            http_async_client=http_clients.async_client("tavily"),
+        )
         search_tool = TavilySearch(
             max_results=5,
             topic="general",
-            tavily_api_key=api_key
+            api_wrapper=api_wrapper
         )
 
         logger.info("TavilySearch tool initialized successfully.")
+        if cache is not None:
+            logger.info(f"TavilySearch results cached with {type(cache).__name__}.")
+            return CachedTool(search_tool, cache)
         return search_tool
 
     except Exception as e:
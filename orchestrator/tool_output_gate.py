@@ -0,0 +1,127 @@
+"""
+Tool Output Gate Module
+
+Scans tool results inside the graph, before they reach the LLM. Without it a
+malicious search result is only caught when `SecureAgentWrapper` scans the
+next step, after a full LLM call has already been paid for and its output has
+to be thrown away.
+
+The gate wraps the tools node itself, so the poisoned content never appears
+in any streamed or checkpointed state. Only the ToolMessages produced by that
+run are scanned. Two modes are supported:
+- "halt": the offending results are replaced by a placeholder and the graph
+  ends with a short assistant message, skipping the next LLM call
+- "strip": the offending results are replaced by a placeholder and the LLM
+  continues with the remaining results
+
+Author: Limon Halder
+"""
+
+import asyncio
+from typing import Any, Dict, List, Tuple
+
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.runnables import Runnable, RunnableConfig, RunnableLambda
+from langgraph.graph import END
+
+from logger.logger import log_threat
+from logger.metrics import BLOCKED_REQUESTS, METRICS
+from wrapper.stream_scanner import chunk_text
+from wrapper.threat_detector import check_for_threats
+
+# Content that replaces a blocked tool result
+TOOL_OUTPUT_BLOCKED_MESSAGE = "⚠️ Tool output removed due to security concerns."
+
+# Final assistant message when the gate halts the graph
+TOOL_HALT_MESSAGE = "⚠️ A tool returned content that was blocked due to security concerns."
+
+# Route name for "carry on to the next node"
+CONTINUE = "continue"
+
+GATE_MODES = ("halt", "strip")
+
+
+class ToolOutputGate:
+    """
+    Screens the ToolMessages returned by the tools node.
+
+    Attributes:
+        mode (str): "halt" or "strip".
+    """
+
+    def __init__(self, mode: str = "halt"):
+        """
+        Args:
+            mode (str): "halt" to end the run on a blocked result, "strip" to
+                remove the result and let the LLM continue.
+        """
+        if mode not in GATE_MODES:
+            raise ValueError(f"mode must be one of {GATE_MODES}, got {mode!r}")
+        self.mode = mode
+
+    def screen(self, update: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Scan the tool results of one tools-node run.
+
+        Args:
+            update (Dict[str, Any]): The tools node output (`{"messages": [...]}`).
+
+        Returns:
+            Dict[str, Any]: The same update with blocked results replaced and,
+                in halt mode, a final assistant message appended.
+        """
+        messages, blocked = self._screen_messages(update.get("messages", []))
+        if not blocked:
+            return update
+        if self.mode == "halt":
+            messages.append(AIMessage(content=TOOL_HALT_MESSAGE))
+        return {**update, "messages": messages}
+
+    def _screen_messages(self, messages: List[Any]) -> Tuple[List[Any], int]:
+        screened: List[Any] = []
+        blocked = 0
+        for message in messages:
+            if isinstance(message, ToolMessage):
+                text = chunk_text(message)
+                if not check_for_threats(text, stage="tool"):
+                    blocked += 1
+                    METRICS.inc(BLOCKED_REQUESTS, stage="tool")
+                    log_threat("Blocked tool output due to threat detection", text, "tool")
+                    message = message.model_copy(
+                        update={"content": TOOL_OUTPUT_BLOCKED_MESSAGE, "status": "error"}
+                    )
+            screened.append(message)
+        return screened, blocked
+
+    def wrap(self, tools_node: Runnable) -> Runnable:
+        """
+        Wrap the tools node so its output is screened before it enters the state.
+
+        Args:
+            tools_node (Runnable): The tools node (sync and async paths are kept).
+
+        Returns:
+            Runnable: The gated tools node.
+        """
+
+        def run(state: Dict[str, Any], config: RunnableConfig) -> Dict[str, Any]:
+            return self.screen(tools_node.invoke(state, config))
+
+        async def arun(state: Dict[str, Any], config: RunnableConfig) -> Dict[str, Any]:
+            update = await tools_node.ainvoke(state, config)
+            return await asyncio.to_thread(self.screen, update)
+
+        return RunnableLambda(run, afunc=arun, name="tools")
+
+    @staticmethod
+    def route(state: Dict[str, Any]) -> str:
+        """
+        Conditional edge after the gated tools node.
+
+        Returns:
+            str: END if the gate halted the run, CONTINUE otherwise.
+        """
+        messages = state.get("messages") or []
+        if messages and isinstance(messages[-1], AIMessage):
+            return END
+        return CONTINUE
@@ -0,0 +1,68 @@
+"""
+Batch CLI
+
+Runs a JSONL file of prompts through the secured Groq + Tavily agent.
+
+Usage:
+    python run_batch.py prompts.jsonl results.jsonl --concurrency 16 --rps 5
+    python run_batch.py prompts.jsonl results.jsonl --no-resume
+
+Re-running with the same output file resumes an interrupted batch.
+
+Author: Limon Halder
+"""
+
+import argparse
+import asyncio
+import sys
+from typing import List, Optional
+
+from orchestrator.agent_factory import get_secure_agent
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Entry point for the batch CLI.
+
+    Returns:
+        int: Process exit code (1 if setup failed or any record errored).
+    """
+    parser = argparse.ArgumentParser(description="Run queued prompts through the secure agent.")
+    parser.add_argument("input", help="Input JSONL file.")
+    parser.add_argument("output", help="Output JSONL file (appended; used to resume).")
+    parser.add_argument("--concurrency", type=int, default=8, help="Agent runs in flight.")
+    parser.add_argument("--rps", type=float, default=None, help="Max LLM requests per second.")
+    parser.add_argument("--max-attempts", type=int, default=3, help="Attempts per record.")
+    parser.add_argument("--id-field", default="id")
+    parser.add_argument("--input-field", default="input")
+    parser.add_argument("--no-resume", action="store_true", help="Overwrite the output file.")
+    args = parser.parse_args(argv)
+
+    # Imported after argument parsing, so --help and usage errors return quickly
+    from langchain_core.rate_limiters import InMemoryRateLimiter
+    from wrapper.batch_runner import BatchRunner, iter_batch_inputs
+
+    # Limit the provider calls themselves: one agent run can make several
+    rate_limiter = (
+        InMemoryRateLimiter(requests_per_second=args.rps, max_bucket_size=max(1, args.rps))
+        if args.rps
+        else None
+    )
+    secure_agent = get_secure_agent(rate_limiter=rate_limiter)
+    if not secure_agent:
+        return 1
+
+    runner = BatchRunner(secure_agent, concurrency=args.concurrency, max_attempts=args.max_attempts)
+    summary = asyncio.run(
+        runner.run(
+            iter_batch_inputs(args.input, args.id_field, args.input_field),
+            args.output,
+            resume=not args.no_resume,
+        )
+    )
+    print(", ".join(f"{status}: {count}" for status, count in summary.items()))
+    return 1 if summary["error"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""
+Agent HTTP Service CLI
+
+Serves the secured Groq + Tavily agent over HTTP, streaming answers as
+Server-Sent Events (see `service.server`).
+
+Usage:
+    python serve.py --port 8000 --agents 8 --max-per-client 2 --max-queue 32
+    python serve.py --fake    # offline LLM and search tool, no API keys needed
+    python serve.py --threads-db threads.db    # keep conversations per thread_id
+
+    curl -N -X POST localhost:8000/v1/chat -d '{"message": "Weather in Dhaka?"}'
+
+SIGINT/SIGTERM stop accepting requests and drain the in-flight streams.
+
+Author: Limon Halder
+"""
+
+import argparse
+import asyncio
+import functools
+import sys
+from typing import Any, List, Optional
+
+
+def build_fake_secure_agent(checkpointer: Optional[Any] = None) -> Any:
+    """A secured agent around the offline scripted LLM and fake search tool."""
+    from benchmarks.run import build_fake_agent
+    from wrapper.base_wrapper import SecureAgentWrapper
+
+    return SecureAgentWrapper(build_fake_agent(checkpointer))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Entry point for the service CLI.
+
+    Returns:
+        int: Process exit code (1 if the agents could not be built).
+    """
+    parser = argparse.ArgumentParser(description="Serve the secure agent over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--agents", type=int, default=8, help="Warm agents, and agent runs in flight.")
+    parser.add_argument("--max-per-client", type=int, default=2, help="Requests per client.")
+    parser.add_argument("--max-queue", type=int, default=32, help="Requests waiting for an agent.")
+    parser.add_argument("--queue-timeout", type=float, default=10.0, help="Longest wait in the queue.")
+    parser.add_argument("--drain-timeout", type=float, default=30.0, help="Shutdown grace period.")
+    parser.add_argument("--fake", action="store_true", help="Use the offline fake LLM and search tool.")
+    parser.add_argument(
+        "--trust-client-id",
+        action="store_true",
+        help="Key per-client limits on the X-Client-Id header (only behind a trusted proxy).",
+    )
+    parser.add_argument(
+        "--threads-db",
+        help="SQLite file keeping conversations per thread_id; without it, thread_id is rejected.",
+    )
+    parser.add_argument(
+        "--threads-max-idle",
+        type=float,
+        default=7 * 24 * 3600,
+        help="Seconds after which an idle thread is deleted from --threads-db (0 keeps threads).",
+    )
+    args = parser.parse_args(argv)
+
+    # Imported after argument parsing, so --help and usage errors return quickly
+    from orchestrator.agent_factory import build_secure_agent
+    from service.admission import AdmissionController
+    from service.agent_pool import AgentPool
+    from service.server import AgentService
+
+    factory = build_fake_secure_agent if args.fake else build_secure_agent
+    if args.threads_db:
+        from orchestrator.checkpointer import SQLiteCheckpointSaver
+
+        # One saver for the whole pool, so any agent can resume any thread
+        saver = SQLiteCheckpointSaver(
+            args.threads_db, max_idle_seconds=args.threads_max_idle or None
+        )
+        factory = functools.partial(factory, checkpointer=saver)
+    service = AgentService(
+        AgentPool(factory, size=args.agents),
+        AdmissionController(
+            max_concurrency=args.agents,
+            max_per_client=args.max_per_client,
+            max_queue=args.max_queue,
+            queue_timeout=args.queue_timeout,
+        ),
+        host=args.host,
+        port=args.port,
+        drain_timeout=args.drain_timeout,
+        threads=bool(args.threads_db),
+        trust_client_id=args.trust_client_id,
+    )
+    try:
+        asyncio.run(service.serve_forever())
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
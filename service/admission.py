@@ -0,0 +1,142 @@
+"""
+Admission Control Module
+
+Decides whether an incoming agent request may run now, may wait, or is
+turned away. Caps apply globally (agent runs in flight) and per client, and
+waiting requests sit in a queue of bounded depth and bounded wait; anything
+beyond that is rejected at once with `Overloaded`, which the server turns
+into a 429 (or a 503 while draining). Overload therefore costs the caller a
+fast retry instead of costing the process unbounded memory and threads.
+
+Author: Limon Halder
+"""
+
+import asyncio
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict
+
+from logger.logger import logger
+from logger.metrics import METRICS
+
+REJECTED_REQUESTS = "secure_agent_rejected_total"
+METRICS.describe(REJECTED_REQUESTS, "counter", "Service requests turned away by admission control.")
+
+# Reasons a request is turned away
+REJECT_QUEUE_FULL = "queue_full"
+REJECT_CLIENT_LIMIT = "client_limit"
+REJECT_QUEUE_TIMEOUT = "queue_timeout"
+REJECT_DRAINING = "draining"
+
+
+class Overloaded(Exception):
+    """
+    Raised when a request is not admitted.
+
+    Attributes:
+        reason (str): One of the REJECT_* reasons.
+    """
+
+    def __init__(self, reason: str):
+        super().__init__(f"Request rejected: {reason}")
+        self.reason = reason
+
+
+class AdmissionController:
+    """
+    Global and per-client concurrency caps with a bounded wait queue.
+
+    Attributes:
+        max_concurrency (int): Agent runs in flight across all clients.
+        max_per_client (int): Requests (running or queued) per client.
+        max_queue (int): Requests allowed to wait for a free slot.
+        queue_timeout (float): Longest wait for a slot, in seconds.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        max_per_client: int = 2,
+        max_queue: int = 32,
+        queue_timeout: float = 10.0,
+    ):
+        """
+        Args:
+            max_concurrency (int): Agent runs in flight across all clients.
+            max_per_client (int): Requests one client may have running or queued.
+            max_queue (int): Requests allowed to wait once all slots are busy;
+                0 rejects as soon as the service is saturated.
+            queue_timeout (float): Seconds a queued request waits before it is
+                rejected.
+        """
+        self.max_concurrency = max_concurrency
+        self.max_per_client = max_per_client
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._per_client: Dict[str, int] = defaultdict(int)
+        self._in_flight = 0
+        self._queued = 0
+        self._closed = False
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queued(self) -> int:
+        return self._queued
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def close(self) -> None:
+        """Stop admitting requests (used while draining); admitted ones carry on."""
+        self._closed = True
+
+    def _reject(self, reason: str, client_id: str) -> Overloaded:
+        METRICS.inc(REJECTED_REQUESTS, reason=reason)
+        logger.warning(f"Rejected request from client '{client_id}': {reason}.")
+        return Overloaded(reason)
+
+    @asynccontextmanager
+    async def admit(self, client_id: str) -> AsyncIterator[None]:
+        """
+        Hold one agent slot for the enclosed block, waiting in the queue if needed.
+
+        Args:
+            client_id (str): Identity the per-client cap is counted against.
+
+        Raises:
+            Overloaded: If the request is not admitted.
+        """
+        if self._closed:
+            raise self._reject(REJECT_DRAINING, client_id)
+        if self._per_client[client_id] >= self.max_per_client:
+            raise self._reject(REJECT_CLIENT_LIMIT, client_id)
+        saturated = self._in_flight >= self.max_concurrency or self._queued > 0
+        if saturated and self._queued >= self.max_queue:
+            raise self._reject(REJECT_QUEUE_FULL, client_id)
+
+        self._per_client[client_id] += 1
+        try:
+            self._queued += 1
+            try:
+                async with asyncio.timeout(self.queue_timeout):
+                    await self._slots.acquire()
+            except TimeoutError:
+                raise self._reject(REJECT_QUEUE_TIMEOUT, client_id) from None
+            finally:
+                self._queued -= 1
+
+            self._in_flight += 1
+            try:
+                yield
+            finally:
+                self._in_flight -= 1
+                self._slots.release()
+        finally:
+            self._per_client[client_id] -= 1
+            if not self._per_client[client_id]:
+                del self._per_client[client_id]
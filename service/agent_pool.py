@@ -0,0 +1,69 @@
+"""
+Agent Pool Module
+
+Keeps a fixed set of compiled, secured agents built before the service
+starts accepting requests, so no request pays for building a graph or an
+LLM client. Agents are checked out for one request at a time.
+
+Author: Limon Halder
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, List, Optional
+
+from logger.logger import logger
+
+
+class AgentPool:
+    """
+    A warm pool of agents handed out one request at a time.
+
+    Attributes:
+        factory (Callable[[], Any]): Builds one agent (None on failure).
+        size (int): Number of agents in the pool.
+    """
+
+    def __init__(self, factory: Callable[[], Any], size: int = 4):
+        """
+        Args:
+            factory (Callable[[], Any]): Builds one agent, e.g.
+                `orchestrator.agent_factory.build_secure_agent`.
+            size (int): Number of agents to build; match it to the service's
+                concurrency cap so a checkout never waits.
+        """
+        self.factory = factory
+        self.size = size
+        self._idle: Optional["asyncio.Queue[Any]"] = None
+
+    @property
+    def available(self) -> int:
+        return self._idle.qsize() if self._idle is not None else 0
+
+    async def start(self) -> None:
+        """
+        Build every agent of the pool (on worker threads) before serving.
+
+        Raises:
+            RuntimeError: If the factory fails to build an agent.
+        """
+        agents: List[Any] = await asyncio.gather(
+            *(asyncio.to_thread(self.factory) for _ in range(self.size))
+        )
+        if any(agent is None for agent in agents):
+            raise RuntimeError("Agent pool could not build all agents.")
+        self._idle = asyncio.Queue()
+        for agent in agents:
+            self._idle.put_nowait(agent)
+        logger.info(f"Agent pool ready with {self.size} agent(s).")
+
+    @asynccontextmanager
+    async def checkout(self) -> AsyncIterator[Any]:
+        """Lend one agent for the enclosed block, waiting if all are busy."""
+        if self._idle is None:
+            raise RuntimeError("AgentPool.start() must be awaited before checkout().")
+        agent = await self._idle.get()
+        try:
+            yield agent
+        finally:
+            self._idle.put_nowait(agent)
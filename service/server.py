@@ -0,0 +1,401 @@
+"""
+Agent HTTP Service Module
+
+A small asyncio HTTP/1.1 server in front of a pool of secured agents. It
+streams each answer as Server-Sent Events while `SecureAgentWrapper` screens
+it, and protects the process under load:
+- admission control caps runs globally and per client, with a bounded queue;
+  anything beyond it gets an immediate 429 with Retry-After
+- request heads and bodies are size- and time-limited
+- every SSE event is flushed with `drain()`, so a slow reader slows its own
+  stream instead of growing a buffer
+- the connection is watched for EOF while the agent runs, so a client that
+  disconnects cancels its agent run (and frees its slot) even while the run
+  is waiting on the LLM or a tool and has nothing to write
+- `shutdown()` stops accepting, answers new requests on open connections
+  with 503, and waits (up to a timeout) for in-flight streams to finish
+
+Endpoints:
+- POST /v1/chat with `{"message": "...", "thread_id": "optional"}`: SSE events
+  `token` (answer text), `tool` (a tool was called), `notice` (blocked or
+  stopped) and a final `done` with the stop reason, if any. `thread_id` is
+  only accepted when the pooled agents share a checkpointer (`threads=True`);
+  the conversation then continues from its stored history
+- GET /healthz: status, runs in flight, queued requests, idle agents
+- GET /metrics: Prometheus text exposition
+
+Clients are identified by their address. The X-Client-Id header is only
+used with `trust_client_id=True`, behind a trusted proxy that sets it;
+otherwise any caller could dodge the per-client cap by rotating it.
+
+Author: Limon Halder
+"""
+
+import asyncio
+import json
+import signal
+from contextlib import aclosing, suppress
+from typing import Any, Coroutine, Dict, Optional, Set, Tuple
+
+from langchain_core.messages import AIMessage, ToolMessage
+
+from logger.logger import logger
+from logger.metrics import METRICS
+from service.admission import REJECT_DRAINING, AdmissionController, Overloaded
+from service.agent_pool import AgentPool
+from wrapper.stream_scanner import chunk_text
+
+STATUS_TEXT = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    408: "Request Timeout",
+    413: "Payload Too Large",
+    429: "Too Many Requests",
+    431: "Request Header Fields Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+class HTTPError(Exception):
+    """An error answered with a JSON body and the given status code."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def sse_event(event: str, data: Dict[str, Any]) -> bytes:
+    """Encode one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8")
+
+
+def step_event(message: Any, metadata: Dict[str, Any]) -> Optional[bytes]:
+    """
+    Turn one step of a token stream into an SSE event.
+
+    Args:
+        message (Any): The message chunk, or the wrapper's system-message dict.
+        metadata (Dict[str, Any]): The step metadata.
+
+    Returns:
+        Optional[bytes]: The event, or None for steps the client does not need
+            (e.g. empty chunks that only carry tool-call arguments).
+    """
+    if isinstance(message, dict):
+        return sse_event("notice", {"content": chunk_text(message)})
+    if isinstance(message, ToolMessage):
+        return sse_event("tool", {"name": message.name, "status": message.status})
+    if isinstance(message, AIMessage):
+        text = chunk_text(message)
+        return sse_event("token", {"content": text}) if text else None
+    return None
+
+
+class AgentService:
+    """
+    Asyncio HTTP server streaming secured agent runs as Server-Sent Events.
+
+    Attributes:
+        pool (AgentPool): Warm agents the requests run on.
+        admission (AdmissionController): Global and per-client caps and queue.
+        host (str): Interface to listen on.
+        port (int): Port to listen on (0 picks a free one; set after `start`).
+        max_body_bytes (int): Largest accepted request body.
+        header_timeout (float): Seconds a client has to send the request head and body.
+        drain_timeout (float): Seconds `shutdown` waits for in-flight streams.
+        threads (bool): Whether the agents share a checkpointer, so requests may
+            continue a conversation by `thread_id`.
+        trust_client_id (bool): Key the per-client cap on the X-Client-Id
+            header instead of the peer address (only behind a trusted proxy).
+    """
+
+    def __init__(
+        self,
+        pool: AgentPool,
+        admission: AdmissionController,
+        host: str = "127.0.0.1",
+        port: int = 8000,
+        max_body_bytes: int = 64 * 1024,
+        header_timeout: float = 10.0,
+        drain_timeout: float = 30.0,
+        threads: bool = False,
+        trust_client_id: bool = False,
+    ):
+        self.pool = pool
+        self.admission = admission
+        self.host = host
+        self.port = port
+        self.max_body_bytes = max_body_bytes
+        self.header_timeout = header_timeout
+        self.drain_timeout = drain_timeout
+        self.threads = threads
+        self.trust_client_id = trust_client_id
+        self._server: Optional[asyncio.Server] = None
+        self._connections: Set["asyncio.Task[None]"] = set()
+        self._stopped = asyncio.Event()
+
+    # --- Lifecycle -----------------------------------------------------------
+
+    async def start(self) -> None:
+        """Build the agent pool, then start listening."""
+        await self.pool.start()
+        self._server = await asyncio.start_server(
+            self._handle_connection, self.host, self.port, limit=16 * 1024
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"Agent service listening on http://{self.host}:{self.port}")
+
+    async def serve_forever(self) -> None:
+        """Start, then serve until SIGINT/SIGTERM triggers a graceful shutdown."""
+        await self.start()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            with suppress(NotImplementedError):
+                loop.add_signal_handler(sig, lambda: asyncio.ensure_future(self.shutdown()))
+        await self._stopped.wait()
+
+    async def shutdown(self) -> None:
+        """
+        Stop accepting requests and drain the in-flight streams.
+
+        Streams still running after `drain_timeout` are cancelled, which
+        cancels their agent runs.
+        """
+        if self._stopped.is_set() or self.admission.closed:
+            return
+        logger.info(f"Draining {self.admission.in_flight} in-flight request(s).")
+        self.admission.close()
+        if self._server is not None:
+            self._server.close()
+
+        pending = set(self._connections)
+        if pending:
+            _, pending = await asyncio.wait(pending, timeout=self.drain_timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            logger.warning(f"Cancelled {len(pending)} stream(s) still running at shutdown.")
+            await asyncio.gather(*pending, return_exceptions=True)
+        if self._server is not None:
+            await self._server.wait_closed()
+        self._stopped.set()
+        logger.info("Agent service stopped.")
+
+    # --- Connection handling -------------------------------------------------
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            await self._handle_request(reader, writer)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            logger.info("Client disconnected.")
+        except Exception as e:
+            logger.error(f"Request handling failed: {e}")
+        finally:
+            self._connections.discard(task)
+            writer.close()
+            with suppress(Exception):
+                await writer.wait_closed()
+
+    async def _read_request(
+        self, reader: asyncio.StreamReader
+    ) -> Tuple[str, str, Dict[str, str], bytes]:
+        """
+        Read one request head and body.
+
+        Returns:
+            Tuple[str, str, Dict[str, str], bytes]: Method, path, lower-cased
+                headers and body.
+        """
+        try:
+            async with asyncio.timeout(self.header_timeout):
+                head = await reader.readuntil(b"\r\n\r\n")
+                lines = head.decode("latin-1").split("\r\n")
+                method, target, _ = lines[0].split(" ", 2)
+                headers = {}
+                for line in lines[1:]:
+                    if ":" in line:
+                        name, value = line.split(":", 1)
+                        headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length", "0"))
+                if length > self.max_body_bytes:
+                    raise HTTPError(413, f"Request body is larger than {self.max_body_bytes} bytes.")
+                body = await reader.readexactly(length) if length else b""
+        except TimeoutError:
+            raise HTTPError(408, "Request was not received in time.") from None
+        except asyncio.LimitOverrunError:
+            raise HTTPError(431, "Request head is too large.") from None
+        except ValueError:
+            raise HTTPError(400, "Malformed request.") from None
+        return method, target.split("?", 1)[0], headers, body
+
+    async def _handle_request(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            method, path, headers, body = await self._read_request(reader)
+            if path == "/v1/chat":
+                if method != "POST":
+                    raise HTTPError(405, "Use POST.")
+                await self._chat(reader, writer, headers, body)
+            elif path == "/healthz" and method == "GET":
+                await self._send_json(writer, 200, self.health())
+            elif path == "/metrics" and method == "GET":
+                await self._send(writer, 200, METRICS.render_prometheus().encode(), "text/plain; version=0.0.4")
+            else:
+                raise HTTPError(404, "Not found.")
+        except HTTPError as e:
+            await self._send_json(writer, e.status, {"error": str(e)})
+        except Overloaded as e:
+            status = 503 if e.reason == REJECT_DRAINING else 429
+            await self._send_json(writer, status, {"error": e.reason}, {"Retry-After": "1"})
+
+    def health(self) -> Dict[str, Any]:
+        """Service status for /healthz."""
+        return {
+            "status": "draining" if self.admission.closed else "ok",
+            "in_flight": self.admission.in_flight,
+            "queued": self.admission.queued,
+            "agents_idle": self.pool.available,
+        }
+
+    # --- Responses -----------------------------------------------------------
+
+    @staticmethod
+    async def _send(
+        writer: asyncio.StreamWriter,
+        status: int,
+        body: bytes,
+        content_type: str,
+        extra_headers: Optional[Dict[str, str]] = None,
+    ) -> None:
+        headers = {
+            "Content-Type": content_type,
+            "Content-Length": str(len(body)),
+            "Connection": "close",
+            **(extra_headers or {}),
+        }
+        head = f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+        head += "".join(f"{name}: {value}\r\n" for name, value in headers.items())
+        writer.write(head.encode("latin-1") + b"\r\n" + body)
+        await writer.drain()
+
+    async def _send_json(
+        self,
+        writer: asyncio.StreamWriter,
+        status: int,
+        payload: Dict[str, Any],
+        extra_headers: Optional[Dict[str, str]] = None,
+    ) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        await self._send(writer, status, body, "application/json", extra_headers)
+
+    # --- Chat ----------------------------------------------------------------
+
+    async def _chat(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        headers: Dict[str, str],
+        body: bytes,
+    ) -> None:
+        try:
+            payload = json.loads(body or b"{}")
+        except ValueError:
+            raise HTTPError(400, "Body must be JSON.") from None
+        message = payload.get("message") if isinstance(payload, dict) else None
+        if not isinstance(message, str) or not message.strip():
+            raise HTTPError(400, "A non-empty 'message' string is required.")
+        thread_id = payload.get("thread_id")
+        if thread_id is not None:
+            if not self.threads:
+                raise HTTPError(400, "Conversation threads are not enabled on this service.")
+            if not isinstance(thread_id, str) or not thread_id:
+                raise HTTPError(400, "'thread_id' must be a non-empty string.")
+
+        peer = writer.get_extra_info("peername")
+        client_id = peer[0] if peer else "unknown"
+        if self.trust_client_id:
+            client_id = headers.get("x-client-id") or client_id
+
+        async with self.admission.admit(client_id):
+            async with self.pool.checkout() as agent:
+                await self._stream_until_disconnect(
+                    reader, self._stream_answer(writer, agent, message, thread_id)
+                )
+
+    @staticmethod
+    async def _wait_for_disconnect(reader: asyncio.StreamReader) -> None:
+        """Return once the client has closed its side of the connection."""
+        with suppress(ConnectionError):
+            # The request has been read; anything more (e.g. a pipelined
+            # request on this Connection: close stream) is discarded
+            while await reader.read(4096):
+                pass
+
+    async def _stream_until_disconnect(
+        self, reader: asyncio.StreamReader, stream: Coroutine[Any, Any, None]
+    ) -> None:
+        """
+        Run a stream, cancelling it if the client disconnects first.
+
+        Raises:
+            ConnectionError: If the client went away before the stream finished.
+        """
+        stream_task = asyncio.ensure_future(stream)
+        watcher = asyncio.ensure_future(self._wait_for_disconnect(reader))
+        try:
+            await asyncio.wait({stream_task, watcher}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            # Also reached when this handler itself is cancelled (shutdown)
+            watcher.cancel()
+            if not stream_task.done():
+                stream_task.cancel()
+                with suppress(asyncio.CancelledError):
+                    await stream_task
+        if stream_task.cancelled():
+            raise ConnectionError("Client disconnected during the stream.")
+        stream_task.result()
+
+    @staticmethod
+    async def _stream_answer(
+        writer: asyncio.StreamWriter, agent: Any, message: str, thread_id: Optional[str]
+    ) -> None:
+        """Run the agent and write its screened token stream as SSE events."""
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: text/event-stream; charset=utf-8\r\n"
+            b"Cache-Control: no-cache\r\n"
+            b"Connection: close\r\n\r\n"
+        )
+        await writer.drain()
+
+        config = {"configurable": {"thread_id": thread_id}} if thread_id else None
+        stop_reason = None
+        try:
+            # aclosing() cancels the agent run if the client goes away mid-stream
+            steps = agent.astream({"messages": message}, config, stream_mode="messages")
+            async with aclosing(steps):
+                async for step_message, metadata in steps:
+                    stop_reason = (metadata or {}).get("stop_reason", stop_reason)
+                    event = step_event(step_message, metadata or {})
+                    if event is not None:
+                        writer.write(event)
+                        await writer.drain()
+        except ConnectionError:
+            raise
+        except Exception as e:
+            # Headers are already sent, so the failure is reported in the stream
+            logger.error(f"Agent stream failed: {e}")
+            writer.write(sse_event("error", {"error": "Agent run failed."}))
+            stop_reason = "error"
+
+        writer.write(sse_event("done", {"stop_reason": stop_reason}))
+        await writer.drain()
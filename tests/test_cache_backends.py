@@ -0,0 +1,52 @@
+"""
+Cache Backend Unit Tests
+
+Offline checks for the LRU/TTL cache backends shared by the tool and LLM caches.
+
+Author: Limon Halder
+"""
+
+import os
+import sys
+import time
+
+import pytest
+
+# Setup sys.path to import modules from parent directory
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from orchestrator.cache_backends import InMemoryCache, SQLiteCache
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_cache(request, tmp_path):
+    def factory(**kwargs):
+        if request.param == "memory":
+            return InMemoryCache(**kwargs)
+        return SQLiteCache(str(tmp_path / "cache.db"), **kwargs)
+
+    return factory
+
+
+def test_lru_eviction_keeps_recently_used(make_cache) -> None:
+    cache = make_cache(max_entries=2, ttl_seconds=None)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    assert cache.get("a") == "1"
+    cache.set("c", "3")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "1" and cache.get("c") == "3"
+    assert cache.stats["evictions"] == 1
+
+
+def test_ttl_expiry_and_hit_rate(make_cache) -> None:
+    cache = make_cache(ttl_seconds=0.05)
+    cache.set("q", "answer")
+    assert cache.get("q") == "answer"
+    time.sleep(0.1)
+    assert cache.get("q") is None
+
+    stats = cache.stats
+    assert (stats["hits"], stats["misses"], stats["expirations"]) == (1, 1, 1)
+    assert stats["hit_rate"] == 0.5
@@ -0,0 +1,132 @@
+"""
+Cached Tool Unit Tests
+
+Offline checks that CachedTool normalizes queries into one cache key, serves
+hits without calling the wrapped tool, expires entries and never caches errors.
+
+Author: Limon Halder
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, List
+
+import pytest
+
+# Setup sys.path to import modules from parent directory
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks.fakes import FakeSearchTool
+import orchestrator.agent_factory as agent_factory
+from orchestrator.cache_backends import CacheBackend, InMemoryCache, SQLiteCache
+from orchestrator.cached_tool import CachedTool, make_tool_cache_key
+
+
+class FlakySearchTool(FakeSearchTool):
+    """A search tool returning the queued outcomes first (dicts, or exceptions to raise)."""
+
+    outcomes: List[Any] = []
+
+    def _results(self, query: str) -> Dict[str, Any]:
+        if self.outcomes:
+            self.call_count += 1
+            outcome = self.outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+        return super()._results(query)
+
+
+def test_cache_backend_is_abstract() -> None:
+    with pytest.raises(TypeError):
+        CacheBackend()
+
+
+def test_query_normalization_shares_one_key() -> None:
+    key = make_tool_cache_key("tavily_search", {"query": "Weather in  Dhaka "})
+    assert key == make_tool_cache_key("tavily_search", {"query": "weather in dhaka"})
+    assert key == make_tool_cache_key("tavily_search", {"query": "weather in dhaka", "topic": None})
+    assert key != make_tool_cache_key("tavily_search", {"query": "weather in Paris"})
+    assert key != make_tool_cache_key("other_search", {"query": "weather in dhaka"})
+
+
+def test_hit_skips_the_wrapped_tool() -> None:
+    inner = FakeSearchTool()
+    tool = CachedTool(inner, InMemoryCache())
+
+    first = tool.invoke({"query": "Weather in Dhaka"})
+    second = tool.invoke({"query": "weather in  dhaka"})
+
+    assert inner.call_count == 1
+    assert second == first
+    assert tool.stats["hits"] == 1
+
+
+def test_entries_expire_after_ttl() -> None:
+    inner = FakeSearchTool()
+    tool = CachedTool(inner, InMemoryCache(ttl_seconds=0.05))
+
+    tool.invoke({"query": "weather"})
+    time.sleep(0.1)
+    tool.invoke({"query": "weather"})
+
+    assert inner.call_count == 2
+    assert tool.stats["expirations"] == 1
+
+
+def test_errors_are_not_cached() -> None:
+    inner = FlakySearchTool(outcomes=[{"error": "rate limited"}, RuntimeError("network down")])
+    tool = CachedTool(inner, InMemoryCache())
+
+    assert tool.invoke({"query": "weather"}) == {"error": "rate limited"}
+    with pytest.raises(RuntimeError):
+        tool.invoke({"query": "weather"})
+    result = tool.invoke({"query": "weather"})
+    assert result["results"]
+    assert tool.invoke({"query": "weather"}) == result
+
+    assert inner.call_count == 3
+
+
+class ThreadRecordingCache(InMemoryCache):
+    """Remembers the threads its lookups and stores ran on."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.threads: List[int] = []
+
+    def get(self, key: str):
+        self.threads.append(threading.get_ident())
+        return super().get(key)
+
+    def set(self, key: str, value: str) -> None:
+        self.threads.append(threading.get_ident())
+        super().set(key, value)
+
+
+def test_async_calls_keep_the_backend_off_the_event_loop() -> None:
+    cache = ThreadRecordingCache()
+    tool = CachedTool(FakeSearchTool(), cache)
+
+    async def search_twice() -> int:
+        await tool.ainvoke({"query": "weather"})
+        await tool.ainvoke({"query": "weather"})
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(search_twice())
+    assert len(cache.threads) == 3  # miss, store, hit
+    assert loop_thread not in cache.threads
+
+
+def test_factory_opens_the_tool_cache_from_env(tmp_path, monkeypatch) -> None:
+    monkeypatch.delenv("TOOL_CACHE_PATH", raising=False)
+    assert agent_factory._cache_from_env("TOOL", "tool_cache") is None
+
+    monkeypatch.setenv("TOOL_CACHE_PATH", str(tmp_path / "tools.db"))
+    monkeypatch.setenv("TOOL_CACHE_TTL", "60")
+    cache = agent_factory._cache_from_env("TOOL", "tool_cache")
+    assert isinstance(cache, SQLiteCache)
+    assert cache.ttl_seconds == 60 and cache.table == "tool_cache"
@@ -0,0 +1,81 @@
+"""
+SQLite Checkpointer Unit Tests
+
+Offline checks that conversations persist across agent instances, that
+messages are stored once per thread, and that idle threads are pruned.
+
+Author: Limon Halder
+"""
+
+import asyncio
+import os
+import sqlite3
+import sys
+import time
+
+import pytest
+
+# Setup sys.path to import modules from parent directory
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks.fakes import FakeSearchTool, ScriptedChatModel
+from orchestrator.agent_builder import build_agent
+from orchestrator.checkpointer import SQLiteCheckpointSaver
+from orchestrator.llm_node import LLMNode
+
+
+def make_agent(path: str, compress: bool = True):
+    search_tool = FakeSearchTool(result_chars=2000)
+    llm = ScriptedChatModel().bind_tools([search_tool])
+    saver = SQLiteCheckpointSaver(path, compress=compress)
+    return build_agent(LLMNode(llm), search_tool, checkpointer=saver), saver
+
+
+@pytest.mark.parametrize("compress", [True, False])
+def test_resumed_thread_only_needs_the_new_message(tmp_path, compress) -> None:
+    path = str(tmp_path / "threads.db")
+    config = {"configurable": {"thread_id": "user-42"}}
+
+    agent, _ = make_agent(path, compress)
+    agent.invoke({"messages": "weather in Dhaka"}, config)
+
+    # A fresh process (new agent and saver on the same file) continues the thread
+    agent, saver = make_agent(path, compress)
+    state = asyncio.run(agent.ainvoke({"messages": "and in Paris?"}, config))
+
+    contents = [m.content for m in state["messages"]]
+    assert contents[0] == "weather in Dhaka"
+    assert "and in Paris?" in contents
+    assert len(contents) == 8
+
+    # Every message is stored exactly once, however many checkpoints list it
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0] == 8
+    assert len(list(saver.list(config))) > 8
+
+
+def test_prune_idle_threads(tmp_path) -> None:
+    agent, saver = make_agent(str(tmp_path / "threads.db"))
+    config = {"configurable": {"thread_id": "old"}}
+    agent.invoke({"messages": "weather in Dhaka"}, config)
+
+    assert saver.prune_idle_threads(max_idle_seconds=3600) == 0
+    assert saver.prune_idle_threads(max_idle_seconds=0) == 1
+    assert saver.get_tuple(config) is None
+
+
+def test_idle_threads_are_pruned_on_write(tmp_path) -> None:
+    search_tool = FakeSearchTool()
+    saver = SQLiteCheckpointSaver(
+        str(tmp_path / "threads.db"), max_idle_seconds=0.2, prune_interval=0
+    )
+    llm = ScriptedChatModel().bind_tools([search_tool])
+    agent = build_agent(LLMNode(llm), search_tool, checkpointer=saver)
+    old, new = ({"configurable": {"thread_id": name}} for name in ("old", "new"))
+
+    agent.invoke({"messages": "weather in Dhaka"}, old)
+    time.sleep(0.3)
+    agent.invoke({"messages": "weather in Paris"}, new)
+
+    assert saver.get_tuple(old) is None
+    assert saver.get_tuple(new) is not None
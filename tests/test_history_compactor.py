@@ -0,0 +1,81 @@
+"""
+History Compactor Unit Tests
+
+Offline checks that history compaction keeps prompts under the token budget
+without breaking tool-call pairing, touching recent turns or removing
+anything from the stored history.
+
+Author: Limon Halder
+"""
+
+import os
+import sys
+
+# Setup sys.path to import modules from parent directory
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+from benchmarks.fakes import FakeSearchTool, ScriptedChatModel
+from orchestrator.agent_builder import build_agent
+from orchestrator.history_compactor import COMPACTED_MARKER, HistoryCompactor, estimate_tokens
+from orchestrator.llm_node import LLMNode
+
+
+def make_turn(index: int, tool_chars: int) -> list:
+    call = {"name": "tavily_search", "args": {"query": f"q{index}"}, "id": f"call-{index}"}
+    return [
+        HumanMessage(content=f"question {index}", id=f"h{index}"),
+        AIMessage(content="", tool_calls=[call], id=f"a{index}"),
+        ToolMessage(content="x" * tool_chars, tool_call_id=f"call-{index}", id=f"t{index}"),
+        AIMessage(content=f"answer {index}", id=f"r{index}"),
+    ]
+
+
+def test_compaction_truncates_then_drops_old_turns() -> None:
+    history = [SystemMessage(content="be safe", id="sys")]
+    for index in range(4):
+        history.extend(make_turn(index, tool_chars=8000))
+
+    original = [m.model_copy() for m in history]
+    compactor = HistoryCompactor(max_tokens=4500, keep_recent_turns=1, tool_output_max_chars=500)
+    result = compactor(history)
+
+    assert history == original  # Only the prompt copy is compacted
+    assert estimate_tokens(result) <= 4500
+    ids = [m.id for m in result]
+    assert ids[0] == "sys"
+    # The latest turn is untouched
+    assert result[-4:] == history[-4:]
+    # Tool calls keep their results: no orphaned AI tool call or tool message
+    call_ids = {c["id"] for m in result if isinstance(m, AIMessage) for c in m.tool_calls}
+    result_ids = {m.tool_call_id for m in result if isinstance(m, ToolMessage)}
+    assert call_ids == result_ids
+    assert any(COMPACTED_MARKER in m.content for m in result if isinstance(m, ToolMessage))
+
+
+def test_compaction_is_a_no_op_under_budget() -> None:
+    history = make_turn(0, tool_chars=100)
+    assert HistoryCompactor(max_tokens=1000)(history) is history
+
+
+def test_agent_with_compactor_bounds_llm_prompt() -> None:
+    search_tool = FakeSearchTool(result_count=2, result_chars=1500)
+    agent = build_agent(
+        LLMNode(ScriptedChatModel().bind_tools([search_tool])),
+        search_tool,
+        compactor=HistoryCompactor(max_tokens=1500, keep_recent_turns=1),
+    )
+
+    messages = []
+    for index in range(6):
+        state = agent.invoke({"messages": messages + [HumanMessage(content=f"weather {index}")]})
+        messages = state["messages"]
+
+    # Every prompt the model saw (reported as input tokens) stayed in budget
+    prompt_sizes = [m.usage_metadata["input_tokens"] for m in messages if isinstance(m, AIMessage)]
+    assert prompt_sizes and max(prompt_sizes) <= 1500
+    # The stored history still holds every turn and full tool outputs
+    assert messages[0].content == "weather 0"
+    assert sum(isinstance(m, HumanMessage) for m in messages) == 6
+    assert not any(COMPACTED_MARKER in m.content for m in messages if isinstance(m, ToolMessage))
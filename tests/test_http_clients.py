@@ -0,0 +1,112 @@
+"""
+HTTP Client Registry Unit Tests
+
+Checks against a local HTTP server that provider requests reuse pooled
+connections across searches and event loops, and that the LLM and tool
+factories are wired to the shared clients.
+
+Author: Limon Halder
+"""
+
+import asyncio
+import inspect
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Setup sys.path to import modules from parent directory
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from orchestrator.http_clients import HTTPClientRegistry
+from orchestrator.pooled_tavily import PooledTavilySearchAPIWrapper
+from orchestrator.llm_initializer import init_llm
+from orchestrator.tool_initializer import init_search_tool
+
+
+class SearchHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive
+
+    def do_POST(self) -> None:
+        query = json.loads(self.rfile.read(int(self.headers["Content-Length"])))["query"]
+        body = json.dumps(
+            {"query": query, "results": [{"title": query, "url": "https://example.com", "content": "sunny"}]}
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def test_searches_reuse_pooled_connections(monkeypatch) -> None:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SearchHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setenv("TAVILY_API_KEY", "test-key")
+    registry = HTTPClientRegistry(max_connections=4)
+    try:
+        search_tool = init_search_tool(http_clients=registry)
+        search_tool.api_wrapper.api_base_url = f"http://127.0.0.1:{server.server_port}"
+
+        for city in ("Dhaka", "Paris", "Lima"):
+            assert search_tool.invoke({"query": city})["results"][0]["title"] == city
+        stats = registry.stats()["tavily"]
+        assert stats["requests"] == 3 and stats["connects"] == 1 and stats["idle"] == 1
+
+        # Each event loop gets its own pool, so repeated asyncio.run calls work
+        for _ in range(2):
+            result = asyncio.run(search_tool.ainvoke({"query": "Tokyo"}))
+            assert result["results"][0]["title"] == "Tokyo"
+        assert registry.stats()["tavily"]["requests"] == 5
+    finally:
+        registry.close()
+        server.shutdown()
+        server.server_close()
+
+
+def test_llm_and_tool_share_registry_clients(monkeypatch) -> None:
+    monkeypatch.setenv("TAVILY_API_KEY", "test-key")
+    monkeypatch.setenv("GROQ_API_KEY", "test-key")
+    registry = HTTPClientRegistry()
+
+    llm = init_llm(http_clients=registry)
+    assert llm.http_client is registry.client("groq")
+    assert llm.http_async_client is registry.async_client("groq")
+
+    first = init_search_tool(http_clients=registry)
+    second = init_search_tool(http_clients=registry)
+    assert first.api_wrapper.http_client is second.api_wrapper.http_client
+    assert first.api_wrapper.http_client is registry.client("tavily")
+    registry.close()
+
+
+def test_pooled_search_request_matches_upstream(monkeypatch) -> None:
+    import langchain_tavily._utilities as tavily_utilities
+
+    sent = {}
+
+    class Response:
+        status_code = 200
+
+        @staticmethod
+        def json() -> dict:
+            return {}
+
+    def fake_post(url: str, json: dict, headers: dict, **kwargs) -> Response:
+        sent.update(url=url, json=json, headers=headers)
+        return Response()
+
+    monkeypatch.setattr(tavily_utilities.requests, "post", fake_post)
+    wrapper = PooledTavilySearchAPIWrapper(tavily_api_key="test-key")
+
+    # Every parameter upstream names, as TavilySearch passes them (unset ones as None)
+    names = list(inspect.signature(tavily_utilities.TavilySearchAPIWrapper.raw_results).parameters)
+    kwargs = {name: None for name in names if name not in ("self", "query", "kwargs")}
+    kwargs.update(max_results=3, search_depth="advanced", include_domains=["example.com"], topic="news")
+
+    tavily_utilities.TavilySearchAPIWrapper.raw_results(wrapper, "weather in Dhaka", **kwargs)
+    assert wrapper._request("weather in Dhaka", kwargs) == sent
@@ -0,0 +1,124 @@
+"""
+LLM Response Cache Unit Tests
+
+Offline checks for the LLM cache keys, the (de)serialization of cached
+responses, and cache hits through LLMNode.
+
+Author: Limon Halder
+"""
+
+import asyncio
+import os
+import sys
+import threading
+
+# Setup sys.path to import modules from parent directory
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from benchmarks.fakes import FakeSearchTool, ScriptedChatModel
+import orchestrator.agent_factory as agent_factory
+from orchestrator.cache_backends import InMemoryCache, SQLiteCache
+from orchestrator.llm_cache import deserialize_response, make_llm_cache_key, serialize_response
+from orchestrator.llm_node import LLMNode
+
+
+def conversation(run: str) -> list:
+    """The same conversation as produced by two different runs."""
+    return [
+        HumanMessage(content="weather in Dhaka?", id=f"{run}-1"),
+        AIMessage(
+            content="",
+            id=f"{run}-2",
+            tool_calls=[{"name": "tavily_search", "args": {"query": "Dhaka"}, "id": f"{run}-call"}],
+            response_metadata={"model_name": "llama3", "request_id": run},
+            usage_metadata={"input_tokens": 10, "output_tokens": 5, "total_tokens": 15},
+        ),
+        ToolMessage(content="Sunny", tool_call_id=f"{run}-call", id=f"{run}-3"),
+    ]
+
+
+def test_key_ignores_message_ids_and_volatile_metadata() -> None:
+    llm = ScriptedChatModel()
+    assert make_llm_cache_key(llm, conversation("a")) == make_llm_cache_key(llm, conversation("b"))
+
+    changed = conversation("a")
+    changed[-1] = ToolMessage(content="Rainy", tool_call_id="a-call")
+    assert make_llm_cache_key(llm, changed) != make_llm_cache_key(llm, conversation("a"))
+
+
+def test_key_covers_bound_tools_and_model_params() -> None:
+    messages = conversation("a")
+    model = ScriptedChatModel()
+    keys = {
+        make_llm_cache_key(model, messages),
+        make_llm_cache_key(model.bind_tools([FakeSearchTool()]), messages),
+        make_llm_cache_key(model.bind_tools([FakeSearchTool(name="other_search")]), messages),
+        make_llm_cache_key(ScriptedChatModel(answer_prefix="Answer"), messages),
+    }
+    assert len(keys) == 4
+
+
+def test_response_round_trip_keeps_tool_calls_and_usage() -> None:
+    response = conversation("a")[1]
+    restored = deserialize_response(serialize_response(response))
+
+    assert isinstance(restored, AIMessage)
+    assert restored.tool_calls == response.tool_calls
+    assert restored.usage_metadata == response.usage_metadata
+    assert restored.id is None  # The graph assigns a fresh id
+
+
+def test_sqlite_cache_hit_skips_the_model(tmp_path) -> None:
+    model = ScriptedChatModel()
+    search_tool = FakeSearchTool()
+    cache = SQLiteCache(str(tmp_path / "llm.db"))
+    node = LLMNode(model.bind_tools([search_tool]), cache=cache)
+    state = {"messages": [HumanMessage(content="weather in Dhaka?")]}
+
+    first = node(state)["messages"][0]
+    second = node(state)["messages"][0]
+
+    assert model.call_count == 1
+    assert second.tool_calls == first.tool_calls
+    assert node.cache_stats["hits"] == 1
+
+
+class ThreadRecordingCache(InMemoryCache):
+    """Remembers the threads its lookups and stores ran on."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.threads: list = []
+
+    def get(self, key: str):
+        self.threads.append(threading.get_ident())
+        return super().get(key)
+
+    def set(self, key: str, value: str) -> None:
+        self.threads.append(threading.get_ident())
+        super().set(key, value)
+
+
+def test_async_node_keeps_the_cache_off_the_event_loop() -> None:
+    model = ScriptedChatModel()
+    cache = ThreadRecordingCache()
+    node = LLMNode(model, cache=cache)
+    state = {"messages": [HumanMessage(content="weather in Dhaka?")]}
+
+    async def ask_twice() -> int:
+        await node.ainvoke(state)
+        await node.ainvoke(state)
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(ask_twice())
+    assert model.call_count == 1
+    assert len(cache.threads) == 3  # miss, store, hit
+    assert loop_thread not in cache.threads
+
+
+def test_factory_opens_the_llm_cache_from_env(tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv("LLM_CACHE_PATH", str(tmp_path / "cache.db"))
+    cache = agent_factory._cache_from_env("LLM", "llm_cache")
+    assert isinstance(cache, SQLiteCache) and cache.table == "llm_cache"
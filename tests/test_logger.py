@@ -0,0 +1,81 @@
+"""
+Security Logger Unit Tests
+
+Offline checks that queued records capture their payload when they are
+logged, and that records logged after or during shutdown are still written.
+
+Author: Limon Halder
+"""
+
+import logging
+import os
+import queue
+import sys
+from logging.handlers import QueueListener
+
+# Setup sys.path to import modules from parent directory
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import logger.logger as security_logger
+
+
+def make_record(payload) -> logging.LogRecord:
+    record = logging.LogRecord("SecurityLogger", logging.INFO, __file__, 1, "Input", None, None)
+    record.payload = payload
+    return record
+
+
+def test_prepare_snapshots_mutable_payloads() -> None:
+    messages = [{"role": "user", "content": "hi"}]
+    record = security_logger.queue_handler.prepare(make_record(messages))
+    messages.append({"role": "assistant", "content": "later"})
+
+    assert record.payload == "[{'role': 'user', 'content': 'hi'}]"
+    assert "later" not in security_logger.formatter.format(record)
+
+
+class CaptureHandler(logging.Handler):
+    def __init__(self) -> None:
+        super().__init__()
+        self.written = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.written.append(record)
+
+
+def test_records_after_shutdown_are_written(monkeypatch) -> None:
+    capture = CaptureHandler()
+    written = capture.written
+
+    monkeypatch.setattr(security_logger, "_listener_stopped", True)
+    monkeypatch.setattr(security_logger, "file_handler", capture)
+    dropped = security_logger.queue_handler.dropped
+
+    security_logger.log_input("late record")
+
+    assert [record.payload for record in written] == ["late record"]
+    assert security_logger.queue_handler.dropped == dropped
+
+
+def test_record_queued_while_shutdown_drains_is_written(monkeypatch) -> None:
+    class RacingQueue(queue.Queue):
+        """Lets shutdown finish between the handler's checks and its put."""
+
+        def put_nowait(self, item) -> None:
+            if isinstance(item, logging.LogRecord):
+                security_logger.shutdown_logging()
+            super().put_nowait(item)
+
+    capture = CaptureHandler()
+    racing_queue = RacingQueue()
+    monkeypatch.setattr(security_logger, "log_queue", racing_queue)
+    monkeypatch.setattr(security_logger.queue_handler, "queue", racing_queue)
+    monkeypatch.setattr(security_logger, "listener", QueueListener(racing_queue, capture))
+    monkeypatch.setattr(security_logger, "file_handler", capture)
+    monkeypatch.setattr(security_logger, "_listener_started", False)
+    monkeypatch.setattr(security_logger, "_listener_stopped", False)
+
+    security_logger.log_input("racing record")
+
+    assert [record.payload for record in capture.written] == ["racing record"]
+    assert racing_queue.empty()
@@ -0,0 +1,119 @@
+"""
+Parallel Tool Node Unit Tests
+
+Offline checks that tool calls from one LLM response run concurrently, that
+duplicates are merged, and that slow calls time out with an error message.
+
+Author: Limon Halder
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+# Setup sys.path to import modules from parent directory
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from langchain_core.messages import AIMessage
+
+from benchmarks.fakes import FakeSearchTool
+from logger.metrics import METRICS, TOOL_CALLS
+from orchestrator.parallel_tool_node import ParallelToolNode
+
+
+def tool_call_state(*queries: str) -> dict:
+    calls = [
+        {"name": "tavily_search", "args": {"query": query}, "id": f"call-{i}"}
+        for i, query in enumerate(queries)
+    ]
+    return {"messages": [AIMessage(content="", tool_calls=calls)]}
+
+
+def test_calls_run_concurrently_and_duplicates_are_merged() -> None:
+    tool = FakeSearchTool(latency=0.2)
+    node = ParallelToolNode([tool])
+    state = tool_call_state("weather Dhaka", "weather Paris", "weather Dhaka", "Weather  dhaka")
+
+    start = time.perf_counter()
+    result = node(state)["messages"]
+    elapsed = time.perf_counter() - start
+
+    # Only the exact duplicate is merged; the case/whitespace variant still runs
+    assert tool.call_count == 3
+    assert elapsed < 0.5
+    assert [m.tool_call_id for m in result] == ["call-0", "call-1", "call-2", "call-3"]
+    assert result[0].content == result[2].content
+    assert all(m.status == "success" for m in result)
+
+
+def test_slow_call_times_out_with_error_message() -> None:
+    node = ParallelToolNode([FakeSearchTool(latency=1.0)], timeout=0.1)
+
+    start = time.perf_counter()
+    result = node(tool_call_state("weather Dhaka"))["messages"]
+
+    assert time.perf_counter() - start < 0.5
+    assert result[0].status == "error"
+    assert "timed out" in result[0].content
+
+
+def test_async_path_merges_limits_and_times_out() -> None:
+    tool = FakeSearchTool(latency=0.2)
+    node = ParallelToolNode([tool], max_concurrency_per_tool=1, timeout=0.3)
+    state = tool_call_state("weather Dhaka", "weather Dhaka", "weather Paris")
+
+    result = asyncio.run(node.ainvoke(state))["messages"]
+
+    # One call per tool at a time: the second distinct query misses the deadline
+    assert tool.call_count == 1
+    assert [m.status for m in result] == ["success", "success", "error"]
+
+
+def test_unknown_tool_returns_error_message() -> None:
+    state = {"messages": [AIMessage(content="", tool_calls=[{"name": "nope", "args": {}, "id": "x"}])]}
+    result = ParallelToolNode([FakeSearchTool()])(state)["messages"]
+    assert result[0].status == "error"
+    assert "tavily_search" in result[0].content
+
+
+def test_hung_call_does_not_stall_the_next_run() -> None:
+    tool = FakeSearchTool(latency=0.5)
+    node = ParallelToolNode([tool], timeout=0.1, max_concurrency_per_tool=1)
+
+    first = node(tool_call_state("weather Dhaka"))["messages"]
+    assert "timed out" in first[0].content
+    assert node.abandoned_calls == {"tavily_search": 1}
+
+    # The hung call still holds the tool's only slot: refuse instead of queueing
+    start = time.perf_counter()
+    second = node(tool_call_state("weather Paris"))["messages"]
+    assert time.perf_counter() - start < 0.05
+    assert second[0].status == "error"
+    assert "unavailable" in second[0].content
+
+    time.sleep(0.5)
+    tool.latency = 0.0
+    third = node(tool_call_state("weather Tokyo"))["messages"]
+    assert node.abandoned_calls == {}
+    assert third[0].status == "success"
+
+
+def test_tool_call_metric_labels_stay_bounded_and_escaped() -> None:
+    METRICS.reset()
+    calls = [
+        {"name": "tavily_search", "args": {"query": "Dhaka"}, "id": "call-0"},
+        {"name": 'a"b\nc', "args": {}, "id": "call-1"},
+    ]
+    ParallelToolNode([FakeSearchTool()])({"messages": [AIMessage(content="", tool_calls=calls)]})
+
+    tools = {e["labels"]["tool"] for e in METRICS.snapshot()[TOOL_CALLS]}
+    assert tools == {"tavily_search", "unknown"}
+
+    METRICS.inc(TOOL_CALLS, tool='x\\y"z\nw')
+    exposition = METRICS.render_prometheus()
+    assert 'secure_agent_tool_calls_total{tool="x\\\\y\\"z\\nw"} 1' in exposition
+    assert all(
+        line.startswith("#") or line.startswith("secure_agent_")
+        for line in exposition.splitlines()
+    )
@@ -0,0 +1,87 @@
+"""
+Pattern Set Unit Tests
+
+Offline checks for versioned threat pattern sets: configurable paths, atomic
+reloads, mtime watching and on-disk snapshots.
+
+Author: Limon Halder
+"""
+
+import os
+import sys
+import time
+
+# Setup sys.path to import modules from parent directory
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import wrapper.pattern_set as pattern_set_module
+from wrapper.pattern_set import DEFAULT_PATTERNS_PATH, PatternStore
+
+RULES_V1 = 'Prompt Injection:\n  - "ignore.*instruction"\n'
+RULES_V2 = RULES_V1 + 'Data Exfiltration:\n  - "dump.*data"\n'
+
+
+def write_rules(path, content: str) -> None:
+    path.write_text(content, encoding="utf-8")
+    # Make sure the mtime/size stamp changes even on coarse-grained filesystems
+    stat = os.stat(path)
+    os.utime(path, (stat.st_atime, stat.st_mtime + 1))
+
+
+def test_default_path_does_not_depend_on_working_directory(tmp_path, monkeypatch) -> None:
+    monkeypatch.delenv("THREAT_PATTERNS_PATH", raising=False)
+    monkeypatch.chdir(tmp_path)
+    store = PatternStore(snapshot_dir="")
+    assert store.path == DEFAULT_PATTERNS_PATH
+    assert "Prompt Injection" in store.current.scanner.categories
+
+
+def test_reload_swaps_versions_and_keeps_set_on_invalid_file(tmp_path) -> None:
+    rules = tmp_path / "rules.yml"
+    write_rules(rules, RULES_V1)
+    store = PatternStore(str(rules), check_interval=0, snapshot_dir="")
+
+    first = store.current
+    assert first.scanner.scan("please dump the data") == []
+
+    write_rules(rules, RULES_V2)
+    second = store.reload()
+    assert second.version != first.version
+    assert second.scanner.scan("please dump the data") == ["Data Exfiltration"]
+    # The old set is untouched, so readers still holding it stay consistent
+    assert first.scanner.scan("please dump the data") == []
+
+    write_rules(rules, "- not a mapping\n")
+    assert store.reload() is second
+
+
+def test_changed_file_is_picked_up_in_background(tmp_path) -> None:
+    rules = tmp_path / "rules.yml"
+    write_rules(rules, RULES_V1)
+    store = PatternStore(str(rules), check_interval=0.01, snapshot_dir="")
+    first = store.current
+
+    write_rules(rules, RULES_V2)
+    time.sleep(0.02)
+    assert store.current is first  # The reader is not made to wait for the reload
+
+    deadline = time.monotonic() + 2
+    while store.current is first and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert "Data Exfiltration" in store.current.raw
+
+
+def test_snapshot_skips_parsing_on_next_start(tmp_path, monkeypatch) -> None:
+    rules = tmp_path / "rules.yml"
+    write_rules(rules, RULES_V2)
+    snapshots = tmp_path / "snapshots"
+    version = PatternStore(str(rules), check_interval=0, snapshot_dir=str(snapshots)).current.version
+    assert len(os.listdir(snapshots)) == 1
+
+    def fail(content):
+        raise AssertionError("rules were parsed instead of restored")
+
+    monkeypatch.setattr(pattern_set_module, "parse_threat_patterns", fail)
+    restored = PatternStore(str(rules), check_interval=0, snapshot_dir=str(snapshots)).current
+    assert restored.version == version
+    assert restored.scanner.scan("ignore all instructions") == ["Prompt Injection"]
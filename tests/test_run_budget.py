@@ -0,0 +1,90 @@
+"""
+Run Budget Unit Tests
+
+Offline checks that the wrapper's per-request deadline and step budget reach
+the graph nodes and end the stream with a partial result and a stop reason.
+
+Author: Limon Halder
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+
+# Setup sys.path to import modules from parent directory
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from benchmarks.fakes import FakeSearchTool, ScriptedChatModel
+from logger.metrics import METRICS, STOPPED_RUNS
+from orchestrator.agent_builder import build_agent
+from orchestrator.llm_node import LLMNode
+from wrapper.base_wrapper import STOPPED_MESSAGES, SecureAgentWrapper
+from wrapper.run_budget import STOP_DEADLINE, STOP_MAX_STEPS, DeadlineExceeded
+
+
+def budget_agent(model: ScriptedChatModel, search_tool: FakeSearchTool, **budget) -> SecureAgentWrapper:
+    agent = build_agent(LLMNode(model.bind_tools([search_tool])), search_tool)
+    return SecureAgentWrapper(agent, **budget)
+
+
+def test_deadline_cuts_slow_llm_and_keeps_partial_result() -> None:
+    METRICS.reset()
+    agent = budget_agent(ScriptedChatModel(latency=0.3), FakeSearchTool(), deadline_seconds=0.5)
+    config = {"configurable": {"thread_id": "t1"}}
+
+    start = time.time()
+    steps = list(agent.stream({"messages": "weather in Dhaka?"}, config, stream_mode="values"))
+    assert time.time() - start < 0.9
+    assert config == {"configurable": {"thread_id": "t1"}}  # Caller's config untouched
+
+    final = steps[-1]
+    assert final["stop_reason"] == STOP_DEADLINE
+    assert isinstance(final["messages"][-2], ToolMessage)  # The first round survived
+    assert final["messages"][-1]["content"] == STOPPED_MESSAGES[STOP_DEADLINE]
+    assert METRICS.snapshot()[STOPPED_RUNS] == [{"labels": {"reason": "deadline"}, "value": 1}]
+
+
+def test_async_deadline_cuts_slow_tool_call() -> None:
+    search_tool = FakeSearchTool(latency=5.0)
+    agent = budget_agent(ScriptedChatModel(), search_tool, deadline_seconds=0.3)
+
+    start = time.time()
+    final = asyncio.run(agent.ainvoke({"messages": "weather in Dhaka?"}))
+    assert time.time() - start < 1.0
+    assert final["stop_reason"] == STOP_DEADLINE
+    assert final["messages"][-2].tool_calls  # The tool round was cut off, not awaited
+
+
+def test_step_budget_stops_a_looping_model() -> None:
+    tool_call = {"name": "tavily_search", "args": {"query": "again"}, "id": "call_1"}
+    model = ScriptedChatModel(script=[AIMessage(content="", tool_calls=[tool_call])])
+    agent = budget_agent(model, FakeSearchTool(), max_steps=6)
+
+    steps = list(agent.stream({"messages": "hi"}, stream_mode="values"))
+    assert steps[-1]["stop_reason"] == STOP_MAX_STEPS
+    assert model.call_count == 3
+
+    message, metadata = list(agent.stream({"messages": "hi"}, stream_mode="messages"))[-1]
+    assert metadata == {"stop_reason": STOP_MAX_STEPS}
+    assert message["content"] == STOPPED_MESSAGES[STOP_MAX_STEPS]
+
+
+def test_sync_deadline_runs_llm_on_caller_thread() -> None:
+    node = LLMNode(ScriptedChatModel(latency=5.0))
+    config = {"configurable": {"deadline": time.time() + 0.2}}
+    threads = threading.active_count()
+
+    start = time.time()
+    try:
+        node({"messages": [HumanMessage(content="hi")]}, config)
+    except DeadlineExceeded as e:
+        assert e.node == "llm"
+    else:
+        raise AssertionError("expected DeadlineExceeded")
+
+    assert time.time() - start < 0.5  # Cut by the per-call timeout
+    assert threading.active_count() == threads  # No abandoned worker thread
@@ -0,0 +1,60 @@
+"""
+Startup Unit Tests
+
+Checks that importing the entry points stays cheap (no provider SDKs, no
+pattern compilation, no log file) and that the agent factory builds once.
+
+Author: Limon Halder
+"""
+
+import os
+import subprocess
+import sys
+
+# Setup sys.path to import modules from parent directory
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(REPO_ROOT)
+
+import orchestrator.agent_factory as agent_factory
+
+
+def test_importing_main_is_lazy(tmp_path) -> None:
+    log_path = tmp_path / "security.log"
+    code = (
+        "import sys, main, wrapper.threat_detector as td\n"
+        "heavy = ['langchain_groq', 'langchain_tavily', 'langgraph', 'yaml']\n"
+        "print([m for m in heavy if m in sys.modules], td.PATTERN_STORE._current is None)\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=REPO_ROOT,
+        env={**os.environ, "SECURITY_LOG_PATH": str(log_path)},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.strip() == "[] True"
+    assert not log_path.exists()
+
+
+def test_factory_builds_once_per_limiter(monkeypatch) -> None:
+    built = []
+
+    def fake_build(rate_limiter=None):
+        built.append(rate_limiter)
+        return object() if rate_limiter != "broken" else None
+
+    monkeypatch.setattr(agent_factory, "build_secure_agent", fake_build)
+    monkeypatch.setattr(agent_factory, "_secure_agents", {})
+
+    limiter = object()
+    first = agent_factory.get_secure_agent()
+    assert agent_factory.get_secure_agent() is first
+    assert agent_factory.get_secure_agent(limiter) is not first
+    assert agent_factory.get_secure_agent(limiter) is agent_factory.get_secure_agent(limiter)
+    assert len(built) == 2
+
+    # Failed builds are retried on the next call
+    assert agent_factory.get_secure_agent("broken") is None
+    assert agent_factory.get_secure_agent("broken") is None
+    assert len(built) == 4
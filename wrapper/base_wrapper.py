@@ -1,23 +1,90 @@
 """
 SecureAgentWrapper: A security wrapper for streaming LLM agents.
 
-This module provides a wrapper class for any agent supporting a `stream` method.
-It adds input/output logging, threat detection, and runtime tracking to enhance
+This module provides a wrapper class for any agent supporting a `stream` method
+(and `astream` for the async path). It adds input/output logging, threat detection, and runtime tracking to enhance
 security and observability in production environments.
 
+Both whole-step streams (`stream_mode="values"`) and token streams
+(`stream_mode="messages"`) are screened; token chunks are released as soon as
+the incremental scanner has cleared them (see `wrapper.stream_scanner`).
+
+An optional per-request deadline and step budget bound every run (see
+`wrapper.run_budget`); a run that hits either ends with a partial-result
+message instead of holding the caller until the graph finishes.
+
 Author: Limon Halder
 """
 
+import asyncio
+import contextvars
 import os
 import sys
 import time
-from typing import Any, Dict, Generator, List, Optional, Union
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import suppress
+from typing import (
+    Any,
+    AsyncGenerator,
+    AsyncIterator,
+    Dict,
+    Generator,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
 # Allow imports from parent directory
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
+from wrapper.stream_scanner import (
+    DEFAULT_MAX_HOLDBACK_CHARS,
+    DEFAULT_WINDOW_CHARS,
+    ChunkStreamScreen,
+)
+from wrapper.run_budget import (
+    DEADLINE_KEY,
+    STOP_DEADLINE,
+    STOP_MAX_STEPS,
+    DeadlineExceeded,
+    is_step_limit_error,
+    with_budget,
+)
 from wrapper.threat_detector import check_for_threats
-from logger.logger import logger, log_input, log_output, log_threat
+from logger.logger import (
+    logger,
+    log_input,
+    log_output,
+    log_threat,
+    request_context,
+    session_context,
+)
+from logger.metrics import BLOCKED_REQUESTS, METRICS, STAGE_SECONDS, STOPPED_RUNS, timed
+
+# Content of the system message that replaces a blocked input or output
+INPUT_BLOCKED_MESSAGE = "⚠️ Input blocked due to security concerns."
+OUTPUT_BLOCKED_MESSAGE = "⚠️ Output blocked due to security concerns."
+
+# Content of the system message that ends a run stopped by its budget
+STOPPED_MESSAGES = {
+    STOP_DEADLINE: "⚠️ The request ran out of time; the response may be incomplete.",
+    STOP_MAX_STEPS: "⚠️ The request reached its step limit; the response may be incomplete.",
+}
+
+# Marks an agent stream that ended before producing its first step
+_NO_STEP = object()
+
+# Threads that start sync agent streams while the input scan runs (speculative mode)
+_prefetch_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_prefetch_executor() -> ThreadPoolExecutor:
+    global _prefetch_executor
+    if _prefetch_executor is None:
+        _prefetch_executor = ThreadPoolExecutor(thread_name_prefix="agent-prefetch")
+    return _prefetch_executor
 
 
 def extract_text_from_messages(
@@ -52,6 +119,67 @@ def extract_text_from_messages(
     return str(messages)
 
 
+class ClearedMessageTracker:
+    """
+    Remembers which messages of a `values` stream have already passed the output scan.
+
+    With `stream_mode="values"` every step carries the whole conversation, so only
+    messages that were not cleared in an earlier step need to be joined, scanned
+    and logged. Messages are keyed by their `id` when they have one and by their
+    position otherwise; a message whose content object changed is scanned again.
+
+    The end of the previously cleared text (everything after its last newline)
+    is carried into the next scan, so patterns spanning a message boundary still
+    match. It is not capped: rules match anywhere within a line, and messages
+    are joined with spaces, so a conversation without newlines is carried whole.
+    """
+
+    def __init__(self) -> None:
+        self._contents: Dict[Any, Any] = {}
+        self._carry = ""
+
+    @staticmethod
+    def _key_and_content(index: int, msg: Any) -> Tuple[Any, Any]:
+        if isinstance(msg, dict):
+            return msg.get("id") or index, msg.get("content", msg)
+        return getattr(msg, "id", None) or index, getattr(msg, "content", msg)
+
+    def select_new(self, messages: List[Any]) -> List[Any]:
+        """
+        Return the messages that have not been cleared yet.
+
+        Args:
+            messages (List[Any]): The full message list of the current step.
+
+        Returns:
+            List[Any]: Messages that still need to be scanned, in order.
+        """
+        new_messages = []
+        for index, msg in enumerate(messages):
+            key, content = self._key_and_content(index, msg)
+            if key not in self._contents or self._contents[key] is not content:
+                new_messages.append(msg)
+        return new_messages
+
+    def scan_text(self, new_text: str) -> str:
+        """Prefix newly extracted text with the carried-over boundary context."""
+        return f"{self._carry} {new_text}" if self._carry else new_text
+
+    def mark_cleared(self, messages: List[Any], scanned_text: str) -> None:
+        """
+        Record the full message list of a step as cleared.
+
+        Args:
+            messages (List[Any]): The full message list that passed the scan.
+            scanned_text (str): The text that was scanned for this step.
+        """
+        for index, msg in enumerate(messages):
+            key, content = self._key_and_content(index, msg)
+            self._contents[key] = content
+        if scanned_text:
+            self._carry = scanned_text.rpartition("\n")[2]
+
+
 class SecureAgentWrapper:
     """
     A wrapper for secure, auditable streaming from an LLM-based agent.
@@ -63,17 +191,350 @@ class SecureAgentWrapper:
     - Yields safe output back to caller
 
     Attributes:
-        agent (Any): The underlying LLM agent that supports a `.stream()` method.
+        agent (Any): The underlying LLM agent that supports a `.stream()` method
+            and, for the async path, `.astream()`.
+        speculative_input_scan (bool): Whether the agent run starts while the
+            input is still being scanned.
+        chunk_window_chars (int): Cleared text carried into each chunk scan.
+        chunk_holdback_chars (int): Longest partial word held back in token streams.
+        deadline_seconds (Optional[float]): Wall-clock budget of each request.
+        max_steps (Optional[int]): Graph step budget of each request.
     """
 
-    def __init__(self, agent: Any):
+    def __init__(
+        self,
+        agent: Any,
+        speculative_input_scan: bool = False,
+        chunk_window_chars: int = DEFAULT_WINDOW_CHARS,
+        chunk_holdback_chars: int = DEFAULT_MAX_HOLDBACK_CHARS,
+        deadline_seconds: Optional[float] = None,
+        max_steps: Optional[int] = None,
+    ):
         """
         Initialize the SecureAgentWrapper.
 
         Args:
             agent (Any): An object that implements a `stream()` generator.
+            speculative_input_scan (bool): Start the agent run concurrently with the
+                input threat scan instead of after it. No output is released until
+                the scan passes, and the run is cancelled if the input is blocked,
+                so callers see the same results with a lower time-to-first-token.
+            chunk_window_chars (int): With `stream_mode="messages"`, how much of the
+                already released text of a message is rescanned with each new
+                chunk, so patterns spanning chunks still match.
+            chunk_holdback_chars (int): With `stream_mode="messages"`, the longest
+                partial word held back until the rest of the word arrives.
+            deadline_seconds (Optional[float]): Seconds each request may run. The
+                deadline is passed to the graph nodes through the run config, so
+                LLM and tool calls are cut short when it passes. None for no limit.
+            max_steps (Optional[int]): Most graph steps (node runs) per request,
+                applied as the LangGraph `recursion_limit`. None keeps the
+                graph's default.
         """
         self.agent = agent
+        self.speculative_input_scan = speculative_input_scan
+        self.chunk_window_chars = chunk_window_chars
+        self.chunk_holdback_chars = chunk_holdback_chars
+        self.deadline_seconds = deadline_seconds
+        self.max_steps = max_steps
+
+    @staticmethod
+    def _get_input_data(args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Any:
+        return kwargs.get("messages") or args[0].get("messages")
+
+    @staticmethod
+    def _get_session_id(args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Optional[str]:
+        """The checkpointer thread id of the run config, used as the session id."""
+        config = kwargs.get("config") or (args[1] if len(args) > 1 else None)
+        if not isinstance(config, dict):
+            return None
+        thread_id = (config.get("configurable") or {}).get("thread_id")
+        return str(thread_id) if thread_id is not None else None
+
+    def _apply_budget(
+        self, args: Tuple[Any, ...], kwargs: Dict[str, Any]
+    ) -> Tuple[Tuple[Any, ...], Dict[str, Any], Optional[float]]:
+        """
+        Put the request deadline and step budget into the run config.
+
+        Returns:
+            Tuple: The agent arguments with the new config (the caller's config is
+                not modified) and the deadline in epoch seconds (None if unset).
+        """
+        if self.deadline_seconds is None and self.max_steps is None:
+            return args, kwargs, None
+        deadline = None
+        if self.deadline_seconds is not None:
+            deadline = time.time() + self.deadline_seconds
+
+        if "config" in kwargs or len(args) < 2:
+            config = with_budget(kwargs.get("config"), deadline, self.max_steps)
+            kwargs = {**kwargs, "config": config}
+        else:
+            config = with_budget(args[1], deadline, self.max_steps)
+            args = (args[0], config, *args[2:])
+        # An earlier deadline already in the caller's config is kept
+        return args, kwargs, config.get("configurable", {}).get(DEADLINE_KEY)
+
+    @staticmethod
+    def _is_token_stream(kwargs: Dict[str, Any]) -> bool:
+        return kwargs.get("stream_mode") == "messages"
+
+    @staticmethod
+    def _blocked_step(content: str, token_stream: bool = False) -> Any:
+        message = {"role": "system", "content": content}
+        if token_stream:
+            # Same shape as the `(message, metadata)` steps of a token stream
+            return message, {}
+        return {"messages": [message]}
+
+    def _screen_input(self, input_data: Any, token_stream: bool = False) -> Optional[Any]:
+        """
+        Log and scan the request input.
+
+        Returns:
+            Optional[Any]: The step to yield if the input is blocked, else None.
+        """
+        with timed("log"):
+            log_input(input_data)
+
+        with timed("input_scan"):
+            is_safe = check_for_threats(input_data, stage="input")
+
+        if not is_safe:
+            METRICS.inc(BLOCKED_REQUESTS, stage="input")
+            log_threat("Blocked input due to threat detection", input_data, "input")
+            return self._blocked_step(INPUT_BLOCKED_MESSAGE, token_stream)
+        return None
+
+    def _screen_step(
+        self, step: Dict[str, Any], cleared: ClearedMessageTracker
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Log and scan the messages of one agent step that were not cleared before.
+
+        Returns:
+            Optional[Dict[str, Any]]: The step to yield if the output is blocked, else None.
+        """
+        output_data = step.get("messages")
+        if isinstance(output_data, list):
+            output_data = cleared.select_new(output_data)
+            output_text = cleared.scan_text(extract_text_from_messages(output_data))
+        else:
+            output_text = extract_text_from_messages(output_data)
+
+        with timed("log"):
+            log_output(output_data)
+
+        with timed("output_scan"):
+            is_safe = check_for_threats(output_text, stage="output")
+
+        if not is_safe:
+            METRICS.inc(BLOCKED_REQUESTS, stage="output")
+            log_threat("Blocked output due to threat detection", output_text, "output")
+            return self._blocked_step(OUTPUT_BLOCKED_MESSAGE)
+
+        if isinstance(step.get("messages"), list):
+            cleared.mark_cleared(step["messages"], output_text)
+        return None
+
+    def _screen_chunk(
+        self, step: Any, screen: ChunkStreamScreen, final: bool = False
+    ) -> Tuple[List[Any], Optional[Any]]:
+        """
+        Scan one step of a token stream, or flush the screen at the end of it.
+
+        Returns:
+            Tuple[List[Any], Optional[Any]]: Steps cleared for release, and the
+                step to yield if the output is blocked.
+        """
+        released, is_safe = screen.flush() if final else screen.push(step)
+        if not is_safe:
+            METRICS.inc(BLOCKED_REQUESTS, stage="output")
+            log_threat("Blocked output due to threat detection", screen.blocked_text, "output")
+            return [], self._blocked_step(OUTPUT_BLOCKED_MESSAGE, token_stream=True)
+        return released, None
+
+    def _new_chunk_screen(self) -> ChunkStreamScreen:
+        return ChunkStreamScreen(self.chunk_window_chars, self.chunk_holdback_chars)
+
+    @staticmethod
+    def _log_completion(start_time: float, message_count: int) -> None:
+        elapsed_time = time.time() - start_time
+        METRICS.observe(STAGE_SECONDS, elapsed_time, stage="stream")
+        logger.info(
+            f"Stream completed in {elapsed_time:.2f} seconds | "
+            f"Messages processed: {message_count}"
+        )
+
+    @staticmethod
+    def _stopped_step(
+        reason: str, last_step: Any, step_count: int, token_stream: bool = False
+    ) -> Any:
+        """
+        Record why a run stopped early and build the step that ends its stream.
+
+        In `values` mode the step repeats the last released state with the notice
+        appended, so callers that keep only the final step still get the partial
+        result.
+
+        Returns:
+            Any: The partial-result step, tagged with a `stop_reason`.
+        """
+        METRICS.inc(STOPPED_RUNS, reason=reason)
+        logger.warning(
+            f"Agent run stopped after {step_count} step(s): {reason} reached.",
+            extra={"event": "stopped", "stop_reason": reason},
+        )
+        message = {"role": "system", "content": STOPPED_MESSAGES[reason]}
+        if token_stream:
+            return message, {"stop_reason": reason}
+        step = dict(last_step) if isinstance(last_step, dict) else {}
+        step["messages"] = [*(step.get("messages") or []), message]
+        step["stop_reason"] = reason
+        return step
+
+    @staticmethod
+    def _bounded(steps: Iterator[Any], stop: List[str]) -> Generator[Any, None, None]:
+        """
+        Pass agent steps through, turning a budget stop into a reason in `stop`.
+
+        A sync node call cannot be interrupted from here, so the deadline is
+        enforced by the nodes themselves (they raise DeadlineExceeded).
+        """
+        try:
+            yield from steps
+        except DeadlineExceeded:
+            stop.append(STOP_DEADLINE)
+        except Exception as error:
+            if not is_step_limit_error(error):
+                raise
+            stop.append(STOP_MAX_STEPS)
+
+    @staticmethod
+    async def _abounded(
+        steps: AsyncIterator[Any], deadline: Optional[float], stop: List[str]
+    ) -> AsyncGenerator[Any, None]:
+        """
+        Async counterpart of `_bounded`.
+
+        Waiting for the next step is also cut off at the deadline, which cancels
+        the node running at that moment even if it does not check the deadline.
+        """
+        try:
+            while True:
+                timer = asyncio.timeout(None if deadline is None else deadline - time.time())
+                try:
+                    async with timer:
+                        step = await steps.__anext__()
+                except StopAsyncIteration:
+                    return
+                except TimeoutError:
+                    if not timer.expired():
+                        raise
+                    stop.append(STOP_DEADLINE)
+                    return
+                yield step
+        except DeadlineExceeded:
+            stop.append(STOP_DEADLINE)
+        except Exception as error:
+            if not is_step_limit_error(error):
+                raise
+            stop.append(STOP_MAX_STEPS)
+        finally:
+            await steps.aclose()
+
+    def _start_speculatively(
+        self, input_data: Any, args: Tuple[Any, ...], kwargs: Dict[str, Any]
+    ) -> Tuple[Optional[Iterator[Dict[str, Any]]], Optional[Dict[str, Any]]]:
+        """
+        Fetch the first agent step on a worker thread while the input is scanned.
+
+        A sync call that is already in flight cannot be interrupted; if the input
+        is blocked its result is discarded and the agent stream is closed as soon
+        as that call returns, without delaying the blocked response.
+
+        Returns:
+            Tuple: The agent steps (None if blocked) and the blocked step (if any).
+        """
+        steps = self.agent.stream(*args, **kwargs)
+        context = contextvars.copy_context()
+        prefetch = _get_prefetch_executor().submit(context.run, next, steps, _NO_STEP)
+
+        try:
+            blocked = self._screen_input(input_data, self._is_token_stream(kwargs))
+        except BaseException:
+            self._discard_prefetch(prefetch, steps)
+            raise
+
+        if blocked:
+            self._discard_prefetch(prefetch, steps)
+            return None, blocked
+        return self._resume_prefetched(prefetch, steps), None
+
+    @staticmethod
+    def _discard_prefetch(prefetch: "Future[Any]", steps: Iterator[Dict[str, Any]]) -> None:
+        prefetch.cancel()
+        prefetch.add_done_callback(lambda _: steps.close())
+
+    @staticmethod
+    def _resume_prefetched(
+        prefetch: "Future[Any]", steps: Iterator[Dict[str, Any]]
+    ) -> Generator[Dict[str, Any], None, None]:
+        first_step = prefetch.result()
+        if first_step is _NO_STEP:
+            return
+        yield first_step
+        yield from steps
+
+    async def _astart_speculatively(
+        self, input_data: Any, args: Tuple[Any, ...], kwargs: Dict[str, Any]
+    ) -> Tuple[Optional[AsyncIterator[Dict[str, Any]]], Optional[Dict[str, Any]]]:
+        """
+        Async counterpart of `_start_speculatively`.
+
+        The first agent step is awaited in its own task; if the input is blocked
+        that task is cancelled, which cancels the in-flight LLM or tool call.
+
+        Returns:
+            Tuple: The agent steps (None if blocked) and the blocked step (if any).
+        """
+        steps = self.agent.astream(*args, **kwargs)
+        prefetch = asyncio.ensure_future(steps.__anext__())
+
+        try:
+            blocked = await asyncio.to_thread(
+                self._screen_input, input_data, self._is_token_stream(kwargs)
+            )
+        except BaseException:
+            await self._adiscard_prefetch(prefetch, steps)
+            raise
+
+        if blocked:
+            await self._adiscard_prefetch(prefetch, steps)
+            return None, blocked
+        return self._aresume_prefetched(prefetch, steps), None
+
+    @staticmethod
+    async def _adiscard_prefetch(
+        prefetch: "asyncio.Future[Any]", steps: AsyncIterator[Dict[str, Any]]
+    ) -> None:
+        prefetch.cancel()
+        with suppress(asyncio.CancelledError, Exception):
+            await prefetch
+        await steps.aclose()
+
+    @staticmethod
+    async def _aresume_prefetched(
+        prefetch: "asyncio.Future[Any]", steps: AsyncIterator[Dict[str, Any]]
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        try:
+            first_step = await prefetch
+        except StopAsyncIteration:
+            return
+        yield first_step
+        async for step in steps:
+            yield step
 
     def stream(
         self, *args: Any, **kwargs: Any
@@ -89,57 +550,202 @@ class SecureAgentWrapper:
         Yields:
             Dict[str, Any]: A dictionary containing streaming message data from the agent.
         """
-        input_data = kwargs.get("messages") or args[0].get("messages")
-        log_input(input_data)
+        with request_context(), session_context(self._get_session_id(args, kwargs)):
+            yield from self._stream(*args, **kwargs)
 
-        if not check_for_threats(input_data, stage="input"):
-            log_threat("Blocked input due to threat detection", input_data, "input")
-            yield {
-                "messages": [
-                    {
-                        "role": "system",
-                        "content": "⚠️ Input blocked due to security concerns.",
-                    }
-                ]
-            }
+    def _stream(
+        self, *args: Any, **kwargs: Any
+    ) -> Generator[Dict[str, Any], None, None]:
+        """Run one stream; every record it logs carries the same request id."""
+        input_data = self._get_input_data(args, kwargs)
+        token_stream = self._is_token_stream(kwargs)
+        args, kwargs, _ = self._apply_budget(args, kwargs)
+        if self.speculative_input_scan:
+            steps, blocked = self._start_speculatively(input_data, args, kwargs)
+        else:
+            blocked = self._screen_input(input_data, token_stream)
+            steps = None if blocked else self.agent.stream(*args, **kwargs)
+
+        if blocked:
+            yield blocked
+            return
+
+        stop: List[str] = []
+        steps = self._bounded(steps, stop)
+        if token_stream:
+            yield from self._stream_chunks(steps, stop)
             return
 
         message_count = 0
         start_time = time.time()
+        cleared = ClearedMessageTracker()
+        last_step = None
 
         try:
-            for step in self.agent.stream(*args, **kwargs):
+            for step in steps:
                 message_count += 1
 
                 try:
-                    output_data = step.get("messages")
-                    output_text = extract_text_from_messages(output_data)
-
-                    log_output(output_data)
-
-                    if not check_for_threats(output_text, stage="output"):
-                        log_threat(
-                            "Blocked output due to threat detection",
-                            output_text,
-                            "output",
-                        )
-                        yield {
-                            "messages": [
-                                {
-                                    "role": "system",
-                                    "content": "⚠️ Output blocked due to security concerns.",
-                                }
-                            ]
-                        }
+                    blocked = self._screen_step(step, cleared)
+                    if blocked:
+                        yield blocked
                         return
 
+                    last_step = step
                     yield step
 
                 except Exception as yield_error:
                     logger.exception(f"Error during streaming yield: {yield_error}")
+
+            if stop:
+                yield self._stopped_step(stop[0], last_step, message_count)
         finally:
-            elapsed_time = time.time() - start_time
-            logger.info(
-                f"Stream completed in {elapsed_time:.2f} seconds | "
-                f"Messages processed: {message_count}"
-            )
+            self._log_completion(start_time, message_count)
+
+    def _stream_chunks(self, steps: Iterator[Any], stop: List[str]) -> Generator[Any, None, None]:
+        """Release the steps of a token stream as the scanner clears them."""
+        chunk_count = 0
+        start_time = time.time()
+        screen = self._new_chunk_screen()
+
+        try:
+            for step in steps:
+                chunk_count += 1
+                released, blocked = self._screen_chunk(step, screen)
+                yield from released
+                if blocked:
+                    yield blocked
+                    return
+
+            released, blocked = self._screen_chunk(None, screen, final=True)
+            yield from released
+            if blocked:
+                yield blocked
+            elif stop:
+                yield self._stopped_step(stop[0], None, chunk_count, token_stream=True)
+        finally:
+            self._log_completion(start_time, chunk_count)
+
+    async def astream(
+        self, *args: Any, **kwargs: Any
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        Async counterpart of `stream`, driven by the agent's `astream` method.
+
+        Threat scans and log calls run in worker threads, so the event loop keeps
+        serving other sessions while a step is being checked.
+
+        Args:
+            *args (Any): Positional arguments to pass to the agent's astream method.
+            **kwargs (Any): Keyword arguments, must include `messages` key or
+                pass messages as first arg.
+
+        Yields:
+            Dict[str, Any]: A dictionary containing streaming message data from the agent.
+        """
+        with request_context(), session_context(self._get_session_id(args, kwargs)):
+            async for step in self._astream(*args, **kwargs):
+                yield step
+
+    async def _astream(
+        self, *args: Any, **kwargs: Any
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """Run one async stream; every record it logs carries the same request id."""
+        input_data = self._get_input_data(args, kwargs)
+        token_stream = self._is_token_stream(kwargs)
+        args, kwargs, deadline = self._apply_budget(args, kwargs)
+        if self.speculative_input_scan:
+            steps, blocked = await self._astart_speculatively(input_data, args, kwargs)
+        else:
+            blocked = await asyncio.to_thread(self._screen_input, input_data, token_stream)
+            steps = None if blocked else self.agent.astream(*args, **kwargs)
+
+        if blocked:
+            yield blocked
+            return
+
+        stop: List[str] = []
+        steps = self._abounded(steps, deadline, stop)
+        if token_stream:
+            async for step in self._astream_chunks(steps, stop):
+                yield step
+            return
+
+        message_count = 0
+        start_time = time.time()
+        cleared = ClearedMessageTracker()
+        last_step = None
+
+        try:
+            async for step in steps:
+                message_count += 1
+
+                try:
+                    blocked = await asyncio.to_thread(self._screen_step, step, cleared)
+                    if blocked:
+                        yield blocked
+                        return
+
+                    last_step = step
+                    yield step
+
+                except Exception as yield_error:
+                    logger.exception(f"Error during streaming yield: {yield_error}")
+
+            if stop:
+                yield self._stopped_step(stop[0], last_step, message_count)
+        finally:
+            self._log_completion(start_time, message_count)
+
+    async def _astream_chunks(
+        self, steps: AsyncIterator[Any], stop: List[str]
+    ) -> AsyncGenerator[Any, None]:
+        """
+        Async counterpart of `_stream_chunks`.
+
+        Chunk scans cover at most the window plus one word, so they run inline:
+        a worker-thread hop per token would cost more than the scan itself.
+        """
+        chunk_count = 0
+        start_time = time.time()
+        screen = self._new_chunk_screen()
+
+        try:
+            async for step in steps:
+                chunk_count += 1
+                released, blocked = self._screen_chunk(step, screen)
+                for released_step in released:
+                    yield released_step
+                if blocked:
+                    yield blocked
+                    return
+
+            released, blocked = self._screen_chunk(None, screen, final=True)
+            for released_step in released:
+                yield released_step
+            if blocked:
+                yield blocked
+            elif stop:
+                yield self._stopped_step(stop[0], None, chunk_count, token_stream=True)
+        finally:
+            self._log_completion(start_time, chunk_count)
+
+    async def ainvoke(
+        self, input: Dict[str, Any], config: Optional[Dict[str, Any]] = None, **kwargs: Any
+    ) -> Dict[str, Any]:
+        """
+        Run the agent to completion asynchronously and return the final state.
+
+        Args:
+            input (Dict[str, Any]): The graph input, with a `messages` key.
+            config (Optional[Dict[str, Any]]): Optional runnable config for the agent.
+            **kwargs (Any): Extra keyword arguments for the agent's astream method.
+
+        Returns:
+            Dict[str, Any]: The last `values` step, or the blocked-message step.
+        """
+        kwargs["stream_mode"] = "values"
+        final_step: Dict[str, Any] = {}
+        async for step in self.astream(input, config, **kwargs):
+            final_step = step
+        return final_step
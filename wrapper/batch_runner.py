@@ -0,0 +1,247 @@
+"""
+Batch Runner for SecureAgentWrapper
+
+Runs many independent prompts through one compiled, secured agent with
+bounded concurrency. Inputs are read lazily from a JSONL file, every
+prompt goes through `SecureAgentWrapper.ainvoke` (so threat checks and
+logging apply as usual), and each result is appended to an output JSONL
+file as soon as it is ready.
+
+The output file doubles as the progress checkpoint: on restart, ids that
+already have an "ok" or "blocked" record are skipped, so a crashed run
+resumes where it stopped. Ids that ended in "error", or in "stopped" (the
+run hit its deadline or step limit and only has a partial answer), are
+retried; the last record for an id is the current one.
+
+Input lines look like ``{"id": "q1", "input": "What is the weather in Dhaka?"}``
+(the id defaults to the line number). Output lines look like
+``{"id": "q1", "status": "ok", "output": "...", "attempts": 1, "elapsed_s": 1.2}``.
+
+Author: Limon Halder
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, Iterator, Optional, Set, Tuple
+
+from tenacity import (
+    AsyncRetrying,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_exponential,
+    wait_random,
+)
+
+# Allow imports from parent directory
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from orchestrator.llm_node import LLM_ERROR_MESSAGE
+from wrapper.base_wrapper import INPUT_BLOCKED_MESSAGE, OUTPUT_BLOCKED_MESSAGE
+from logger.logger import logger
+
+# Statuses that count as done when resuming
+FINAL_STATUSES = ("ok", "blocked")
+
+
+class AgentRunError(Exception):
+    """Raised when an agent run ends with the LLM error message; worth retrying."""
+
+
+def iter_batch_inputs(
+    path: str, id_field: str = "id", input_field: str = "input"
+) -> Iterator[Tuple[str, Any]]:
+    """
+    Read (id, input) pairs from a JSONL file, one line at a time.
+
+    Args:
+        path (str): Input JSONL file.
+        id_field (str): Field holding the record id (line number if missing).
+        input_field (str): Field holding the prompt or message list.
+
+    Yields:
+        Tuple[str, Any]: The record id and the agent input messages.
+    """
+    with open(path, encoding="utf-8") as file:
+        for line_number, line in enumerate(file, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                logger.error(f"Skipping invalid JSON on line {line_number} of {path}: {e}")
+                continue
+            yield str(record.get(id_field, line_number)), record.get(input_field)
+
+
+def load_completed_ids(path: str) -> Set[str]:
+    """
+    Collect the ids that already have a final result in an output file.
+
+    Args:
+        path (str): Output JSONL file (may not exist yet).
+
+    Returns:
+        Set[str]: Ids whose latest record is "ok" or "blocked".
+    """
+    latest: Dict[str, str] = {}
+    if not os.path.exists(path):
+        return set()
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Partial last line from a crash
+            latest[str(record.get("id"))] = record.get("status")
+    return {record_id for record_id, status in latest.items() if status in FINAL_STATUSES}
+
+
+def _ends_with_newline(path: str) -> bool:
+    with open(path, "rb") as file:
+        file.seek(-1, os.SEEK_END)
+        return file.read(1) == b"\n"
+
+
+def _final_content(step: Dict[str, Any]) -> str:
+    messages = step.get("messages") or []
+    if not messages:
+        return ""
+    last = messages[-1]
+    content = last.get("content") if isinstance(last, dict) else getattr(last, "content", last)
+    return content if isinstance(content, str) else json.dumps(content, default=str)
+
+
+class BatchRunner:
+    """
+    Runs queued prompts through a SecureAgentWrapper concurrently.
+
+    Attributes:
+        secure_agent (Any): A SecureAgentWrapper (anything with `ainvoke`).
+        concurrency (int): Maximum number of agent runs in flight.
+        rate_limiter (Optional[Any]): A LangChain rate limiter (e.g.
+            InMemoryRateLimiter) acquired before every attempt.
+        max_attempts (int): Attempts per record, including the first.
+        backoff_initial (float): First retry delay in seconds (doubles, jittered).
+        backoff_max (float): Upper bound of the retry delay.
+    """
+
+    def __init__(
+        self,
+        secure_agent: Any,
+        concurrency: int = 8,
+        rate_limiter: Optional[Any] = None,
+        max_attempts: int = 3,
+        backoff_initial: float = 1.0,
+        backoff_max: float = 30.0,
+    ):
+        self.secure_agent = secure_agent
+        self.concurrency = concurrency
+        self.rate_limiter = rate_limiter
+        self.max_attempts = max_attempts
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+
+    async def _attempt(self, messages: Any) -> Tuple[str, Optional[str]]:
+        if self.rate_limiter is not None:
+            await self.rate_limiter.aacquire()
+        step = await self.secure_agent.ainvoke({"messages": messages})
+        content = _final_content(step)
+        if content == LLM_ERROR_MESSAGE:
+            raise AgentRunError("LLM call failed during the agent run.")
+        return content, step.get("stop_reason")
+
+    async def run_one(self, record_id: str, messages: Any) -> Dict[str, Any]:
+        """
+        Run a single record with retries.
+
+        Args:
+            record_id (str): The record id.
+            messages (Any): The agent input.
+
+        Returns:
+            Dict[str, Any]: The output record.
+        """
+        start = time.perf_counter()
+        attempts = 0
+        result: Dict[str, Any] = {"id": record_id}
+        try:
+            async for attempt in AsyncRetrying(
+                stop=stop_after_attempt(self.max_attempts),
+                wait=wait_exponential(multiplier=self.backoff_initial, max=self.backoff_max)
+                + wait_random(0, self.backoff_initial),
+                retry=retry_if_exception_type(Exception),
+                reraise=True,
+            ):
+                with attempt:
+                    attempts += 1
+                    content, stop_reason = await self._attempt(messages)
+            if stop_reason:
+                # Partial answer: recorded, but left for the next resume to retry
+                result.update(status="stopped", stop_reason=stop_reason, output=content)
+            elif content in (INPUT_BLOCKED_MESSAGE, OUTPUT_BLOCKED_MESSAGE):
+                result.update(status="blocked", output=content)
+            else:
+                result.update(status="ok", output=content)
+        except Exception as e:
+            logger.error(f"Batch record {record_id} failed after {attempts} attempt(s): {e}")
+            result.update(status="error", error=f"{type(e).__name__}: {e}")
+        result.update(attempts=attempts, elapsed_s=round(time.perf_counter() - start, 3))
+        return result
+
+    async def run(
+        self,
+        inputs: Iterator[Tuple[str, Any]],
+        output_path: str,
+        resume: bool = True,
+    ) -> Dict[str, int]:
+        """
+        Run every input record and append the results to `output_path`.
+
+        Args:
+            inputs (Iterator[Tuple[str, Any]]): (id, messages) pairs, e.g. from
+                `iter_batch_inputs`. Consumed lazily.
+            output_path (str): Output JSONL file; also the resume checkpoint.
+            resume (bool): Skip ids already completed in `output_path`.
+
+        Returns:
+            Dict[str, int]: Counts per status, plus "skipped".
+        """
+        done = load_completed_ids(output_path) if resume else set()
+        if done:
+            logger.info(f"Resuming batch: {len(done)} record(s) already completed.")
+        summary = {"ok": 0, "blocked": 0, "stopped": 0, "error": 0, "skipped": 0}
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+
+        with open(output_path, "a" if resume else "w", encoding="utf-8") as output:
+            if output.tell() and not _ends_with_newline(output_path):
+                output.write("\n")  # Terminate a line cut off by a crash
+
+            async def worker() -> None:
+                while True:
+                    item = await queue.get()
+                    if item is None:
+                        return
+                    result = await self.run_one(*item)
+                    summary[result["status"]] += 1
+                    output.write(json.dumps(result, ensure_ascii=False) + "\n")
+                    output.flush()
+
+            workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+            try:
+                for record_id, messages in inputs:
+                    if record_id in done:
+                        summary["skipped"] += 1
+                        continue
+                    await queue.put((record_id, messages))
+                for _ in workers:
+                    await queue.put(None)
+                await asyncio.gather(*workers)
+            finally:
+                for task in workers:
+                    task.cancel()
+
+        logger.info(f"Batch finished: {summary}")
+        return summary
@@ -0,0 +1,426 @@
+"""
+Threat Pattern Scanner
+
+Compiles the per-category threat regexes into a single scanning engine.
+
+Every configured pattern is reduced to the literal "anchor" words it cannot
+match without (e.g. ``ignore.*instruction`` -> ``ignore``, ``instruction``).
+All anchors are located in one pass with an Aho-Corasick automaton
+(pyahocorasick), and the full regex only runs for patterns whose anchors were
+all seen. Without pyahocorasick, anchors are checked with plain substring
+searches instead. Patterns that use syntax other than literals, ``.*`` and
+``\\b`` are kept as-is and always run, so arbitrary rules stay supported.
+
+Simple patterns run as a chain of atomic groups anchored at line starts
+(``^(?>.*?ignore)(?>.*?instruction)``): each line is walked once, taking the
+first occurrence of every piece, instead of retrying the gap from every
+occurrence of the first anchor, which is quadratic on long lines.
+
+Long texts can be scanned in overlapping segments under a time budget
+(`ThreatScanner.scan_segments`), so memory for case folding stays bounded and
+a slow input ends in `ScanBudgetExceeded` instead of pinning a core. The
+budget is best-effort: it is checked between regex searches, so a single
+search can still overrun it.
+
+Category results are identical to running every regex one after another
+(for segmented scans: as long as a match spans no more than the overlap).
+A cut between segments is not a word boundary in the full text, so matches
+touching a cut are ignored; the overlap is at least one character longer
+than the longest anchor, so such a match is found whole in the neighbouring
+segment instead.
+
+Author: Limon Halder
+"""
+
+import re
+import time
+from typing import (
+    AbstractSet,
+    Any,
+    Dict,
+    FrozenSet,
+    Iterator,
+    List,
+    Optional,
+    Pattern,
+    Set,
+    Tuple,
+)
+
+try:
+    import ahocorasick
+except ImportError:  # pragma: no cover - exercised only without pyahocorasick
+    ahocorasick = None
+
+# Characters with special meaning in a regex; a pattern using any of them
+# (other than the ".*" and "\b" forms handled below) is not anchor-scannable.
+_REGEX_METACHARS = frozenset(".^$*+?{}[]|()\\")
+
+# Non-ASCII characters that `re.IGNORECASE` treats as equal to an ASCII letter
+# but that `str.lower()` does not map onto it.
+_IGNORECASE_FOLD = str.maketrans({"İ": "i", "ı": "i", "ſ": "s"})
+
+
+class ScanBudgetExceeded(Exception):
+    """
+    Raised when a scan runs past its deadline.
+
+    Attributes:
+        found (Tuple[str, ...]): Categories matched before the deadline.
+    """
+
+    def __init__(self, found: Tuple[str, ...]):
+        super().__init__("Threat scan exceeded its time budget")
+        self.found = found
+
+
+def iter_segments(text: str, segment_chars: int, overlap_chars: int) -> Iterator[str]:
+    """
+    Split a text into overlapping segments.
+
+    Args:
+        text (str): The text to split.
+        segment_chars (int): Length of each segment.
+        overlap_chars (int): Characters shared by consecutive segments; must be
+            smaller than `segment_chars`.
+
+    Yields:
+        str: The segments in order; a short text is yielded as-is.
+    """
+    for start, end in _segment_bounds(len(text), segment_chars, overlap_chars):
+        yield text[start:end]
+
+
+def _segment_bounds(length: int, segment_chars: int, overlap_chars: int) -> Iterator[Tuple[int, int]]:
+    """(start, end) offsets of the segments yielded by `iter_segments`."""
+    if length <= segment_chars:
+        yield 0, length
+        return
+    step = segment_chars - overlap_chars
+    for start in range(0, length - overlap_chars, step):
+        yield start, min(start + segment_chars, length)
+
+
+def _parse_simple_pattern(pattern: str) -> Optional[Tuple[List[str], List[str]]]:
+    """
+    Parse a simple pattern into its anchors and its ``.*``-separated pieces.
+
+    Returns:
+        Optional[Tuple[List[str], List[str]]]: The lowercase anchors and the
+            regex source of every piece between ``.*`` gaps, or None if the
+            pattern is not simple.
+    """
+    anchors: List[str] = []
+    pieces: List[str] = []
+    rebuilt: List[str] = []
+    current: List[str] = []
+
+    def flush() -> None:
+        if current:
+            anchors.append("".join(current).lower())
+            current.clear()
+
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if pattern.startswith(".*", i):
+            flush()
+            pieces.append("".join(rebuilt))
+            rebuilt.clear()
+            i += 2
+        elif pattern.startswith("\\b", i):
+            flush()
+            rebuilt.append("\\b")
+            i += 2
+        elif char == "\\" and i + 1 < len(pattern) and pattern[i + 1] in _REGEX_METACHARS:
+            current.append(pattern[i + 1])
+            rebuilt.append(pattern[i : i + 2])
+            i += 2
+        elif char in _REGEX_METACHARS or not char.isascii():
+            return None
+        else:
+            current.append(char)
+            rebuilt.append(re.escape(char))
+            i += 1
+    flush()
+    pieces.append("".join(rebuilt))
+
+    if not anchors:
+        return None
+    return anchors, pieces
+
+
+def extract_anchors(pattern: str) -> Optional[Tuple[List[str], str]]:
+    """
+    Split a simple pattern into its literal anchors.
+
+    A simple pattern is a sequence of literal runs joined by ``.*`` and
+    optionally bounded by ``\\b``. Escaped punctuation counts as a literal.
+
+    Args:
+        pattern (str): The raw regex string.
+
+    Returns:
+        Optional[Tuple[List[str], str]]: The lowercase anchors and an equivalent
+            pattern using lazy ``.*?`` gaps, or None if the pattern uses any
+            other regex syntax or contains no ASCII literal.
+    """
+    parsed = _parse_simple_pattern(pattern)
+    if parsed is None:
+        return None
+    anchors, pieces = parsed
+    return anchors, ".*?".join(pieces)
+
+
+def chain_pattern_source(pattern: str) -> Optional[str]:
+    """
+    Rewrite a simple pattern into a form that runs in linear time per line.
+
+    Each piece between ``.*`` gaps becomes an atomic group matching its first
+    occurrence after the previous piece, and is captured so segmented scans
+    can tell where it matched. Because every piece has a fixed
+    length, taking the earliest occurrence never rules out a match, so the
+    result matches exactly the same lines as the original (with re.MULTILINE).
+
+    Args:
+        pattern (str): The raw regex string.
+
+    Returns:
+        Optional[str]: The rewritten source, or None if the pattern is not simple.
+    """
+    parsed = _parse_simple_pattern(pattern)
+    if parsed is None:
+        return None
+    return "^" + "".join(f"(?>.*?({piece}))" for piece in parsed[1] if piece)
+
+
+class ThreatScanner:
+    """
+    Single-pass, multi-pattern scanner over compiled threat categories.
+
+    Attributes:
+        categories (List[str]): Threat categories in configuration order.
+    """
+
+    def __init__(self, compiled_patterns: Dict[str, List[Pattern]]):
+        """
+        Build the scanner from compiled per-category patterns.
+
+        Args:
+            compiled_patterns (Dict[str, List[Pattern]]): Output of
+                `compile_threat_patterns`.
+        """
+        self.categories: List[str] = list(compiled_patterns)
+        # Per category: (required anchors, regex, unanchored chain) rules; empty
+        # anchors = always run, and only chain rules have the unanchored form.
+        self._rules: Dict[str, List[Tuple[FrozenSet[str], Pattern, Optional[Pattern]]]] = {}
+        all_anchors: Set[str] = set()
+
+        for threat_name, patterns in compiled_patterns.items():
+            rules: List[Tuple[FrozenSet[str], Pattern, Optional[Pattern]]] = []
+            for pattern in patterns:
+                parsed = extract_anchors(pattern.pattern)
+                if parsed is None:
+                    rules.append((frozenset(), pattern, None))
+                    continue
+                anchors = parsed[0]
+                chain_source = chain_pattern_source(pattern.pattern)
+                flags = pattern.flags | re.MULTILINE
+                rules.append(
+                    (
+                        frozenset(anchors),
+                        re.compile(chain_source, flags),
+                        re.compile(chain_source[1:], flags),
+                    )
+                )
+                all_anchors.update(anchors)
+            self._rules[threat_name] = rules
+
+        self._anchors: FrozenSet[str] = frozenset(all_anchors)
+        # Shortest overlap that keeps every anchor whole, with one character
+        # of context, in some segment
+        self.min_overlap_chars: int = max(map(len, all_anchors), default=0) + 1
+        self._decoded_masks: Dict[int, Tuple[str, ...]] = {}
+        self._automaton: Optional[Any] = None
+        if all_anchors and ahocorasick is not None:
+            self._automaton = ahocorasick.Automaton()
+            for anchor in all_anchors:
+                self._automaton.add_word(anchor, anchor)
+            self._automaton.make_automaton()
+
+    def find_anchors(self, text: str) -> Set[str]:
+        """
+        Locate every anchor occurring in the text, including overlapping ones.
+
+        Args:
+            text (str): The text to search.
+
+        Returns:
+            Set[str]: The anchors present in the text.
+        """
+        if not self._anchors:
+            return set()
+
+        if not text.isascii():
+            text = text.translate(_IGNORECASE_FOLD)
+        haystack = text.lower()
+
+        if self._automaton is None:
+            return {anchor for anchor in self._anchors if anchor in haystack}
+
+        found: Set[str] = set()
+        for _, anchor in self._automaton.iter(haystack):
+            found.add(anchor)
+            if len(found) == len(self._anchors):
+                break
+        return found
+
+    @staticmethod
+    def _search_within_cuts(
+        text: str, pattern: Pattern, tail: Optional[Pattern], cut_start: bool, cut_end: bool
+    ) -> bool:
+        """
+        Whether `pattern` matches without touching a cut segment edge.
+
+        A chain match whose first piece starts at a cut is retried from the
+        next character with the unanchored chain, which still sees the real
+        character before it; a chain can only touch a cut end with its last
+        piece, and no later occurrence of it exists.
+        """
+        end = len(text)
+        if tail is None:
+            return any(
+                not (cut_start and m.start() == 0) and not (cut_end and m.end() == end)
+                for m in pattern.finditer(text)
+            )
+
+        match = pattern.search(text)
+        if match is not None and cut_start and match.start(1) == 0:
+            match = tail.match(text, 1)
+            if match is None:
+                # Nothing else on the first line; carry on from the second one
+                newline = text.find("\n")
+                match = pattern.search(text, newline + 1) if newline >= 0 else None
+        return match is not None and not (cut_end and match.end(match.lastindex) == end)
+
+    def _matching_indexes(
+        self,
+        text: str,
+        skip: AbstractSet[int] = frozenset(),
+        deadline: Optional[float] = None,
+        cut_start: bool = False,
+        cut_end: bool = False,
+    ) -> Iterator[int]:
+        present = self.find_anchors(text)
+        for index, threat_name in enumerate(self.categories):
+            if index in skip:
+                continue
+            for anchors, pattern, tail in self._rules[threat_name]:
+                if not anchors <= present:
+                    continue
+                if deadline is not None and time.monotonic() > deadline:
+                    raise TimeoutError
+                if cut_start or cut_end:
+                    matched = self._search_within_cuts(text, pattern, tail, cut_start, cut_end)
+                else:
+                    matched = pattern.search(text) is not None
+                if matched:
+                    yield index
+                    break  # Stop checking more patterns in this threat category
+
+    def scan(self, text: str) -> List[str]:
+        """
+        Return every threat category with at least one matching pattern.
+
+        Args:
+            text (str): The text to analyze.
+
+        Returns:
+            List[str]: Matching categories, in configuration order.
+        """
+        return [self.categories[index] for index in self._matching_indexes(text)]
+
+    def scan_segments(
+        self,
+        text: str,
+        segment_chars: int,
+        overlap_chars: int,
+        deadline: Optional[float] = None,
+    ) -> List[str]:
+        """
+        Scan a text segment by segment, optionally against a deadline.
+
+        Only the categories not matched yet are checked in later segments, and
+        the deadline is checked before every segment and every regex search;
+        it is best-effort, as one regex search can run past it. Matches that
+        touch a cut between segments are ignored (the cut is not a word
+        boundary in the full text).
+
+        Args:
+            text (str): The text to analyze.
+            segment_chars (int): Segment length (see `iter_segments`).
+            overlap_chars (int): Overlap between segments; the longest match
+                that is still found when it crosses a segment boundary. Raised
+                to `min_overlap_chars` when smaller.
+            deadline (Optional[float]): `time.monotonic()` value to stop at.
+
+        Returns:
+            List[str]: Matching categories, in configuration order.
+
+        Raises:
+            ScanBudgetExceeded: If the deadline passes before the scan finishes.
+        """
+        overlap_chars = min(max(overlap_chars, self.min_overlap_chars), segment_chars - 1)
+        found: Set[int] = set()
+        try:
+            for start, end in _segment_bounds(len(text), segment_chars, overlap_chars):
+                if deadline is not None and time.monotonic() > deadline:
+                    raise TimeoutError
+                found.update(
+                    self._matching_indexes(
+                        text[start:end], found, deadline, cut_start=start > 0, cut_end=end < len(text)
+                    )
+                )
+                if len(found) == len(self.categories):
+                    break
+        except TimeoutError:
+            raise ScanBudgetExceeded(
+                tuple(self.categories[index] for index in sorted(found))
+            ) from None
+        return [self.categories[index] for index in sorted(found)]
+
+    def scan_mask(self, text: str) -> int:
+        """
+        Compact form of `scan`: bit i is set when `categories[i]` matches.
+
+        Args:
+            text (str): The text to analyze.
+
+        Returns:
+            int: The category bitmask (0 when nothing matches).
+        """
+        mask = 0
+        for index in self._matching_indexes(text):
+            mask |= 1 << index
+        return mask
+
+    def decode_mask(self, mask: int) -> Tuple[str, ...]:
+        """
+        Turn a `scan_mask` result back into category names.
+
+        Identical masks decode to the same tuple object, so large result sets
+        share storage.
+
+        Args:
+            mask (int): A category bitmask.
+
+        Returns:
+            Tuple[str, ...]: Matching categories, in configuration order.
+        """
+        decoded = self._decoded_masks.get(mask)
+        if decoded is None:
+            decoded = tuple(
+                name for index, name in enumerate(self.categories) if mask >> index & 1
+            )
+            self._decoded_masks[mask] = decoded
+        return decoded
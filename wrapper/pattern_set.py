@@ -0,0 +1,338 @@
+"""
+Threat Pattern Sets
+
+Loads the threat rules into immutable, versioned `PatternSet` objects and
+keeps the current one in a `PatternStore` that can swap it at runtime:
+
+- The rules file is found through THREAT_PATTERNS_PATH, defaulting to the
+  `config.yml` next to this module (independent of the working directory).
+- A set's version is a hash of the file content, so every process running the
+  same rules reports the same version.
+- The store checks the file's mtime at most every few seconds and reloads it
+  in a background thread; `reload()` reloads on request. A new set is fully
+  built before it replaces the old one with a single reference assignment,
+  so readers never wait and never see a half-loaded set. A file that fails
+  to load is logged and the previous set stays active.
+- Built sets are cached as snapshots keyed by version (by default in this
+  package's `__pycache__`, like bytecode), so a starting worker skips YAML
+  parsing, validation, anchor extraction and automaton construction.
+
+Configuration (environment variables):
+    THREAT_PATTERNS_PATH: Rules file (default: wrapper/config.yml).
+    THREAT_PATTERNS_CHECK_INTERVAL: Seconds between mtime checks; 0 disables
+        watching (default 5).
+    THREAT_PATTERNS_SNAPSHOT_DIR: Snapshot directory; empty disables
+        snapshots (default: wrapper/__pycache__).
+
+Author: Limon Halder
+"""
+
+import hashlib
+import os
+import pickle
+import re
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Pattern, Tuple
+
+from logger.logger import logger
+from wrapper.pattern_scanner import ThreatScanner
+
+DEFAULT_PATTERNS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.yml")
+DEFAULT_SNAPSHOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "__pycache__")
+
+# Bump when the pickled layout of PatternSet/ThreatScanner changes
+_SNAPSHOT_FORMAT = 3
+
+
+def load_threat_patterns_from_yaml(
+    path: str = DEFAULT_PATTERNS_PATH,
+) -> Dict[str, List[str]]:
+    """
+    Load raw threat patterns from a YAML file.
+
+    Args:
+        path (str): Path to the YAML file.
+
+    Returns:
+        Dict[str, List[str]]: A dictionary of threat categories and their associated regex strings.
+    """
+    try:
+        with open(path, "rb") as file:
+            return parse_threat_patterns(file.read())
+    except Exception as e:
+        print(f"⚠️ Warning: Failed to load threat patterns from '{path}': {e}")
+        return {}
+
+
+def parse_threat_patterns(content: bytes) -> Dict[str, List[str]]:
+    """
+    Parse the YAML rules file content.
+
+    Args:
+        content (bytes): Raw file content.
+
+    Returns:
+        Dict[str, List[str]]: Threat categories and their regex strings.
+
+    Raises:
+        ValueError: If the document is not a mapping of categories.
+    """
+    import yaml  # Only needed when patterns are parsed, not when a snapshot is used
+
+    patterns = yaml.safe_load(content)
+    if not isinstance(patterns, dict):
+        raise ValueError(f"Expected dict from YAML, got {type(patterns)}")
+    return patterns
+
+
+def compile_threat_patterns(
+    raw_patterns: Dict[str, List[str]]
+) -> Dict[str, List[Pattern]]:
+    """
+    Compile raw regex strings into regex Pattern objects.
+
+    Args:
+        raw_patterns (Dict[str, List[str]]): Raw threat patterns loaded from YAML.
+
+    Returns:
+        Dict[str, List[Pattern]]: Compiled regex patterns per threat type.
+    """
+    compiled: Dict[str, List[Pattern]] = {}
+
+    for threat_name, patterns in raw_patterns.items():
+        compiled[threat_name] = []
+        if isinstance(patterns, list):
+            for p in patterns:
+                try:
+                    compiled_pattern = re.compile(p, re.IGNORECASE)
+                    compiled[threat_name].append(compiled_pattern)
+                except re.error as e:
+                    print(
+                        f"⚠️ Warning: Invalid regex pattern '{p}' for threat "
+                        f"'{threat_name}': {e}"
+                    )
+        else:
+            print(
+                f"⚠️ Warning: Patterns for threat '{threat_name}' should be a list, "
+                f"got {type(patterns)}"
+            )
+
+    return compiled
+
+
+class PatternSet:
+    """
+    An immutable, versioned set of threat rules ready for scanning.
+
+    Attributes:
+        version (str): Hash of the rules file content.
+        source (str): Path the rules were loaded from.
+        raw (Dict[str, List[str]]): Pattern strings per category.
+        compiled (Dict[str, List[Pattern]]): Compiled patterns per category.
+        scanner (ThreatScanner): Single-pass scanner over `compiled`.
+        loaded_at (float): Unix time the set was built or restored.
+    """
+
+    def __init__(self, version: str, source: str, raw: Dict[str, List[str]]):
+        self.version = version
+        self.source = source
+        self.raw = raw
+        self.compiled = compile_threat_patterns(raw)
+        self.scanner = ThreatScanner(self.compiled)
+        self.loaded_at = time.time()
+
+    @classmethod
+    def from_content(cls, content: bytes, source: str) -> "PatternSet":
+        """Build a set from rules file content."""
+        return cls(content_version(content), source, parse_threat_patterns(content))
+
+    def __repr__(self) -> str:
+        count = sum(len(patterns) for patterns in self.compiled.values())
+        return f"PatternSet(version={self.version!r}, patterns={count}, source={self.source!r})"
+
+
+def content_version(content: bytes) -> str:
+    """Version string of a rules file: a short SHA-256 of its content."""
+    return hashlib.sha256(content).hexdigest()[:16]
+
+
+class PatternStore:
+    """
+    Holds the current PatternSet and replaces it when the rules change.
+
+    Attributes:
+        path (str): Rules file path.
+        check_interval (float): Minimum seconds between mtime checks (0 = never).
+        snapshot_dir (Optional[str]): Where snapshots are cached (None = off).
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        check_interval: Optional[float] = None,
+        snapshot_dir: Optional[str] = None,
+    ):
+        """
+        Configure the store; nothing is loaded until the set is first used.
+
+        Args:
+            path (Optional[str]): Rules file; THREAT_PATTERNS_PATH or the default.
+            check_interval (Optional[float]): Seconds between mtime checks;
+                THREAT_PATTERNS_CHECK_INTERVAL or 5.
+            snapshot_dir (Optional[str]): Snapshot directory ("" disables);
+                THREAT_PATTERNS_SNAPSHOT_DIR or the package __pycache__.
+        """
+        self.path = path or os.getenv("THREAT_PATTERNS_PATH") or DEFAULT_PATTERNS_PATH
+        if check_interval is None:
+            check_interval = float(os.getenv("THREAT_PATTERNS_CHECK_INTERVAL", "5"))
+        self.check_interval = check_interval
+        if snapshot_dir is None:
+            snapshot_dir = os.getenv("THREAT_PATTERNS_SNAPSHOT_DIR", DEFAULT_SNAPSHOT_DIR)
+        self.snapshot_dir = snapshot_dir or None
+
+        self._current: Optional[PatternSet] = None
+        self._file_stamp: Optional[Tuple[float, int]] = None
+        self._next_check = 0.0
+        self._load_lock = threading.Lock()
+        self._reloading = False
+
+    # --- Reading -------------------------------------------------------------
+
+    @property
+    def current(self) -> PatternSet:
+        """
+        The active PatternSet.
+
+        Only the very first access waits for a load. Afterwards a changed
+        file is picked up in the background and the old set is returned
+        until the new one is ready.
+        """
+        pattern_set = self._current
+        if pattern_set is None:
+            return self._initial_load()
+        if self.check_interval > 0 and time.monotonic() >= self._next_check:
+            self._check_for_changes()
+        return pattern_set
+
+    # --- Loading -------------------------------------------------------------
+
+    def _stat(self) -> Optional[Tuple[float, int]]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime, stat.st_size
+
+    def _initial_load(self) -> PatternSet:
+        with self._load_lock:
+            if self._current is None:
+                if not self._load():
+                    logger.error(
+                        f"No threat patterns loaded from '{self.path}'; "
+                        "threat detection is running with an empty rule set."
+                    )
+                    self._current = PatternSet("empty", self.path, {})
+            return self._current
+
+    def _check_for_changes(self) -> None:
+        self._next_check = time.monotonic() + self.check_interval
+        if self._stat() == self._file_stamp or self._reloading:
+            return
+        self._reloading = True
+        threading.Thread(target=self._background_reload, name="pattern-reload", daemon=True).start()
+
+    def _background_reload(self) -> None:
+        try:
+            with self._load_lock:
+                self._load()
+        finally:
+            self._reloading = False
+
+    def _load(self) -> bool:
+        """Read the rules file and swap in a new set if its version changed."""
+        stamp = self._stat()
+        try:
+            with open(self.path, "rb") as file:
+                content = file.read()
+        except OSError as e:
+            logger.error(f"Failed to read threat patterns from '{self.path}': {e}")
+            self._file_stamp = stamp
+            return False
+
+        version = content_version(content)
+        if self._current is not None and self._current.version == version:
+            self._file_stamp = stamp
+            return True
+
+        try:
+            pattern_set = self._read_snapshot(version) or PatternSet.from_content(content, self.path)
+        except Exception as e:
+            logger.error(f"Invalid threat patterns in '{self.path}', keeping the previous set: {e}")
+            self._file_stamp = stamp
+            return False
+
+        self._write_snapshot(pattern_set)
+        previous = self._current
+        self._current = pattern_set  # Atomic swap: readers see the old or the new set
+        self._file_stamp = stamp
+        if previous is not None:
+            logger.info(f"Threat patterns reloaded: {previous.version} -> {pattern_set.version}")
+        return True
+
+    def reload(self) -> PatternSet:
+        """
+        Re-read the rules file now (e.g. from an admin endpoint or signal handler).
+
+        Returns:
+            PatternSet: The active set afterwards; unchanged if the file is
+                unreadable or invalid.
+        """
+        with self._load_lock:
+            self._load()
+            if self._current is None:
+                self._current = PatternSet("empty", self.path, {})
+            return self._current
+
+    # --- Snapshots -----------------------------------------------------------
+
+    def _snapshot_path(self, version: str) -> Optional[str]:
+        if not self.snapshot_dir:
+            return None
+        python = f"{sys.version_info.major}{sys.version_info.minor}"
+        name = f"threat_patterns-{version}-v{_SNAPSHOT_FORMAT}-py{python}.pickle"
+        return os.path.join(self.snapshot_dir, name)
+
+    def _read_snapshot(self, version: str) -> Optional[PatternSet]:
+        path = self._snapshot_path(version)
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            # Snapshots are written by this module into a directory owned by the
+            # deployment (like .pyc files) and are trusted to the same degree.
+            with open(path, "rb") as file:
+                pattern_set = pickle.load(file)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable threat pattern snapshot '{path}': {e}")
+            return None
+        if not isinstance(pattern_set, PatternSet) or pattern_set.version != version:
+            return None
+        pattern_set.source = self.path
+        pattern_set.loaded_at = time.time()
+        return pattern_set
+
+    def _write_snapshot(self, pattern_set: PatternSet) -> None:
+        path = self._snapshot_path(pattern_set.version)
+        if not path or os.path.exists(path):
+            return
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.snapshot_dir, exist_ok=True)
+            with open(temp_path, "wb") as file:
+                pickle.dump(pattern_set, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, path)  # Other workers never read a partial file
+        except Exception as e:
+            logger.warning(f"Could not write threat pattern snapshot '{path}': {e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
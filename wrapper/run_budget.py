@@ -0,0 +1,109 @@
+"""
+Run Budget Module
+
+Per-request deadline and step budget for agent runs. `SecureAgentWrapper`
+turns its settings into an absolute deadline in the run config
+(`config["configurable"]["deadline"]`, epoch seconds) and a LangGraph
+`recursion_limit`. Graph nodes read the deadline back with `time_left` and
+cap their own LLM and tool calls with it, so a slow provider or a looping
+model cannot hold a worker for longer than the request allows.
+
+This module only uses the standard library; LangGraph is imported lazily.
+
+Author: Limon Halder
+"""
+
+import time
+from typing import Any, Dict, Optional
+
+# Key of the absolute deadline in `config["configurable"]`
+DEADLINE_KEY = "deadline"
+
+# Reasons a run can be stopped before the graph finished
+STOP_DEADLINE = "deadline"
+STOP_MAX_STEPS = "max_steps"
+
+
+class DeadlineExceeded(TimeoutError):
+    """
+    Raised by a graph node when the request deadline has passed.
+
+    Attributes:
+        node (str): The node that hit the deadline (e.g. 'llm', 'tools').
+    """
+
+    def __init__(self, node: str):
+        super().__init__(f"Request deadline reached in node '{node}'.")
+        self.node = node
+
+
+def with_budget(
+    config: Optional[Dict[str, Any]], deadline: Optional[float], max_steps: Optional[int]
+) -> Dict[str, Any]:
+    """
+    Return a copy of a run config carrying the deadline and step budget.
+
+    Args:
+        config (Optional[Dict[str, Any]]): The caller's run config (left untouched).
+        deadline (Optional[float]): Absolute deadline in epoch seconds, or None.
+        max_steps (Optional[int]): Maximum number of graph steps, or None.
+
+    Returns:
+        Dict[str, Any]: The new run config.
+    """
+    config = dict(config or {})
+    if deadline is not None:
+        configurable = dict(config.get("configurable") or {})
+        previous = configurable.get(DEADLINE_KEY)
+        # An earlier deadline set by the caller still wins
+        configurable[DEADLINE_KEY] = deadline if previous is None else min(previous, deadline)
+        config["configurable"] = configurable
+    if max_steps is not None:
+        config["recursion_limit"] = max_steps
+    return config
+
+
+def time_left(config: Optional[Dict[str, Any]]) -> Optional[float]:
+    """
+    Seconds until the request deadline of a run config.
+
+    Args:
+        config (Optional[Dict[str, Any]]): The run config passed to a node.
+
+    Returns:
+        Optional[float]: Remaining seconds (negative once passed), or None if
+            the run has no deadline.
+    """
+    deadline = ((config or {}).get("configurable") or {}).get(DEADLINE_KEY)
+    if deadline is None:
+        return None
+    return deadline - time.time()
+
+
+def check_deadline(config: Optional[Dict[str, Any]], node: str) -> Optional[float]:
+    """
+    Return the time left for a node, raising if the deadline has already passed.
+
+    Args:
+        config (Optional[Dict[str, Any]]): The run config passed to the node.
+        node (str): Node name used in the error.
+
+    Returns:
+        Optional[float]: Remaining seconds, or None if the run has no deadline.
+
+    Raises:
+        DeadlineExceeded: If no time is left.
+    """
+    remaining = time_left(config)
+    if remaining is not None and remaining <= 0:
+        raise DeadlineExceeded(node)
+    return remaining
+
+
+def is_step_limit_error(error: BaseException) -> bool:
+    """Whether an error is LangGraph's recursion (step budget) limit."""
+    try:
+        from langgraph.errors import GraphRecursionError
+    except ImportError:
+        return False
+    return isinstance(error, GraphRecursionError)
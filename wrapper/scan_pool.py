@@ -0,0 +1,168 @@
+"""
+Threat Scan Process Pool
+
+Runs large threat scans in a pool of warm worker processes, so a multi-MB
+input or tool output does not hold the GIL of the process serving every other
+session. The calling thread only waits on a future, which releases the GIL.
+
+- Workers are started with the "spawn" method (the parent has logging and
+  pattern-reload threads, which do not survive a fork) and load the active
+  threat rules once at startup, from the same rules file and snapshots as
+  the parent.
+- A text is passed as UTF-8 in a shared-memory block, encoded in slices
+  straight into the block, instead of being pickled through a pipe.
+- Each request carries the parent's pattern-set version. A worker holding a
+  different version reloads the rules file; if it still cannot match the
+  version, the scan is handed back and runs inline.
+
+Small texts are always scanned inline; see `threat_detector.scan_text`.
+
+Author: Limon Halder
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from multiprocessing import shared_memory
+from typing import Any, Optional, Tuple
+
+from logger.logger import logger
+
+# Characters encoded into shared memory per step
+_ENCODE_SLICE_CHARS = 1 << 20
+
+
+def _init_scan_worker() -> None:
+    from wrapper.threat_detector import get_pattern_set
+
+    get_pattern_set()  # Load (or restore) the rules before the first request
+
+
+def _warm_up() -> int:
+    return os.getpid()
+
+
+def _scan_in_worker(version: str, shm_name: str, size: int) -> Optional[Tuple[str, ...]]:
+    from wrapper.threat_detector import get_pattern_set, reload_threat_patterns, scan_text_inline
+
+    pattern_set = get_pattern_set()
+    if pattern_set.version != version:
+        pattern_set = reload_threat_patterns()
+        if pattern_set.version != version:
+            return None
+
+    # Workers share the parent's resource tracker, which forgets the block
+    # when the parent unlinks it
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        buffer = shm.buf[:size]
+        try:
+            text = str(buffer, "utf-8", "surrogatepass")
+        finally:
+            buffer.release()
+    finally:
+        shm.close()
+    return scan_text_inline(text, pattern_set)
+
+
+def _write_utf8(text: str) -> Tuple[shared_memory.SharedMemory, int]:
+    """Encode a text into a new shared-memory block, one slice at a time."""
+    capacity = len(text) if text.isascii() else 4 * len(text)
+    shm = shared_memory.SharedMemory(create=True, size=max(1, capacity))
+    size = 0
+    try:
+        for start in range(0, len(text), _ENCODE_SLICE_CHARS):
+            data = text[start : start + _ENCODE_SLICE_CHARS].encode("utf-8", "surrogatepass")
+            shm.buf[size : size + len(data)] = data
+            size += len(data)
+    except BaseException:
+        shm.close()
+        shm.unlink()
+        raise
+    return shm, size
+
+
+class ScanPool:
+    """
+    A warm process pool for threat scans above a size threshold.
+
+    Attributes:
+        processes (int): Number of worker processes.
+        min_chars (int): Texts shorter than this are not offloaded.
+    """
+
+    def __init__(self, processes: Optional[int] = None, min_chars: int = 65536):
+        """
+        Args:
+            processes (Optional[int]): Worker processes (default: CPU count).
+            min_chars (int): Smallest text length worth the round trip.
+        """
+        self.processes = processes or os.cpu_count() or 1
+        self.min_chars = min_chars
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_scan_worker,
+                )
+            return self._executor
+
+    def start(self) -> "ScanPool":
+        """
+        Start every worker now rather than on the first large scan.
+
+        Returns:
+            ScanPool: This pool.
+        """
+        executor = self._get_executor()
+        for future in [executor.submit(_warm_up) for _ in range(self.processes)]:
+            future.result()
+        return self
+
+    def scan(
+        self, text: str, pattern_set: Any, timeout: Optional[float] = None
+    ) -> Optional[Tuple[str, ...]]:
+        """
+        Scan a text in a worker process.
+
+        Args:
+            text (str): The text to analyze.
+            pattern_set (Any): The parent's PatternSet; workers use the same version.
+            timeout (Optional[float]): Seconds to wait for the result.
+
+        Returns:
+            Optional[Tuple[str, ...]]: The categories found (as `scan_text_inline`
+                returns them), or None if the worker could not load this version.
+
+        Raises:
+            concurrent.futures.TimeoutError: If no result arrives within `timeout`.
+        """
+        shm, size = _write_utf8(text)
+        try:
+            future = self._get_executor().submit(
+                _scan_in_worker, pattern_set.version, shm.name, size
+            )
+            try:
+                return future.result(timeout)
+            except FutureTimeoutError:
+                # The worker cannot be interrupted; it finishes in the background
+                future.cancel()
+                raise
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def shutdown(self) -> None:
+        """Stop the workers (they are started again on the next scan)."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+            logger.info("Threat scan pool stopped")
@@ -0,0 +1,294 @@
+"""
+Incremental Output Scanning
+
+Scans token streams (`stream_mode="messages"`) chunk by chunk, so answers can
+be shown as they are generated without giving up output blocking:
+
+- Every message gets its own `IncrementalScanner`. Chunks are held until the
+  text they complete has been scanned and cleared; a chunk ending inside a
+  word is held back until the word is finished (up to a small limit), so a
+  term split across tokens is scanned whole before any of it is released.
+- Each scan covers the not-yet-cleared text plus a bounded window of the
+  cleared text before it, so multi-word patterns such as
+  "export.*user.*data" still match across chunk boundaries while the cost of
+  a scan stays independent of the message length.
+- `ChunkStreamScreen` feeds the steps of one stream to the scanners of their
+  messages and releases steps strictly in their original order.
+
+Author: Limon Halder
+"""
+
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+from logger.logger import log_output, log_threat
+from logger.metrics import timed
+from wrapper.threat_detector import get_pattern_set, is_blocking, scan_text
+
+# Cleared text kept in front of each scan, in characters
+DEFAULT_WINDOW_CHARS = 2048
+
+# Longest partial word held back before its chunk is released anyway
+DEFAULT_MAX_HOLDBACK_CHARS = 64
+
+
+def chunk_text(message: Any) -> str:
+    """
+    Extract the text of a message or message chunk.
+
+    Args:
+        message (Any): A LangChain message/chunk, a dict with `content`, or a string.
+
+    Returns:
+        str: The text content; text blocks of list contents are concatenated.
+    """
+    if isinstance(message, str):
+        return message
+    if isinstance(message, dict):
+        content = message.get("content", "")
+    else:
+        content = getattr(message, "content", "")
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        parts = []
+        for block in content:
+            if isinstance(block, str):
+                parts.append(block)
+            elif isinstance(block, dict) and isinstance(block.get("text"), str):
+                parts.append(block["text"])
+        return "".join(parts)
+    return str(content) if content is not None else ""
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+class IncrementalScanner:
+    """
+    Scans the text of one streamed message as its chunks arrive.
+
+    Attributes:
+        stage (str): Stage recorded on threat log entries.
+        window_chars (int): Cleared text carried into each scan.
+        max_holdback_chars (int): Longest partial word held back.
+        chunks_fed (int): Chunks received so far.
+        chunks_cleared (int): Leading chunks that passed the scan.
+        blocked_text (Optional[str]): The scanned text that contained a critical threat.
+    """
+
+    def __init__(
+        self,
+        stage: str = "output",
+        window_chars: int = DEFAULT_WINDOW_CHARS,
+        max_holdback_chars: int = DEFAULT_MAX_HOLDBACK_CHARS,
+    ):
+        self.stage = stage
+        self.window_chars = window_chars
+        self.max_holdback_chars = max_holdback_chars
+        self.chunks_fed = 0
+        self.chunks_cleared = 0
+        self.blocked_text: Optional[str] = None
+
+        # One consistent rule set for the whole message
+        self._pattern_set = get_pattern_set()
+        self._carry = ""
+        self._pending = ""
+        # End offset in `_pending` of every chunk that is not cleared yet
+        self._pending_ends: Deque[int] = deque()
+        self._reported: Set[str] = set()
+        self._parts: List[str] = []
+
+    def feed(self, text: str) -> bool:
+        """
+        Add the text of the next chunk and clear what can be cleared.
+
+        Args:
+            text (str): The chunk's text (may be empty).
+
+        Returns:
+            bool: False if a critical threat was found, True otherwise.
+        """
+        self.chunks_fed += 1
+        self._pending += text
+        self._pending_ends.append(len(self._pending))
+        self._parts.append(text)
+        return self._clear(self._release_offset())
+
+    def flush(self) -> bool:
+        """
+        Scan and clear everything still held back (end of message or stream).
+
+        Returns:
+            bool: False if a critical threat was found, True otherwise.
+        """
+        return self._clear(len(self._pending))
+
+    def take_text(self) -> str:
+        """Return the message text received since the last call (for the audit log)."""
+        text = "".join(self._parts)
+        self._parts = []
+        return text
+
+    def _release_offset(self) -> int:
+        """Offset up to which pending text may be released: the last word boundary."""
+        pending = self._pending
+        if not pending or not _is_word_char(pending[-1]):
+            return len(pending)
+        start = max(0, len(pending) - self.max_holdback_chars - 1)
+        for index in range(len(pending) - 1, start - 1, -1):
+            if not _is_word_char(pending[index]):
+                return index + 1
+        # No boundary close enough: release rather than hold a huge "word"
+        return len(pending) if len(pending) > self.max_holdback_chars else 0
+
+    def _clear(self, offset: int) -> bool:
+        released = 0
+        end = 0
+        for chunk_end in self._pending_ends:
+            if chunk_end > offset:
+                break
+            released += 1
+            end = chunk_end
+        if not released:
+            return True
+
+        if self._pending[:end] and not self._scan(self._carry + self._pending):
+            return False
+
+        for _ in range(released):
+            self._pending_ends.popleft()
+        if end:
+            self._carry = (self._carry + self._pending[:end])[-self.window_chars :]
+            self._pending = self._pending[end:]
+            self._pending_ends = deque(chunk_end - end for chunk_end in self._pending_ends)
+        self.chunks_cleared += released
+        return True
+
+    def _scan(self, text: str) -> bool:
+        with timed("output_scan"):
+            threats_found = scan_text(text, self._pattern_set)
+
+        # The window overlaps earlier scans, so log each category once per message
+        for threat in threats_found:
+            if threat not in self._reported:
+                self._reported.add(threat)
+                log_threat(threat, text, self.stage, pattern_version=self._pattern_set.version)
+
+        if is_blocking(threats_found):
+            self.blocked_text = text
+            return False
+        return True
+
+
+class ChunkStreamScreen:
+    """
+    Screens the steps of one `stream_mode="messages"` stream.
+
+    Steps are `(message_chunk, metadata)` pairs. Chunks are grouped by message
+    id; a message is finished when a chunk marked `chunk_position="last"` or a
+    complete (non-chunk) message arrives, or when another message starts.
+
+    Attributes:
+        blocked_text (Optional[str]): Text that caused the stream to be blocked.
+    """
+
+    def __init__(
+        self,
+        window_chars: int = DEFAULT_WINDOW_CHARS,
+        max_holdback_chars: int = DEFAULT_MAX_HOLDBACK_CHARS,
+    ):
+        self.window_chars = window_chars
+        self.max_holdback_chars = max_holdback_chars
+        self.blocked_text: Optional[str] = None
+
+        self._scanners: Dict[Any, IncrementalScanner] = {}
+        self._open: Dict[Any, IncrementalScanner] = {}
+        # Steps not released yet: (scanner, position of the step in its message, step)
+        self._queue: Deque[Tuple[Optional[IncrementalScanner], int, Any]] = deque()
+
+    @staticmethod
+    def _is_complete(message: Any) -> bool:
+        if getattr(message, "chunk_position", None) == "last":
+            return True
+        return not type(message).__name__.endswith("Chunk")
+
+    @staticmethod
+    def _message_key(message: Any, metadata: Any) -> Any:
+        key = message.get("id") if isinstance(message, dict) else getattr(message, "id", None)
+        if key:
+            return key
+        if isinstance(metadata, dict):
+            return (metadata.get("langgraph_node"), metadata.get("langgraph_step"))
+        return None
+
+    def push(self, step: Any) -> Tuple[List[Any], bool]:
+        """
+        Scan one step.
+
+        Args:
+            step (Any): A `(message, metadata)` pair from the agent stream; anything
+                else is passed through in order.
+
+        Returns:
+            Tuple[List[Any], bool]: Steps that may be released now, and False if
+                the stream must be blocked.
+        """
+        if not (isinstance(step, tuple) and len(step) == 2):
+            self._queue.append((None, 0, step))
+            return self._release(), True
+
+        message, metadata = step
+        key = self._message_key(message, metadata)
+
+        # A new message means the others have finished
+        for other_key in [k for k in self._open if k != key]:
+            if not self._finish(other_key):
+                return [], False
+
+        scanner = self._scanners.get(key)
+        if scanner is None:
+            scanner = self._scanners[key] = IncrementalScanner(
+                window_chars=self.window_chars, max_holdback_chars=self.max_holdback_chars
+            )
+        self._open[key] = scanner
+        self._queue.append((scanner, scanner.chunks_fed, step))
+
+        if not scanner.feed(chunk_text(message)):
+            self.blocked_text = scanner.blocked_text
+            return [], False
+        if self._is_complete(message) and not self._finish(key):
+            return [], False
+        return self._release(), True
+
+    def flush(self) -> Tuple[List[Any], bool]:
+        """
+        Finish every open message at the end of the stream.
+
+        Returns:
+            Tuple[List[Any], bool]: The remaining steps, and False if blocked.
+        """
+        for key in list(self._open):
+            if not self._finish(key):
+                return [], False
+        return self._release(), True
+
+    def _finish(self, key: Any) -> bool:
+        scanner = self._open.pop(key)
+        if not scanner.flush():
+            self.blocked_text = scanner.blocked_text
+            return False
+        with timed("log"):
+            log_output(scanner.take_text())
+        return True
+
+    def _release(self) -> List[Any]:
+        released = []
+        while self._queue:
+            scanner, position, step = self._queue[0]
+            if scanner is not None and position >= scanner.chunks_cleared:
+                break
+            self._queue.popleft()
+            released.append(step)
+        return released
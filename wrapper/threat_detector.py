@@ -2,83 +2,249 @@
 Threat Detection Module
 
 This module provides mechanisms to:
-- Load threat patterns from a YAML configuration file
-- Compile regex patterns
-- Scan input/output text for known threats
+- Load versioned threat pattern sets from a YAML configuration file, with
+  hot reload (see `wrapper.pattern_set`)
+- Scan input/output text for known threats in a single pass, reusing the
+  verdicts of identical texts (see `wrapper.verdict_cache`)
+- Scan very large texts in bounded segments, optionally under a best-effort
+  time budget with a fail-closed or fail-open policy when it runs out
+- Optionally run large scans in a warm process pool (see `wrapper.scan_pool`)
 - Block critical threats and log incidents
+- Rescan large batches of texts (e.g. archived transcripts) across processes
+
+Configuration (environment variables):
+    THREAT_SCAN_SEGMENT_CHARS: Segment length for long texts (default 65536).
+    THREAT_SCAN_OVERLAP_CHARS: Overlap between segments (default 1024).
+    THREAT_SCAN_BUDGET_SECONDS: Time budget per scan; 0 disables (default 0).
+        Best-effort: it is checked between regex searches, not within one.
+    THREAT_SCAN_BUDGET_POLICY: "fail_closed" (block) or "fail_open" (allow)
+        when the budget is exceeded (default fail_closed).
+    THREAT_SCAN_PROCESSES: Worker processes for large scans; 0 keeps every
+        scan in-process (default 0).
+    THREAT_SCAN_OFFLOAD_CHARS: Smallest text sent to the pool (default 65536).
 
 Author: Limon Halder
 """
 
-import re
-import yaml
-from typing import Dict, List, Pattern
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from logger.logger import log_threat, logger
+from wrapper.pattern_scanner import ScanBudgetExceeded, ThreatScanner
+from wrapper.scan_pool import ScanPool
+from wrapper.pattern_set import (  # noqa: F401 - re-exported for existing callers
+    PatternSet,
+    PatternStore,
+    compile_threat_patterns,
+    load_threat_patterns_from_yaml,
+)
+from wrapper.verdict_cache import VerdictCache, text_digest
+
+
+# Active rules; loaded on first use and reloaded when the rules file changes
+PATTERN_STORE = PatternStore()
+
+# Verdicts of recently scanned texts, per pattern-set version
+VERDICT_CACHE = VerdictCache()
+
+# These are considered severe and should block message
+CRITICAL_THREATS = frozenset(
+    {
+        "Prompt Injection",
+        "Data Exfiltration",
+        "Social Engineering",
+        "Unauthorized Access",
+    }
+)
+
+# Reported when a scan runs out of time; blocks under the fail_closed policy
+SCAN_BUDGET_EXCEEDED = "Scan Budget Exceeded"
+
+SCAN_SEGMENT_CHARS = int(os.getenv("THREAT_SCAN_SEGMENT_CHARS", "65536"))
+SCAN_OVERLAP_CHARS = int(os.getenv("THREAT_SCAN_OVERLAP_CHARS", "1024"))
+# Off by default: under fail_closed, a slow but benign input would be blocked
+SCAN_BUDGET_SECONDS = float(os.getenv("THREAT_SCAN_BUDGET_SECONDS", "0"))
+# Any value other than "fail_open" fails closed
+SCAN_BUDGET_POLICY = os.getenv("THREAT_SCAN_BUDGET_POLICY", "fail_closed")
+
+# Process pool for large scans; created on first use when THREAT_SCAN_PROCESSES is set
+SCAN_POOL: Optional[ScanPool] = None
+_scan_pool_lock = threading.Lock()
+
+
+def get_pattern_set() -> PatternSet:
+    """
+    Return the active threat rules.
+
+    Returns:
+        PatternSet: The current versioned pattern set.
+    """
+    return PATTERN_STORE.current
+
+
+def get_threat_scanner() -> ThreatScanner:
+    """
+    Return the scanner of the active threat rules.
+
+    Returns:
+        ThreatScanner: The scanner built from the current pattern set.
+    """
+    return PATTERN_STORE.current.scanner
+
+
+def reload_threat_patterns() -> PatternSet:
+    """
+    Reload the threat rules file now instead of waiting for the mtime check.
+
+    Returns:
+        PatternSet: The active set afterwards.
+    """
+    return PATTERN_STORE.reload()
 
-from logger.logger import log_threat
 
+def __getattr__(name: str) -> Any:
+    # RAW_THREAT_PATTERNS, THREAT_PATTERNS and THREAT_SCANNER stay importable
+    # as module attributes and always reflect the active pattern set.
+    if name == "RAW_THREAT_PATTERNS":
+        return PATTERN_STORE.current.raw
+    if name == "THREAT_PATTERNS":
+        return PATTERN_STORE.current.compiled
+    if name == "THREAT_SCANNER":
+        return PATTERN_STORE.current.scanner
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-def load_threat_patterns_from_yaml(
-    path: str = "wrapper/config.yml",
-) -> Dict[str, List[str]]:
+
+def enable_scan_offload(
+    processes: Optional[int] = None, min_chars: Optional[int] = None
+) -> ScanPool:
     """
-    Load raw threat patterns from a YAML file.
+    Send scans of large texts to a warm process pool.
 
     Args:
-        path (str): Path to the YAML file.
+        processes (Optional[int]): Worker processes (default: CPU count).
+        min_chars (Optional[int]): Smallest offloaded text; THREAT_SCAN_OFFLOAD_CHARS
+            or 65536.
 
     Returns:
-        Dict[str, List[str]]: A dictionary of threat categories and their associated regex strings.
+        ScanPool: The started pool.
     """
-    try:
-        with open(path, "r") as file:
-            patterns = yaml.safe_load(file)
-        if not isinstance(patterns, dict):
-            print(f"⚠️ Warning: Expected dict from YAML, got {type(patterns)}")
-            return {}
-        return patterns
-    except Exception as e:
-        print(f"⚠️ Warning: Failed to load threat patterns from '{path}': {e}")
-        return {}
+    global SCAN_POOL
+    if min_chars is None:
+        min_chars = int(os.getenv("THREAT_SCAN_OFFLOAD_CHARS", "65536"))
+    with _scan_pool_lock:
+        previous, SCAN_POOL = SCAN_POOL, ScanPool(processes, min_chars)
+    if previous is not None:
+        previous.shutdown()
+    return SCAN_POOL.start()
+
+
+def disable_scan_offload() -> None:
+    """Stop the scan pool; every scan runs in-process again."""
+    global SCAN_POOL
+    with _scan_pool_lock:
+        pool, SCAN_POOL = SCAN_POOL, None
+    if pool is not None:
+        pool.shutdown()
+
+
+def _get_scan_pool() -> Optional[ScanPool]:
+    global SCAN_POOL
+    if SCAN_POOL is None and int(os.getenv("THREAT_SCAN_PROCESSES", "0")) > 0:
+        with _scan_pool_lock:
+            if SCAN_POOL is None:
+                SCAN_POOL = ScanPool(
+                    int(os.environ["THREAT_SCAN_PROCESSES"]),
+                    int(os.getenv("THREAT_SCAN_OFFLOAD_CHARS", "65536")),
+                )
+    return SCAN_POOL
 
 
-def compile_threat_patterns(
-    raw_patterns: Dict[str, List[str]]
-) -> Dict[str, List[Pattern]]:
+def scan_text(text: str, pattern_set: Optional[PatternSet] = None) -> Tuple[str, ...]:
     """
-    Compile raw regex strings into regex Pattern objects.
+    Scan a text in bounded segments under the configured time budget.
+
+    Texts of at least the pool's `min_chars` go to the scan pool when one is
+    enabled; everything else, and any scan the pool cannot take, runs inline.
 
     Args:
-        raw_patterns (Dict[str, List[str]]): Raw threat patterns loaded from YAML.
+        text (str): The text to analyze.
+        pattern_set (Optional[PatternSet]): Rules to use; the active set by default.
 
     Returns:
-        Dict[str, List[Pattern]]: Compiled regex patterns per threat type.
-    """
-    compiled: Dict[str, List[Pattern]] = {}
-
-    for threat_name, patterns in raw_patterns.items():
-        compiled[threat_name] = []
-        if isinstance(patterns, list):
-            for p in patterns:
-                try:
-                    compiled_pattern = re.compile(p, re.IGNORECASE)
-                    compiled[threat_name].append(compiled_pattern)
-                except re.error as e:
-                    print(
-                        f"⚠️ Warning: Invalid regex pattern '{p}' for threat "
-                        f"'{threat_name}': {e}"
-                    )
-        else:
-            print(
-                f"⚠️ Warning: Patterns for threat '{threat_name}' should be a list, "
-                f"got {type(patterns)}"
+        Tuple[str, ...]: Matching categories. If the budget ran out, the
+            categories found so far followed by SCAN_BUDGET_EXCEEDED.
+    """
+    if pattern_set is None:
+        pattern_set = get_pattern_set()
+
+    pool = _get_scan_pool()
+    if pool is not None and len(text) >= pool.min_chars:
+        # The worker enforces the budget itself; the wait only guards against a stuck worker
+        timeout = SCAN_BUDGET_SECONDS + 5.0 if SCAN_BUDGET_SECONDS > 0 else None
+        try:
+            threats_found = pool.scan(text, pattern_set, timeout)
+            if threats_found is not None:
+                return threats_found
+        except FutureTimeoutError:
+            # Reported like an exceeded budget, so the verdict is not cached either
+            logger.warning(f"Threat scan of {len(text)} characters timed out in the scan pool")
+            return (SCAN_BUDGET_EXCEEDED,)
+        except Exception as e:
+            logger.error(f"Threat scan pool failed, scanning in-process: {e}")
+
+    return scan_text_inline(text, pattern_set)
+
+
+def scan_text_inline(text: str, pattern_set: PatternSet) -> Tuple[str, ...]:
+    """
+    `scan_text` without the process pool (also what pool workers run).
+
+    Args:
+        text (str): The text to analyze.
+        pattern_set (PatternSet): Rules to use.
+
+    Returns:
+        Tuple[str, ...]: As for `scan_text`.
+    """
+    deadline = time.monotonic() + SCAN_BUDGET_SECONDS if SCAN_BUDGET_SECONDS > 0 else None
+    try:
+        return tuple(
+            pattern_set.scanner.scan_segments(
+                text, SCAN_SEGMENT_CHARS, SCAN_OVERLAP_CHARS, deadline
             )
+        )
+    except ScanBudgetExceeded as e:
+        logger.warning(
+            f"Threat scan of {len(text)} characters exceeded its {SCAN_BUDGET_SECONDS}s budget "
+            f"({SCAN_BUDGET_POLICY})"
+        )
+        return e.found + (SCAN_BUDGET_EXCEEDED,)
 
-    return compiled
 
+def is_blocking(threats_found: Iterable[str]) -> bool:
+    """
+    Decide whether scan results must block the message.
 
-# Load and compile threat patterns on module load
-RAW_THREAT_PATTERNS: Dict[str, List[str]] = load_threat_patterns_from_yaml()
-THREAT_PATTERNS: Dict[str, List[Pattern]] = compile_threat_patterns(RAW_THREAT_PATTERNS)
+    Args:
+        threats_found (Iterable[str]): Categories returned by `scan_text`.
+
+    Returns:
+        bool: True for a critical threat, or an exceeded budget under fail_closed.
+    """
+    for threat in threats_found:
+        if threat in CRITICAL_THREATS:
+            return True
+        if threat == SCAN_BUDGET_EXCEEDED and SCAN_BUDGET_POLICY != "fail_open":
+            return True
+    return False
 
 
 def check_for_threats(text: str, stage: str = "input") -> bool:
@@ -95,23 +261,148 @@ def check_for_threats(text: str, stage: str = "input") -> bool:
     if not isinstance(text, str):
         text = str(text) if text is not None else ""
 
-    threats_found: List[str] = []
-
-    for threat_name, patterns in THREAT_PATTERNS.items():
-        for pattern in patterns:
-            if pattern.search(text):
-                threats_found.append(threat_name)
-                break  # Stop checking more patterns in this threat category
+    pattern_set = get_pattern_set()
+    threats_found: Optional[Tuple[str, ...]] = None
+    if VERDICT_CACHE.enabled:
+        digest = text_digest(text)
+        threats_found = VERDICT_CACHE.get(digest, pattern_set.version)
+    cache_hit = threats_found is not None
+    if threats_found is None:
+        threats_found = scan_text(text, pattern_set)
+        # An incomplete scan is not a verdict: the next check scans again
+        if VERDICT_CACHE.enabled and SCAN_BUDGET_EXCEEDED not in threats_found:
+            VERDICT_CACHE.put(digest, pattern_set.version, threats_found)
 
+    # Every detection is logged, cached or not, so the audit trail stays complete
     for threat in threats_found:
-        log_threat(threat, text, stage)
+        log_threat(threat, text, stage, pattern_version=pattern_set.version, cache_hit=cache_hit)
+
+    return not is_blocking(threats_found)
+
+
+# Scanner used by batch worker processes, built once per worker
+_worker_scanner: Optional[ThreatScanner] = None
+
+
+def _init_batch_worker(raw_patterns: Dict[str, List[str]]) -> None:
+    global _worker_scanner
+    _worker_scanner = ThreatScanner(compile_threat_patterns(raw_patterns))
+
+
+def _scan_masks(texts: List[str]) -> List[int]:
+    return [_worker_scanner.scan_mask(text) for text in texts]
+
+
+def _as_text(text: Any) -> str:
+    if isinstance(text, str):
+        return text
+    return str(text) if text is not None else ""
+
+
+def check_for_threats_batch(
+    texts: Iterable[Any],
+    stage: str = "batch",
+    log: bool = False,
+    processes: Optional[int] = None,
+    chunk_size: int = 512,
+) -> Iterator[Tuple[str, ...]]:
+    """
+    Scan many texts and yield the threat categories found in each, in input order.
+
+    Texts are consumed lazily in bounded windows, so an iterator over a huge
+    file never has to fit in memory. Results are tuples of category names;
+    texts with the same hits share one tuple object.
+
+    Args:
+        texts (Iterable[Any]): Texts to scan; non-strings are converted with `str()`.
+        stage (str): Stage recorded on threat log entries.
+        log (bool): Whether to call `log_threat` for every hit (off by default).
+        processes (Optional[int]): Number of worker processes; None or 1 scans in-process.
+        chunk_size (int): Texts sent to a worker per task.
+
+    Yields:
+        Tuple[str, ...]: Matching categories for each text (empty if none).
+    """
+    texts = (_as_text(text) for text in texts)
+    pattern_set = get_pattern_set()  # One consistent set for the whole batch
+    raw_patterns, scanner = pattern_set.raw, pattern_set.scanner
+
+    if not processes or processes <= 1:
+        for text in texts:
+            hits = scanner.decode_mask(scanner.scan_mask(text))
+            if log:
+                for threat in hits:
+                    log_threat(threat, text, stage)
+            yield hits
+        return
+
+    # Keep a few chunks per worker in flight, but never the whole input
+    window_size = chunk_size * processes * 4
+    with multiprocessing.Pool(
+        processes, initializer=_init_batch_worker, initargs=(raw_patterns,)
+    ) as pool:
+        while True:
+            window = list(islice(texts, window_size))
+            if not window:
+                break
+            chunks = [window[i : i + chunk_size] for i in range(0, len(window), chunk_size)]
+            for chunk, masks in zip(chunks, pool.imap(_scan_masks, chunks)):
+                for text, mask in zip(chunk, masks):
+                    hits = scanner.decode_mask(mask)
+                    if log:
+                        for threat in hits:
+                            log_threat(threat, text, stage)
+                    yield hits
+
+
+def iter_texts_from_file(path: str, field: Optional[str] = "text") -> Iterator[Any]:
+    """
+    Stream texts from a file without loading it into memory.
+
+    Files ending in `.jsonl` are read as one JSON object per line and `field`
+    is extracted from each; any other file yields one text per line.
+
+    Args:
+        path (str): Path to the file.
+        field (Optional[str]): JSON field holding the text (JSONL files only).
+
+    Yields:
+        Any: One text per record.
+    """
+    with open(path, "r", encoding="utf-8") as file:
+        if path.endswith(".jsonl"):
+            for line in file:
+                if line.strip():
+                    yield json.loads(line).get(field)
+        else:
+            for line in file:
+                yield line.rstrip("\n")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Command-line batch rescan: writes one JSON line per input record with its hits.
+
+    Example:
+        python -m wrapper.threat_detector archive.jsonl --field content --processes 8
+    """
+    parser = argparse.ArgumentParser(description="Rescan texts for threat patterns.")
+    parser.add_argument("path", help="Text file (one text per line) or JSONL file.")
+    parser.add_argument("--field", default="text", help="JSON field holding the text.")
+    parser.add_argument("--processes", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--chunk-size", type=int, default=512)
+    parser.add_argument("--only-hits", action="store_true", help="Skip clean records.")
+    args = parser.parse_args(argv)
+
+    results = check_for_threats_batch(
+        iter_texts_from_file(args.path, args.field),
+        processes=args.processes,
+        chunk_size=args.chunk_size,
+    )
+    for index, hits in enumerate(results):
+        if hits or not args.only_hits:
+            sys.stdout.write(json.dumps({"index": index, "threats": list(hits)}) + "\n")
 
-    # These are considered severe and should block message
-    critical_threats = {
-        "Prompt Injection",
-        "Data Exfiltration",
-        "Social Engineering",
-        "Unauthorized Access",
-    }
 
-    return not any(threat in critical_threats for threat in threats_found)
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Threat Verdict Cache
+
+Remembers which threat categories a text matched, so identical text (system
+prompts, repeated questions, retried requests, the same tool result fed back
+to the LLM) is scanned once per pattern-set version instead of on every call.
+
+Entries are keyed by a 128-bit BLAKE2b digest of the text plus the version of
+the pattern set that produced the verdict. A rules reload therefore never
+serves a stale verdict: entries for the old version simply stop being hit and
+age out. The cache is an LRU bounded both by entry count and by an estimate of
+its memory use; the texts themselves are never stored.
+
+Configuration (environment variables):
+    THREAT_VERDICT_CACHE_SIZE: Maximum entries; 0 disables caching (default 10000).
+    THREAT_VERDICT_CACHE_MAX_BYTES: Approximate memory cap (default 4 MiB).
+
+Author: Limon Halder
+"""
+
+import hashlib
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from logger.metrics import METRICS, VERDICT_CACHE_LOOKUPS
+
+Verdict = Tuple[str, ...]
+CacheKey = Tuple[bytes, str]
+
+# Per-entry bookkeeping not covered by the key and verdict sizes: the
+# OrderedDict node and hash table slot, the key tuple and the size record.
+ENTRY_OVERHEAD_BYTES = 160
+
+# Long texts are encoded and hashed in slices of this many characters, so
+# hashing never holds a second full-size copy of the text
+DIGEST_SLICE_CHARS = 1 << 20
+
+
+def text_digest(text: str) -> bytes:
+    """
+    Hash a text for use as a cache key.
+
+    Args:
+        text (str): Text to hash.
+
+    Returns:
+        bytes: 16-byte BLAKE2b digest of the UTF-8 encoded text.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for start in range(0, len(text), DIGEST_SLICE_CHARS):
+        digest.update(text[start : start + DIGEST_SLICE_CHARS].encode("utf-8", "surrogatepass"))
+    return digest.digest()
+
+
+class VerdictCache:
+    """
+    Thread-safe LRU cache of threat scan verdicts.
+
+    Attributes:
+        max_entries (int): Maximum number of cached verdicts (0 disables the cache).
+        max_bytes (int): Approximate memory budget for all entries.
+        hits (int): Lookups answered from the cache.
+        misses (int): Lookups that required a scan.
+        evictions (int): Entries dropped to stay within the limits.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None):
+        """
+        Args:
+            max_entries (Optional[int]): Entry limit; THREAT_VERDICT_CACHE_SIZE or 10000.
+            max_bytes (Optional[int]): Memory limit; THREAT_VERDICT_CACHE_MAX_BYTES or 4 MiB.
+        """
+        if max_entries is None:
+            max_entries = int(os.getenv("THREAT_VERDICT_CACHE_SIZE", "10000"))
+        if max_bytes is None:
+            max_bytes = int(os.getenv("THREAT_VERDICT_CACHE_MAX_BYTES", str(4 * 1024 * 1024)))
+        self.max_entries = max(0, max_entries)
+        self.max_bytes = max(0, max_bytes)
+
+        self._entries: "OrderedDict[CacheKey, Tuple[Verdict, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    def get(self, digest: bytes, version: str) -> Optional[Verdict]:
+        """
+        Look up the verdict for a text digest under a pattern-set version.
+
+        Args:
+            digest (bytes): `text_digest()` of the text.
+            version (str): Version of the pattern set used for scanning.
+
+        Returns:
+            Optional[Verdict]: Cached categories (possibly empty), or None on a miss.
+        """
+        key = (digest, version)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        METRICS.inc(VERDICT_CACHE_LOOKUPS, result="miss" if entry is None else "hit")
+        return None if entry is None else entry[0]
+
+    def put(self, digest: bytes, version: str, verdict: Sequence[str]) -> None:
+        """
+        Store a verdict, evicting the least recently used entries if needed.
+
+        Args:
+            digest (bytes): `text_digest()` of the scanned text.
+            version (str): Version of the pattern set that produced the verdict.
+            verdict (Sequence[str]): Threat categories found (empty if none).
+        """
+        if not self.enabled:
+            return
+        key = (digest, version)
+        verdict = tuple(verdict)
+        size = (
+            ENTRY_OVERHEAD_BYTES
+            + len(digest)
+            + sys.getsizeof(version)
+            + sys.getsizeof(verdict)
+        )
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (verdict, size)
+            self._bytes += size
+            while self._entries and (
+                len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+            ):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every entry and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return the cache counters.
+
+        Returns:
+            Dict[str, Any]: entries, approximate bytes, hits, misses, evictions
+                and hit_rate (0.0 before the first lookup).
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)